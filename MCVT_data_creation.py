@@ -5,50 +5,68 @@ This script reads a dictionary from a file and prints its contents.
 ID_COUNT = 0 
 
 import argparse
+import numpy as np
 import pandas as pd
 import os
 import json
+from concurrent.futures import ProcessPoolExecutor
 
-def format_detection_line(cam_num, info, id_index):
+import profiling
+from mot_io import MTMC_FORMATS, atomic_open, iter_formatted, mtmc_gt_columns
+from track_store import load_track_arrays
+
+def ground_truth_columns(cam_num, tracks, arrs):
     """
-    Formats a detection into a line with the following fields:
+    Builds the ground-truth columns of one camera:
       camera_id, obj_id, frame_id, xmin, ymin, width, height, xworld, yworld
-    Expects 'info' to be a tuple: (frame, [x1, y1, x2, y2], cls).
-    Here, xworld and yworld are fixed to -1.
+    'tracks' maps track ids to {'ori_id', 'new_id'}; the rows of each 'ori_id' are
+    gathered from the camera's TrackArrays in one go. xworld and yworld are fixed to -1.
+    Rows are sorted by frame and then obj_id, so a file written camera by camera in
+    increasing order can be streamed by eval_label.py --window.
     """
-    frame_num = int(info[0])
-    bbox = info[1]
-    x1, y1, x2, y2 = bbox
-    width = x2 - x1
-    height = y2 - y1
-    xworld = -1
-    yworld = -1
-    line = f"{cam_num} {id_index} {frame_num} {x1:.2f} {y1:.2f} {width:.2f} {height:.2f} {xworld} {yworld}"
-    return line
+    rows, new_ids = [], []
+    for data in tracks.values():
+        sl = arrs.track_slice(data['ori_id'])
+        if sl is not None:
+            rows.append(np.arange(sl.start, sl.stop))
+            new_ids += [data['new_id']] * (sl.stop - sl.start)
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    new_ids = np.asarray(new_ids, dtype=np.int64)
+    order = np.lexsort((new_ids, arrs.frame[rows]))
+    rows, new_ids = rows[order], new_ids[order]
+    return mtmc_gt_columns(cam_num, new_ids, arrs.frame[rows], arrs.x1[rows], arrs.y1[rows],
+                           arrs.x2[rows], arrs.y2[rows])
+
+TRACK_FILE = '/home/yuqiang/yl4300/project/MCVT_YQ/datasets/algorithm_results/detect_merge/imagesc00{cam_id}/imagesc00{cam_id}_mot_interpolated_final.txt'
 
 def read_tracks(cam_id):
-    data = {}
-    filepath = f'/home/yuqiang/yl4300/project/MCVT_YQ/datasets/algorithm_results/detect_merge/imagesc00{cam_id}/imagesc00{cam_id}_mot_interpolated_final.txt'
+    filepath = TRACK_FILE.format(cam_id=cam_id)
     if not os.path.exists(filepath):
         print(f"File {filepath} does not exist.")
-        data = {}
-    else:
-        with open(filepath, 'r') as f:
-            for line in f:
-                parts = line.strip().split()
-                if len(parts) < 7:
-                    continue
-                frame = int(float(parts[0]))
-                track_id = int(float(parts[1]))
-                x1 = float(parts[2])
-                y1 = float(parts[3])
-                x2 = float(parts[4])
-                y2 = float(parts[5])
-                cls = int(float(parts[6]))
-                if track_id not in data:
-                    data[track_id] = []
-                data[track_id].append((frame, [x1, y1, x2, y2], cls))
-    return data
+        return None
+    return load_track_arrays(filepath, require_cls=True)
+
+def build_track_store(filepath):
+    """
+    Parses one camera's tracklet file into its on-disk columnar store (keyed by the
+    file's content hash, see track_store.py). Runs in a worker process.
+    """
+    return len(load_track_arrays(filepath))
+
+def read_all_tracks(cam_ids, workers=None):
+    """
+    Loads the tracklet data of several cameras. Stale or missing stores are rebuilt
+    concurrently in a process pool; unchanged files are just mapped from their store,
+    so re-running after editing only the Excel sheet does not re-parse anything.
+    """
+    cam_ids = list(cam_ids)
+    filepaths = [TRACK_FILE.format(cam_id=cam_id) for cam_id in cam_ids]
+    existing = [fp for fp in filepaths if os.path.exists(fp)]
+    if len(existing) > 1 and workers != 1:
+        with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(existing))) as pool:
+            for fp, n in zip(existing, pool.map(build_track_store, existing)):
+                print(f"Loaded {n} detections from {fp}")
+    return {cam_id: read_tracks(cam_id) for cam_id in cam_ids}
 
 def read_data(df, cam_id1, cam_id2, name, reid_dict): 
     # e.g 1->2, cam_id1 is 1, cam_id2 is 2
@@ -181,66 +199,86 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Create MCVT ground truth data from Excel file.')
     parser.add_argument('file_path', nargs='?', default='../temp_res/Vehicle Tracking Final copy.xlsx',
                         help='Path to the Excel file (default: ../temp_res/Vehicle Tracking Final copy.xlsx)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processes used to parse camera tracklet files (default: one per camera, 1 = serial)')
+    parser.add_argument('--parquet', default=None, metavar='DIR',
+                        help='Also write the ground truth as a camera-partitioned Parquet data set (requires pyarrow)')
+    profiling.add_arguments(parser)
     args = parser.parse_args()
-    file_path = args.file_path
-    reid_dict = {}
-    xls = pd.ExcelFile(file_path)
-    sheet_names = xls.sheet_names
-    # View all sheet names
-    print(xls.sheet_names)
-
-    for sheetname in sheet_names:
-        print(f"Reading sheet: {sheetname}")
+    with profiling.session('MCVT_data_creation', args):
+        file_path = args.file_path
+        reid_dict = {}
+        xls = pd.ExcelFile(file_path)
+        sheet_names = xls.sheet_names
+        # View all sheet names
+        print(xls.sheet_names)
+
+        for sheetname in sheet_names:
+            print(f"Reading sheet: {sheetname}")
     
-        # Read the sheet into a DataFrame
-        df = pd.read_excel(xls, sheet_name=f'{sheetname}')
-
-        # if the sheet name is 2->3, the cam_id1 is 2
-        cam_id1 = int(sheetname[0]) # inlet
-        cam_id2 = int(sheetname[-1]) # exit
-        print(f"Processing pair: {cam_id1} -> {cam_id2}")
-
-        # Define the name of reid_dict
-        if cam_id1 < cam_id2:
-            name = f"{cam_id1}_{cam_id2}"
-        else:
-            name = f"{cam_id2}_{cam_id1}"
-
-        if name not in reid_dict:
-            reid_dict[name] = {}
-        read_data(df, cam_id1, cam_id2, name, reid_dict)
-
-    # DATA read complete---------------------------------------
-    print('Data read complete.')
-    # Print all keys in reid_dict
-    print("Keys in reid_dict:")
-    for key in reid_dict.keys():
-        print(key)
-
-    final_redict = reid_dict['1_2']
-
-    # merge reid_dict[key] into final_redict
-    for key in reid_dict.keys():
-        if key != '1_2':
-            print(f"Merging {key} into final_redict")
-            final_redict = reid_dict_cat(final_redict, reid_dict[key])
-
-    with open('final_redict.json', 'w') as f:
-        json.dump(final_redict, f, indent=2)
-    print("reid_dict merge complete. . . ")
-    print('Writing to Multi_CAM_Ground_Turth.txt...')
-
-    vehicle_number_count(final_redict)
-
-    with open('Multi_CAM_Ground_Turth.txt', 'w') as f:
-        for cam_id, tracks in final_redict.items():
-            print(f"Camera ID: {cam_id}")
-            trackletdata = read_tracks(cam_id)
-            for track_id, data in tracks.items():
-                ori_id = data['ori_id']
-                new_id = data['new_id']
-                if ori_id in trackletdata:
-                    info = trackletdata[ori_id]
-                    for item in info:
-                        line = format_detection_line(cam_id, item, new_id)
-                        f.write(line + '\n')
\ No newline at end of file
+            # Read the sheet into a DataFrame
+            with profiling.phase('read_excel') as ph:
+                df = pd.read_excel(xls, sheet_name=f'{sheetname}')
+                ph.rows = len(df)
+
+            # if the sheet name is 2->3, the cam_id1 is 2
+            cam_id1 = int(sheetname[0]) # inlet
+            cam_id2 = int(sheetname[-1]) # exit
+            print(f"Processing pair: {cam_id1} -> {cam_id2}")
+
+            # Define the name of reid_dict
+            if cam_id1 < cam_id2:
+                name = f"{cam_id1}_{cam_id2}"
+            else:
+                name = f"{cam_id2}_{cam_id1}"
+
+            if name not in reid_dict:
+                reid_dict[name] = {}
+            read_data(df, cam_id1, cam_id2, name, reid_dict)
+
+        # DATA read complete---------------------------------------
+        print('Data read complete.')
+        # Print all keys in reid_dict
+        print("Keys in reid_dict:")
+        for key in reid_dict.keys():
+            print(key)
+
+        final_redict = reid_dict['1_2']
+
+        # merge reid_dict[key] into final_redict
+        with profiling.phase('merge_ids') as ph:
+            for key in reid_dict.keys():
+                if key != '1_2':
+                    print(f"Merging {key} into final_redict")
+                    final_redict = reid_dict_cat(final_redict, reid_dict[key])
+            ph.rows = sum(len(tracks) for tracks in final_redict.values())
+
+        with open('final_redict.json', 'w') as f:
+            json.dump(final_redict, f, indent=2)
+        print("reid_dict merge complete. . . ")
+        print('Writing to Multi_CAM_Ground_Turth.txt...')
+
+        vehicle_number_count(final_redict)
+
+        with profiling.phase('load_tracks') as ph:
+            all_trackletdata = read_all_tracks(final_redict.keys(), workers=args.workers)
+            ph.rows = sum(len(arrs) for arrs in all_trackletdata.values() if arrs is not None)
+
+        # Written to a temporary file and renamed, so an interrupted run keeps the previous file.
+        with profiling.phase('write_txt') as ph, atomic_open('Multi_CAM_Ground_Turth.txt') as f:
+            ph.rows = 0
+            for cam_id, tracks in sorted(final_redict.items()):
+                print(f"Camera ID: {cam_id}")
+                trackletdata = all_trackletdata[cam_id]
+                if trackletdata is None:
+                    continue
+                columns = ground_truth_columns(cam_id, tracks, trackletdata)
+                ph.rows += len(columns[2])
+                for text in iter_formatted(columns, MTMC_FORMATS):
+                    f.write(text)
+
+        if args.parquet:
+            from mtmc_parquet import convert_text
+            with profiling.phase('write_parquet') as ph:
+                n = ph.rows = convert_text('Multi_CAM_Ground_Turth.txt', args.parquet)
+            print(f"Wrote {n} rows to Parquet data set {args.parquet}")
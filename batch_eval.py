@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+batch_eval.py
+─────────────
+
+Batch mode shared by ``eval_sct.py`` and ``eval_label.py``: evaluate many
+predictions against their ground truths in one process, e.g. every tracker
+of a comparison sweep.
+
+A manifest lists one evaluation per line, whitespace-separated::
+
+    # groundtruth                           prediction                                   [name]
+    imagesc001_mot_interpolated_final.txt   c001_botsort_sct_boxmot_results_filtered.txt  c001_botsort
+    imagesc001_mot_interpolated_final.txt   c001_ocsort_sct_boxmot_results_filtered.txt   c001_ocsort
+
+Relative paths are resolved against the manifest's directory; the name
+defaults to the prediction file name without extension. Each ground truth is
+loaded once in the main process before the worker processes are started, so
+forked workers share it instead of re-parsing it; predictions are loaded and
+evaluated in the workers. The per-prediction summaries are returned as one
+table indexed by name, in manifest order. With a `result_cache.ResultCache`,
+entries whose result is cached are not evaluated (and their ground truth is
+not loaded unless another entry needs it).
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import repeat
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from result_cache import ResultCache
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    gt: str
+    prediction: str
+    name: str
+
+
+def read_manifest(path: str) -> List[ManifestEntry]:
+    """Parse a manifest (see module docstring); raises ValueError on malformed lines or duplicate names."""
+    base = os.path.dirname(os.path.abspath(path))
+    entries, seen = [], set()
+    with open(path) as fh:
+        for lineno, line in enumerate(fh, 1):
+            fields = line.split("#", 1)[0].split()
+            if not fields:
+                continue
+            if len(fields) not in (2, 3):
+                raise ValueError(f"{path}:{lineno}: expected '<groundtruth> <prediction> [name]', got {line.strip()!r}")
+            gt, pred = (os.path.join(base, os.path.expanduser(f)) for f in fields[:2])
+            name = fields[2] if len(fields) == 3 else os.path.splitext(os.path.basename(pred))[0]
+            if name in seen:
+                raise ValueError(f"{path}:{lineno}: duplicate name {name!r}")
+            seen.add(name)
+            entries.append(ManifestEntry(os.path.normpath(gt), os.path.normpath(pred), name))
+    if not entries:
+        raise ValueError(f"{path}: no entries")
+    return entries
+
+
+# ground truths loaded by run_batch, inherited by forked workers
+_GT_CACHE: Dict[str, object] = {}
+
+
+def _evaluate(entry: ManifestEntry, load_gt: Callable, evaluate: Callable) -> pd.DataFrame:
+    gt = _GT_CACHE.get(entry.gt)
+    if gt is None:                      # spawned worker: load it once per process
+        gt = _GT_CACHE[entry.gt] = load_gt(entry.gt)
+    return evaluate(gt, entry.prediction, entry.name)
+
+
+def run_batch(
+    entries: List[ManifestEntry],
+    load_gt: Callable[[str], object],
+    evaluate: Callable[[object, str, str], pd.DataFrame],
+    workers: Optional[int] = None,
+    cache: Optional[ResultCache] = None,
+    cache_spec: Optional[Tuple[str, int, Dict[str, object]]] = None,
+) -> pd.DataFrame:
+    """Evaluate every manifest entry and concatenate the results.
+
+    Params
+    ------
+    entries : list of ManifestEntry
+        Output of `read_manifest`.
+    load_gt : callable
+        ``load_gt(path)`` loads a ground truth; called once per distinct path.
+    evaluate : callable
+        ``evaluate(gt, prediction_path, name)`` returns a one-row summary
+        named *name*. Both callables must be picklable (module-level
+        functions or ``functools.partial`` of them).
+    workers : int
+        Worker processes (default: one per CPU, at most one per entry).
+    cache : ResultCache
+        Optional result cache; *cache_spec* gives the ``(evaluator,
+        version, params)`` of its keys, the inputs being the ground truth
+        and the prediction of each entry.
+    Returns
+    -------
+    pandas.DataFrame
+        The summaries of all entries, in manifest order.
+    """
+    rows, keys = {}, {}
+    if cache is not None:
+        evaluator, version, params = cache_spec
+        for i, e in enumerate(entries):
+            try:
+                keys[i] = cache.key(evaluator, version, {"groundtruth": e.gt, "prediction": e.prediction}, params)
+            except OSError:
+                continue                # missing input: the evaluator reports it
+            hit = cache.get(keys[i])
+            if hit is not None:
+                rows[i] = hit.set_axis([e.name])
+    todo = [i for i in range(len(entries)) if i not in rows]
+
+    for path in dict.fromkeys(entries[i].gt for i in todo):
+        if path not in _GT_CACHE:
+            _GT_CACHE[path] = load_gt(path)
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    if workers <= 1:
+        fresh = [_evaluate(entries[i], load_gt, evaluate) for i in todo]
+    else:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            fresh = list(pool.map(_evaluate, [entries[i] for i in todo], repeat(load_gt), repeat(evaluate)))
+    for i, row in zip(todo, fresh):
+        rows[i] = row
+        if i in keys:
+            e = entries[i]
+            cache.put(keys[i], row, evaluator, {"groundtruth": e.gt, "prediction": e.prediction}, params)
+    return pd.concat([rows[i] for i in range(len(entries))])
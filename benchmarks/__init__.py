@@ -0,0 +1 @@
+"""Performance benchmarks for the labelling toolkit (run from the repository root)."""
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Time the load, match and metric phases of eval_det, eval_sct and eval_label
+on synthetic data of several sizes and write a JSON report.
+
+Example
+-------
+```bash
+python -m benchmarks.bench_evaluators --frames 250 1000 4000 --cameras 4 --objects 40 -o bench.json
+python -m benchmarks.bench_evaluators --frames 250 1000 4000 --compare bench.json   # after a change
+```
+For every size a data set is generated with `benchmarks.synthetic` and each
+evaluator is run through its own functions:
+
+* eval_det   – ``load_labels`` | ``match_labels`` | sort + ``greedy_tp`` + AP at 0.50:0.95,
+* eval_sct   – ``load_data`` (GT + prediction) | ``accumulate`` | ``compute_summary``, summed over cameras,
+* sct_native – ``load_data`` | ``track_metrics.match_tracks`` | ``track_metrics.summarize`` (``--engine native``),
+* eval_label – ``readData`` (GT + prediction) | ``removeRepetition`` + ``idMeasuresMtmc`` (per-camera counts
+  in ``--workers`` processes and the global ID assignment; ``--id-only``),
+* label_clear – ``readData`` | ``removeRepetition`` + ``buildMtmcAccumulator`` | ``summarizeMtmc`` (the
+  CLEAR-MOT part of the default summary, with motmetrics' own ID metrics).
+
+The report holds the environment (git commit, library versions), the
+generator settings and one record per evaluator and size. ``--compare``
+prints the per-phase ratio against an earlier report. Evaluators whose
+dependencies are missing are recorded as skipped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, replace
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from benchmarks.synthetic import SynthConfig, generate  # noqa: E402
+
+EVALUATORS = ("det", "sct", "sct_native", "label", "label_clear")
+DET_THRESHOLDS = [round(0.5 + 0.05 * i, 2) for i in range(10)]
+
+
+class PhaseTimer:
+    """Collects the wall time of named phases."""
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    @contextlib.contextmanager
+    def __call__(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - t0
+
+
+def bench_det(data_dir: str, timer: PhaseTimer, workers: Optional[int]) -> Dict[str, float]:
+    import eval_det
+    from label_pack import open_labels
+
+    gt_dir, pred_dir = os.path.join(data_dir, "det_gt"), os.path.join(data_dir, "det_pred")
+    with timer("load"):
+        names = open_labels(gt_dir).names()
+        gts, preds = eval_det.load_labels(gt_dir, pred_dir, names, workers)
+    with timer("match"):
+        m = eval_det.match_labels(gts, preds)
+    with timer("metric"):
+        order = np.argsort(-preds.score, kind="stable")
+        tp = eval_det.greedy_tp(m.best_iou[order], m.best_gt[order], np.array(DET_THRESHOLDS))
+        aps = eval_det.ap_per_threshold(tp, len(gts.rows))
+    return {"mAP": float(np.mean(aps))}
+
+
+def _sct_cameras(sct_dir: str) -> List[str]:
+    # only the text files: loading them leaves .trk stores next to them
+    return sorted(f[len("gt_c"):-len(".txt")] for f in os.listdir(sct_dir)
+                  if f.startswith("gt_c") and f.endswith(".txt"))
+
+
+def bench_sct(data_dir: str, timer: PhaseTimer, workers: Optional[int]) -> Dict[str, float]:
+    import eval_sct
+
+    sct_dir = os.path.join(data_dir, "sct")
+    cams = _sct_cameras(sct_dir)
+    mota = []
+    for cam in cams:
+        with timer("load"):
+            gt = eval_sct.load_data(os.path.join(sct_dir, f"gt_c{cam}.txt"))
+            pred = eval_sct.load_data(os.path.join(sct_dir, f"pred_c{cam}.txt"))
+        with timer("match"):
+            acc = eval_sct.accumulate(gt, pred)
+        with timer("metric"):
+            summary = eval_sct.compute_summary(acc)
+        mota.append(float(summary["mota"].iloc[0]))
+    return {"mean_mota": float(np.mean(mota))}
+
+
+def bench_sct_native(data_dir: str, timer: PhaseTimer, workers: Optional[int]) -> Dict[str, float]:
+    import eval_sct
+    import track_metrics
+
+    sct_dir = os.path.join(data_dir, "sct")
+    cams = _sct_cameras(sct_dir)
+    mota = []
+    for cam in cams:
+        with timer("load"):
+            gt = eval_sct.load_data(os.path.join(sct_dir, f"gt_c{cam}.txt"))
+            pred = eval_sct.load_data(os.path.join(sct_dir, f"pred_c{cam}.txt"))
+        with timer("match"):
+            events = track_metrics.match_tracks(
+                gt.index.get_level_values(0).to_numpy(), gt.index.get_level_values(1).to_numpy(), gt.to_numpy(),
+                pred.index.get_level_values(0).to_numpy(), pred.index.get_level_values(1).to_numpy(), pred.to_numpy(),
+                max_dist=0.)
+        with timer("metric"):
+            summary = track_metrics.summarize(events)
+        mota.append(float(summary["mota"]))
+    return {"mean_mota": float(np.mean(mota))}
+
+
+def bench_label(data_dir: str, timer: PhaseTimer, workers: Optional[int]) -> Dict[str, float]:
+    import eval_label
+
+    with timer("load"):
+        test = eval_label.readData(os.path.join(data_dir, "mtmc_gt.txt"), workers=workers)
+        pred = eval_label.readData(os.path.join(data_dir, "mtmc_pred.txt"), workers=workers)
+    with timer("match"):
+        summary = eval_label.idMeasuresMtmc(test, eval_label.removeRepetition(pred), workers=workers)
+    return {"idf1": float(summary["idf1"].iloc[0])}
+
+
+def bench_label_clear(data_dir: str, timer: PhaseTimer, workers: Optional[int]) -> Dict[str, float]:
+    import eval_label
+
+    with timer("load"):
+        test = eval_label.readData(os.path.join(data_dir, "mtmc_gt.txt"), workers=workers)
+        pred = eval_label.readData(os.path.join(data_dir, "mtmc_pred.txt"), workers=workers)
+    with timer("match"):
+        acc = eval_label.buildMtmcAccumulator(test, eval_label.removeRepetition(pred))
+    with timer("metric"):
+        summary = eval_label.summarizeMtmc(acc)
+    return {"idf1": float(summary["idf1"].iloc[0])}
+
+
+BENCHES: Dict[str, Callable] = {
+    "det": bench_det,
+    "sct": bench_sct,
+    "sct_native": bench_sct_native,
+    "label": bench_label,
+    "label_clear": bench_label_clear,
+}
+
+
+def environment() -> Dict[str, object]:
+    env = {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+    try:
+        env["commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        env["commit"] = None
+    for mod in ("numpy", "pandas", "scipy", "motmetrics"):
+        try:
+            env[mod] = __import__(mod).__version__
+        except Exception:
+            env[mod] = None
+    return env
+
+
+def run(cfg: SynthConfig, frames: List[int], evaluators: List[str], workers: Optional[int],
+        repeat: int, data_root: Optional[str]) -> List[Dict[str, object]]:
+    records = []
+    for n_frames in frames:
+        size = replace(cfg, frames=n_frames)
+        with tempfile.TemporaryDirectory(dir=data_root) as data_dir:
+            t0 = time.perf_counter()
+            counts = generate(data_dir, size)
+            print(f"── {n_frames} frames × {size.cameras} cameras: {counts['gt_rows']} GT / "
+                  f"{counts['pred_rows']} predicted rows (generated in {time.perf_counter() - t0:.1f} s)")
+            for name in evaluators:
+                record = {"evaluator": name, "frames": n_frames, **counts}
+                best = None
+                try:
+                    for _ in range(repeat):
+                        timer = PhaseTimer()
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            metrics = BENCHES[name](data_dir, timer, workers)
+                        if best is None or sum(timer.phases.values()) < sum(best.values()):
+                            best = timer.phases
+                except ImportError as e:
+                    record["skipped"] = f"ImportError: {e}"
+                    print(f"  {name:<11} skipped ({e})")
+                    records.append(record)
+                    continue
+                record.update(phases=best, total=sum(best.values()), metrics=metrics)
+                print(f"  {name:<11} " + "  ".join(f"{k} {v:7.3f} s" for k, v in best.items())
+                      + f"  | total {record['total']:7.3f} s")
+                records.append(record)
+    return records
+
+
+def compare(records: List[Dict[str, object]], baseline_path: str) -> None:
+    with open(baseline_path) as fh:
+        baseline = json.load(fh)
+    base = {(r["evaluator"], r["frames"]): r for r in baseline["results"] if "phases" in r}
+    print(f"\nRatio against {baseline_path} (commit {baseline['environment'].get('commit')}; < 1 is faster):")
+    for r in records:
+        b = base.get((r["evaluator"], r["frames"]))
+        if b is None or "phases" not in r:
+            continue
+        ratios = "  ".join(f"{k} {v / b['phases'][k]:5.2f}x" for k, v in r["phases"].items()
+                           if b["phases"].get(k))
+        print(f"  {r['evaluator']:<11} {r['frames']:>6} frames  {ratios}  | total {r['total'] / b['total']:5.2f}x")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark the evaluators on synthetic data.")
+    ap.add_argument("--frames", type=int, nargs="+", default=[250, 1000], help="Frames per camera, one run per value.")
+    ap.add_argument("--cameras", type=int, default=4)
+    ap.add_argument("--objects", type=int, default=40, help="Concurrent objects per frame.")
+    ap.add_argument("--id-switch-rate", type=float, default=0.002)
+    ap.add_argument("--miss-rate", type=float, default=0.05)
+    ap.add_argument("--fp-rate", type=float, default=0.02)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--evaluators", nargs="+", choices=EVALUATORS, default=list(EVALUATORS))
+    ap.add_argument("-w", "--workers", type=int, default=None, help="Passed to the evaluators' parallel loaders.")
+    ap.add_argument("--repeat", type=int, default=1, help="Runs per evaluator; the fastest is reported.")
+    ap.add_argument("--data-root", default=None, help="Where to generate the data sets (default: system temp).")
+    ap.add_argument("-o", "--output", default=None, help="Write the JSON report here.")
+    ap.add_argument("--compare", default=None, metavar="REPORT", help="Compare with an earlier JSON report.")
+    args = ap.parse_args()
+
+    cfg = SynthConfig(args.cameras, args.frames[0], args.objects, args.id_switch_rate, args.miss_rate,
+                      args.fp_rate, args.seed)
+    records = run(cfg, args.frames, args.evaluators, args.workers, args.repeat, args.data_root)
+    report = {
+        "environment": environment(),
+        "config": {**asdict(cfg), "frames": args.frames, "workers": args.workers, "repeat": args.repeat},
+        "results": records,
+    }
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"✓ Report written to {args.output}")
+    if args.compare:
+        compare(records, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Measure the peak memory of eval_label on synthetic data and extrapolate it
+to a full data set.
+
+Example
+-------
+```bash
+python -m benchmarks.bench_memory --frames 1000 4000 --cameras 4 --objects 40
+python -m benchmarks.bench_memory --frames 4000 --full-rows 20000000 --budget-gb 16 -o mem.json
+```
+Every measurement runs in a fresh process, which
+
+1. imports eval_label (baseline),
+2. reads the GT and prediction files with ``readData`` (load),
+3. evaluates them with ``eval`` (``--id-only`` with ``--modes ids``, the
+   default full summary with the motmetrics accumulator with ``--modes clear``).
+
+``--modes stream`` skips the load and evaluates straight from the files with
+``streamIdMeasures`` (``--window``), which only holds a chunk and a window of
+each input at a time.
+
+and reports the resident set size after the imports and its peak during
+the load and the evaluation, the peak of the Python/NumPy allocations
+traced during the evaluation and the in-memory size of the loaded data.
+The overall peak above the baseline per input row of the largest size
+gives the estimate for ``--full-rows``, which is checked against
+``--budget-gb``. Worker processes (``-w``) are reported separately.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, replace
+from multiprocessing import get_context
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from benchmarks.synthetic import SynthConfig, generate  # noqa: E402
+from profiling import reset_peak, rss  # noqa: E402
+
+MODES = ("ids", "clear", "stream")
+MB = 1 << 20
+
+
+def _count_rows(path: str) -> int:
+    with open(path, "rb") as fh:
+        return sum(chunk.count(b"\n") for chunk in iter(lambda: fh.read(MB), b""))
+
+
+def _measure(data_dir: str, mode: str, workers: Optional[int]) -> Dict[str, float]:
+    """Run in a fresh process: load and evaluate one data set, return memory figures in bytes."""
+    import contextlib
+    import io
+
+    sys.path.insert(0, ROOT)
+    import eval_label
+
+    out = {"baseline": rss()["rss"]}
+    gt_path, pred_path = os.path.join(data_dir, "mtmc_gt.txt"), os.path.join(data_dir, "mtmc_pred.txt")
+    if mode == "stream":
+        reset_peak()
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        rows = dict(eval_label.streamIdMeasures(gt_path, pred_path, window=1000))
+        out["seconds"] = time.perf_counter() - t0
+        out["eval_traced"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        out["load"] = out["eval"] = rss()["peak"]
+        out["data"] = 0.0
+        out["rows"] = _count_rows(gt_path) + _count_rows(pred_path)
+        out["workers_rss"] = 0
+        out["idf1"] = float(rows["MultiCam"]["idf1"])
+        return out
+
+    reset_peak()
+    test = eval_label.readData(gt_path, workers=workers)
+    pred = eval_label.readData(pred_path, workers=workers)
+    out["load"] = rss()["peak"]
+    out["data"] = float(test.memory_usage(deep=True).sum() + pred.memory_usage(deep=True).sum())
+    out["rows"] = len(test) + len(pred)
+
+    reset_peak()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        summary = eval_label.eval(test, pred, workers=workers, id_only=mode == "ids")
+    out["seconds"] = time.perf_counter() - t0
+    out["eval_traced"] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    out["eval"] = rss()["peak"]
+    # largest worker process; forked workers also count the pages they share with this one
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    out["workers_rss"] = children if sys.platform == "darwin" else children * 1024
+    out["idf1"] = float(summary["idf1"].iloc[0])
+    return out
+
+
+def run(cfg: SynthConfig, frames: List[int], modes: List[str], workers: Optional[int],
+        data_root: Optional[str]) -> List[Dict[str, object]]:
+    records = []
+    for n_frames in frames:
+        size = replace(cfg, frames=n_frames)
+        with tempfile.TemporaryDirectory(dir=data_root) as data_dir:
+            counts = generate(data_dir, size)
+            file_bytes = sum(os.path.getsize(os.path.join(data_dir, f)) for f in ("mtmc_gt.txt", "mtmc_pred.txt"))
+            print(f"── {n_frames} frames × {size.cameras} cameras: {counts['gt_rows']} GT / "
+                  f"{counts['pred_rows']} predicted rows, {file_bytes / MB:.1f} MB of text")
+            for mode in modes:
+                # a fresh interpreter per measurement, so peaks do not carry over
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                    m = pool.submit(_measure, data_dir, mode, workers).result()
+                peak = max(m["load"], m["eval"]) - m["baseline"]
+                record = {"mode": mode, "frames": n_frames, "file_bytes": file_bytes, **m,
+                          "peak_over_baseline": peak, "bytes_per_row": peak / m["rows"]}
+                print(f"  {mode:<6} load {(m['load'] - m['baseline']) / MB:8.1f} MB  eval {(m['eval'] - m['baseline']) / MB:8.1f} MB  "
+                      f"(traced {m['eval_traced'] / MB:.1f} MB, data {m['data'] / MB:.1f} MB, "
+                      f"workers {m['workers_rss'] / MB:.1f} MB)  {record['bytes_per_row']:.0f} B/row  "
+                      f"{m['seconds']:.2f} s")
+                records.append(record)
+    return records
+
+
+def extrapolate(records: List[Dict[str, object]], full_rows: int, budget_gb: float) -> Dict[str, float]:
+    """Estimate the peak for *full_rows* input rows from the largest measured size of each mode."""
+    estimates = {}
+    print(f"\nEstimate for {full_rows} input rows (budget {budget_gb:g} GB):")
+    for mode in sorted({r["mode"] for r in records}):
+        largest = max((r for r in records if r["mode"] == mode), key=lambda r: r["rows"])
+        est = largest["baseline"] + largest["bytes_per_row"] * full_rows + largest["workers_rss"]
+        estimates[mode] = est
+        mark = "✓" if est <= budget_gb * (1 << 30) else "✗"
+        print(f"  {mark} {mode:<6} ~{est / (1 << 30):6.2f} GB")
+    return estimates
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Measure the peak memory of eval_label on synthetic data.")
+    ap.add_argument("--frames", type=int, nargs="+", default=[1000, 4000], help="Frames per camera, one run per value.")
+    ap.add_argument("--cameras", type=int, default=4)
+    ap.add_argument("--objects", type=int, default=40, help="Concurrent objects per frame.")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--modes", nargs="+", choices=MODES, default=["ids"],
+                    help="ids: --id-only (ID measures only); clear: default summary (adds the motmetrics accumulator); "
+                         "stream: --window 1000 (streamIdMeasures).")
+    ap.add_argument("-w", "--workers", type=int, default=None, help="Passed to eval_label.")
+    ap.add_argument("--full-rows", type=int, default=None,
+                    help="Extrapolate the peak to this many input rows (GT + prediction).")
+    ap.add_argument("--budget-gb", type=float, default=16.0, help="Memory budget the estimate is checked against.")
+    ap.add_argument("--data-root", default=None, help="Where to generate the data sets (default: system temp).")
+    ap.add_argument("-o", "--output", default=None, help="Write the JSON report here.")
+    args = ap.parse_args()
+
+    cfg = SynthConfig(cameras=args.cameras, frames=args.frames[0], objects=args.objects, seed=args.seed)
+    records = run(cfg, args.frames, args.modes, args.workers, args.data_root)
+    report = {"config": {**asdict(cfg), "frames": args.frames, "workers": args.workers}, "results": records}
+    if args.full_rows:
+        report["estimates"] = extrapolate(records, args.full_rows, args.budget_gb)
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"✓ Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark the bulk MOT parser against the old per-line loader.
+
+Example
+-------
+```bash
+python -m benchmarks.bench_mot_parse --rows 3000000
+```
+Writes a synthetic ``frame track_id x1 y1 x2 y2 cls`` file and times
+
+* the legacy ``str.split`` loop that built ``(frame, [x1, y1, x2, y2], cls)``
+  tuples with ``dict.setdefault(...).append``,
+* ``mot_io.read_mot_columns`` (single C-engine ``read_csv`` call),
+* ``track_store.load_track_arrays`` with a cold and a warm ``.trk`` store,
+* ``TrackArrays.to_dict`` for callers that still want the legacy layout.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mot_io import read_mot_columns  # noqa: E402
+from track_store import load_track_arrays, store_path  # noqa: E402
+
+
+def legacy_load(txt_path):
+    tracks = {}
+    with open(txt_path, "r") as fh:
+        for ln in fh:
+            if ln.strip() == "":
+                continue
+            parts = ln.split()
+            if len(parts) < 7:
+                continue
+            f, tid = int(float(parts[0])), int(float(parts[1]))
+            bb = list(map(float, parts[2:6]))
+            cls = int(float(parts[6]))
+            tracks.setdefault(tid, []).append((f, bb, cls))
+    for tid in tracks:
+        tracks[tid] = sorted(tracks[tid], key=lambda x: x[0])
+    return tracks
+
+
+def write_synthetic(path, rows, objects_per_frame, seed=0):
+    rng = np.random.default_rng(seed)
+    n_frames = max(1, -(-rows // objects_per_frame))
+    frame = np.repeat(np.arange(1, n_frames + 1), objects_per_frame)[:rows]
+    track = (np.tile(np.arange(objects_per_frame), n_frames)[:rows] + (frame // 300) * objects_per_frame).astype(np.int64)
+    x1 = rng.uniform(0, 3700, rows)
+    y1 = rng.uniform(0, 2000, rows)
+    x2 = x1 + rng.uniform(20, 140, rows)
+    y2 = y1 + rng.uniform(20, 140, rows)
+    cls = rng.integers(0, 8, rows)
+    np.savetxt(path, np.column_stack((frame, track, x1, y1, x2, y2, cls)),
+               fmt=["%d", "%d", "%.2f", "%.2f", "%.2f", "%.2f", "%d"])
+
+
+def timed(label, fn, results):
+    t0 = time.perf_counter()
+    out = fn()
+    results[label] = time.perf_counter() - t0
+    print(f"{label:<28s} {results[label]:8.3f} s")
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark MOT text parsing.")
+    ap.add_argument("--rows", type=int, default=2_000_000, help="Number of detections in the synthetic file.")
+    ap.add_argument("--objects_per_frame", type=int, default=60, help="Concurrent objects per frame.")
+    ap.add_argument("--file", default=None, help="Benchmark an existing file instead of a synthetic one.")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file
+        if path is None:
+            path = os.path.join(tmp, "synthetic_mot.txt")
+            print(f"Writing {args.rows} rows to {path} …")
+            write_synthetic(path, args.rows, args.objects_per_frame)
+        if os.path.exists(store_path(path)):
+            os.unlink(store_path(path))
+
+        res = {}
+        legacy = timed("legacy per-line loop", lambda: legacy_load(path), res)
+        timed("read_mot_columns", lambda: read_mot_columns(path), res)
+        timed("store (cold, builds .trk)", lambda: load_track_arrays(path), res)
+        arrs = timed("store (warm, mmap)", lambda: load_track_arrays(path), res)
+        fast = timed("store + to_dict", lambda: load_track_arrays(path, require_cls=True).to_dict(), res)
+
+        assert fast == legacy, "bulk loader disagrees with the legacy loader"
+        print(f"\n{len(arrs)} rows, {arrs.n_tracks} tracks")
+        for label in ("read_mot_columns", "store (cold, builds .trk)", "store (warm, mmap)", "store + to_dict"):
+            print(f"speedup {label:<28s} x{res['legacy per-line loop'] / res[label]:7.1f}")
+        if args.file is not None:
+            os.unlink(store_path(path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Synthetic RoundaboutHD-like data for the evaluator benchmarks.
+
+Every camera sees 4K (3840×2160) frames with a fixed number of concurrent
+vehicles. Each vehicle drives in a straight line for 60–300 frames and is
+then replaced by a new one; a share of the vehicles re-appears in the next
+camera under the same global id, as in the multi-camera ground truth.
+Predictions are the ground truth with
+
+* box jitter (σ = 2 px),
+* missed detections (``miss_rate`` of the rows dropped),
+* ID switches (a track gets a new id at a row with probability ``id_switch_rate``),
+* false positives (``fp_rate`` × rows, random boxes with fresh ids).
+
+Example
+-------
+```bash
+python -m benchmarks.synthetic out_dir/ --cameras 4 --frames 1000 --objects 40
+```
+writes the inputs of all three evaluators:
+
+* ``sct/gt_c{cam}.txt``, ``sct/pred_c{cam}.txt`` – ``frame id x1 y1 x2 y2 cls`` (eval_sct),
+* ``mtmc_gt.txt``, ``mtmc_pred.txt`` – ``cam id frame x y w h xworld yworld`` (eval_label),
+* ``det_gt/``, ``det_pred/`` – per-frame ``cls x1 y1 x2 y2 [score]`` labels (eval_det).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mot_io import MTMC_FORMATS, mtmc_gt_columns, write_rows  # noqa: E402
+
+WIDTH, HEIGHT = 3840, 2160
+N_CLASSES = 4
+
+
+@dataclass
+class SynthConfig:
+    cameras: int = 4
+    frames: int = 1000
+    objects: int = 40
+    id_switch_rate: float = 0.002
+    miss_rate: float = 0.05
+    fp_rate: float = 0.02
+    seed: int = 0
+
+
+def _tracks(rng: np.random.Generator, cfg: SynthConfig, first_id: int) -> Dict[str, np.ndarray]:
+    """Ground-truth rows of one camera, sorted by (frame, id)."""
+    cols = {k: [] for k in ("frame", "id", "x1", "y1", "x2", "y2", "cls")}
+    tid = first_id
+    for _ in range(cfg.objects):
+        start = 1 - int(rng.integers(0, 300))          # slots are already busy at frame 1
+        while start <= cfg.frames:
+            life = int(rng.integers(60, 301))
+            f = np.arange(max(start, 1), min(start + life, cfg.frames + 1))
+            if f.size:
+                w, h = rng.uniform(40, 220), rng.uniform(30, 160)
+                x0, y0 = rng.uniform(0, WIDTH - w), rng.uniform(0, HEIGHT - h)
+                vx, vy = rng.uniform(-8, 8, 2)
+                x1 = np.clip(x0 + vx * (f - start), 0, WIDTH - w)
+                y1 = np.clip(y0 + vy * (f - start), 0, HEIGHT - h)
+                cols["frame"].append(f)
+                cols["id"].append(np.full(f.size, tid))
+                cols["x1"].append(x1)
+                cols["y1"].append(y1)
+                cols["x2"].append(x1 + w)
+                cols["y2"].append(y1 + h)
+                cols["cls"].append(np.full(f.size, rng.integers(0, N_CLASSES)))
+            tid += 1
+            start += life
+    out = {k: np.concatenate(v) for k, v in cols.items()}
+    order = np.lexsort((out["id"], out["frame"]))
+    return {k: v[order] for k, v in out.items()}
+
+
+def _predict(rng: np.random.Generator, gt: Dict[str, np.ndarray], cfg: SynthConfig, first_id: int) -> Dict[str, np.ndarray]:
+    """Noisy predictions for one camera's ground truth."""
+    n = len(gt["frame"])
+    keep = rng.random(n) >= cfg.miss_rate
+    p = {k: v[keep].copy() for k, v in gt.items()}
+    m = len(p["frame"])
+    for k in ("x1", "y1", "x2", "y2"):
+        p[k] += rng.normal(0, 2, m)
+
+    # ID switches: from a switch row on, the rest of the track carries a new id
+    by_track = np.lexsort((p["frame"], p["id"]))
+    switch = rng.random(m) < cfg.id_switch_rate
+    tid = p["id"][by_track]
+    seg = np.cumsum(switch[by_track] | np.r_[True, tid[1:] != tid[:-1]])
+    new_id = np.empty(m, dtype=np.int64)
+    new_id[by_track] = first_id + seg
+    p["id"] = new_id
+    p["score"] = rng.uniform(0.4, 1.0, m)
+
+    n_fp = int(cfg.fp_rate * n)
+    if n_fp:
+        w, h = rng.uniform(30, 200, n_fp), rng.uniform(30, 150, n_fp)
+        x1, y1 = rng.uniform(0, WIDTH - w), rng.uniform(0, HEIGHT - h)
+        fp = {
+            "frame": rng.integers(1, cfg.frames + 1, n_fp), "id": first_id + seg[-1] + 1 + np.arange(n_fp),
+            "x1": x1, "y1": y1, "x2": x1 + w, "y2": y1 + h,
+            "cls": rng.integers(0, N_CLASSES, n_fp), "score": rng.uniform(0.0, 0.6, n_fp),
+        }
+        p = {k: np.concatenate((p[k], fp[k])) for k in p}
+    order = np.lexsort((p["id"], p["frame"]))
+    return {k: v[order] for k, v in p.items()}
+
+
+def _share_ids(rng: np.random.Generator, prev: Dict[str, np.ndarray], cur: Dict[str, np.ndarray], share: float = 0.5) -> None:
+    """Give a share of *cur*'s tracks the id of a track of the previous camera (in place)."""
+    prev_ids, cur_ids = np.unique(prev["id"]), np.unique(cur["id"])
+    n = min(int(share * len(cur_ids)), len(prev_ids))
+    mapping = dict(zip(rng.choice(cur_ids, n, replace=False).tolist(), rng.choice(prev_ids, n, replace=False).tolist()))
+    cur["id"] = np.array([mapping.get(i, i) for i in cur["id"].tolist()], dtype=np.int64)
+
+
+def _write_det(dirpath: str, cam: int, rows: Dict[str, np.ndarray], frames: int, with_score: bool) -> None:
+    os.makedirs(dirpath, exist_ok=True)
+    bounds = np.searchsorted(rows["frame"], np.arange(1, frames + 2))
+    fmt = "%d %.2f %.2f %.2f %.2f" + (" %.4f" if with_score else "") + "\n"
+    keys = ("cls", "x1", "y1", "x2", "y2") + (("score",) if with_score else ())
+    table = list(zip(*(rows[k].tolist() for k in keys)))
+    for f in range(frames):
+        lo, hi = bounds[f], bounds[f + 1]
+        with open(os.path.join(dirpath, f"c{cam:03d}_img{f + 1:06d}.txt"), "w") as fh:
+            fh.write((fmt * (hi - lo)) % tuple(v for row in table[lo:hi] for v in row))
+
+
+def generate(out_dir: str, cfg: SynthConfig) -> Dict[str, int]:
+    """Write a synthetic data set to *out_dir*; returns row counts."""
+    rng = np.random.default_rng(cfg.seed)
+    os.makedirs(os.path.join(out_dir, "sct"), exist_ok=True)
+    mtmc_gt, mtmc_pred = [], []
+    counts = {"gt_rows": 0, "pred_rows": 0}
+    prev = None
+    for cam in range(1, cfg.cameras + 1):
+        gt = _tracks(rng, cfg, first_id=cam * 1_000_000)
+        if prev is not None:
+            _share_ids(rng, prev, gt)
+        pred = _predict(rng, gt, cfg, first_id=cam * 1_000_000 + 500_000)
+        prev = gt
+        counts["gt_rows"] += len(gt["frame"])
+        counts["pred_rows"] += len(pred["frame"])
+
+        for name, rows in (("gt", gt), ("pred", pred)):
+            write_rows(os.path.join(out_dir, "sct", f"{name}_c{cam}.txt"),
+                       [rows[k] for k in ("frame", "id", "x1", "y1", "x2", "y2", "cls")])
+        mtmc_gt.append(mtmc_gt_columns(cam, gt["id"], gt["frame"], gt["x1"], gt["y1"], gt["x2"], gt["y2"]))
+        mtmc_pred.append(mtmc_gt_columns(cam, pred["id"], pred["frame"], pred["x1"], pred["y1"], pred["x2"], pred["y2"]))
+        _write_det(os.path.join(out_dir, "det_gt"), cam, gt, cfg.frames, with_score=False)
+        _write_det(os.path.join(out_dir, "det_pred"), cam, pred, cfg.frames, with_score=True)
+
+    for name, parts in (("mtmc_gt.txt", mtmc_gt), ("mtmc_pred.txt", mtmc_pred)):
+        columns = [np.concatenate([np.asarray(p[i]) for p in parts]) for i in range(len(MTMC_FORMATS))]
+        write_rows(os.path.join(out_dir, name), columns, MTMC_FORMATS)
+    return counts
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Write a synthetic RoundaboutHD-like data set.")
+    ap.add_argument("out_dir")
+    ap.add_argument("--cameras", type=int, default=4)
+    ap.add_argument("--frames", type=int, default=1000, help="Frames per camera.")
+    ap.add_argument("--objects", type=int, default=40, help="Concurrent objects per frame.")
+    ap.add_argument("--id-switch-rate", type=float, default=0.002)
+    ap.add_argument("--miss-rate", type=float, default=0.05)
+    ap.add_argument("--fp-rate", type=float, default=0.02)
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    cfg = SynthConfig(args.cameras, args.frames, args.objects, args.id_switch_rate, args.miss_rate, args.fp_rate, args.seed)
+    counts = generate(args.out_dir, cfg)
+    print(f"✓ Wrote {counts['gt_rows']} GT / {counts['pred_rows']} predicted rows to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+box_ops.py
+──────────
+
+Vectorized bounding-box helpers shared by the evaluators and labelling tools.
+
+Boxes are ``(N, 4)`` float64 arrays of ``x1 y1 x2 y2`` corners. The IoU is
+computed with exactly the same floating-point operations, in the same order,
+as the scalar ``compute_iou`` it replaces (intersection → both areas → union
+→ ratio, and 0 when the boxes do not overlap), so results are bit-identical.
+
+* `iou_matrix(a, b)`      – full ``len(a) × len(b)`` IoU matrix,
+* `iou_pairs(a, b)`       – element-wise IoU of two aligned box arrays,
+* `best_matches(...)`     – best GT box for every prediction, frame by frame,
+* `box_areas(boxes)`      – box areas,
+* `boxes_containing(...)` – which boxes contain a point (inclusive edges).
+"""
+
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+
+def as_boxes(boxes) -> np.ndarray:
+    """Return *boxes* as a contiguous ``(N, 4)`` float64 array."""
+    arr = np.ascontiguousarray(boxes, dtype=np.float64)
+    return arr.reshape(-1, 4)
+
+
+def _iou(ax1, ay1, ax2, ay2, bx1, by1, bx2, by2) -> np.ndarray:
+    xa = np.maximum(ax1, bx1)
+    ya = np.maximum(ay1, by1)
+    xb = np.minimum(ax2, bx2)
+    yb = np.minimum(ay2, by2)
+    overlap = (xb > xa) & (yb > ya)
+    inter = (xb - xa) * (yb - ya)
+    union = (ax2 - ax1) * (ay2 - ay1) + (bx2 - bx1) * (by2 - by1) - inter
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(overlap, inter / union, 0.0)
+
+
+def iou_matrix(a, b) -> np.ndarray:
+    """IoU of every box in *a* against every box in *b*; shape ``(len(a), len(b))``."""
+    a, b = as_boxes(a), as_boxes(b)
+    return _iou(a[:, 0:1], a[:, 1:2], a[:, 2:3], a[:, 3:4], b[:, 0], b[:, 1], b[:, 2], b[:, 3])
+
+
+def iou_pairs(a, b) -> np.ndarray:
+    """IoU of ``a[i]`` with ``b[i]`` for every *i*."""
+    a, b = as_boxes(a), as_boxes(b)
+    return _iou(a[:, 0], a[:, 1], a[:, 2], a[:, 3], b[:, 0], b[:, 1], b[:, 2], b[:, 3])
+
+
+def best_matches(
+    pred_boxes,
+    pred_group: np.ndarray,
+    gt_boxes,
+    gt_group: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Best-overlapping GT box of every prediction within the same group (frame).
+
+    Params
+    ------
+    pred_boxes, gt_boxes : (N, 4) / (M, 4) array-like
+        Corner boxes.
+    pred_group, gt_group : (N,) / (M,) int arrays
+        Group (e.g. frame index, or frame and class) of each box; only boxes
+        of the same group are compared.
+    Returns
+    -------
+    best_iou : (N,) float64
+        Highest IoU of each prediction (0 if it overlaps nothing).
+    best_gt : (N,) int64
+        Index into *gt_boxes* of the first GT box (in input order) reaching
+        ``best_iou``, or -1 when the prediction overlaps no GT box.
+    """
+    pred_boxes, gt_boxes = as_boxes(pred_boxes), as_boxes(gt_boxes)
+    pred_group = np.asarray(pred_group)
+    gt_group = np.asarray(gt_group)
+    best_iou = np.zeros(len(pred_boxes), dtype=np.float64)
+    best_gt = np.full(len(pred_boxes), -1, dtype=np.int64)
+    if len(pred_boxes) == 0 or len(gt_boxes) == 0:
+        return best_iou, best_gt
+
+    order = np.argsort(pred_group, kind="stable")
+    groups, starts = np.unique(pred_group[order], return_index=True)
+    ends = np.append(starts[1:], len(order))
+    g_order = np.argsort(gt_group, kind="stable")             # keeps input order inside a group
+    gt_sorted = gt_group[g_order]
+    g_lo = np.searchsorted(gt_sorted, groups, side="left")
+    g_hi = np.searchsorted(gt_sorted, groups, side="right")
+    for s, e, lo, hi in zip(starts.tolist(), ends.tolist(), g_lo.tolist(), g_hi.tolist()):
+        if lo == hi:
+            continue
+        rows = order[s:e]
+        cols = g_order[lo:hi]
+        iou = iou_matrix(pred_boxes[rows], gt_boxes[cols])
+        j = iou.argmax(axis=1)
+        m = iou[np.arange(len(rows)), j]
+        hit = m > 0.0
+        best_iou[rows[hit]] = m[hit]
+        best_gt[rows[hit]] = cols[j[hit]]
+    return best_iou, best_gt
+
+
+def box_areas(boxes) -> np.ndarray:
+    """``(x2 - x1) * (y2 - y1)`` of every box."""
+    boxes = as_boxes(boxes)
+    return (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+
+
+def boxes_containing(point, boxes) -> np.ndarray:
+    """Boolean mask of the boxes that contain *point* ``(x, y)``, edges included."""
+    boxes = as_boxes(boxes)
+    x, y = point
+    return (boxes[:, 0] <= x) & (x <= boxes[:, 2]) & (boxes[:, 1] <= y) & (y <= boxes[:, 3])
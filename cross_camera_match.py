@@ -1,6 +1,9 @@
 import os
 import sys
 
+from mot_io import MTMC_FORMATS, atomic_open, iter_formatted_records
+from track_store import load_track_dict
+
 
 def load_data(cam):
     """
@@ -10,46 +13,47 @@ def load_data(cam):
     Returns a dictionary mapping each track_id (int) to a list of detections.
     Each detection is a tuple: (frame, [x1, y1, x2, y2], cls)
     """
-    data = {}
     filepath = f'/home/yuqiang/yl4300/project/MCVT_YQ/datasets/algorithm_results/detect_merge/{cam}/{cam}_mot_interpolated_final.txt'
     if not os.path.exists(filepath):
         print(f"File {filepath} does not exist.")
-        data = {}
-    else:
-        with open(filepath, 'r') as f:
-            for line in f:
-                parts = line.strip().split()
-                if len(parts) < 7:
-                    continue
-                frame = int(float(parts[0]))
-                track_id = int(float(parts[1]))
-                x1 = float(parts[2])
-                y1 = float(parts[3])
-                x2 = float(parts[4])
-                y2 = float(parts[5])
-                cls = int(float(parts[6]))
-                if track_id not in data:
-                    data[track_id] = []
-                data[track_id].append((frame, [x1, y1, x2, y2], cls))
-    return data
-
-
-def format_detection_line(cam_num, info, id_index):
+        return {}
+    return load_track_dict(filepath, require_cls=True)
+
+
+def detection_record(cam_num, info, id_index):
     """
-    Formats a detection into a line with the following fields:
+    Returns a detection as a row with the following fields:
       camera_id, obj_id, frame_id, xmin, ymin, width, height, xworld, yworld
     Expects 'info' to be a tuple: (frame, [x1, y1, x2, y2], cls).
     Here, xworld and yworld are fixed to -1.
     """
     frame_num = int(info[0])
-    bbox = info[1]
-    x1, y1, x2, y2 = bbox
-    width = x2 - x1
-    height = y2 - y1
-    xworld = -1
-    yworld = -1
-    line = f"{cam_num} {id_index} {frame_num} {x1:.2f} {y1:.2f} {width:.2f} {height:.2f} {xworld} {yworld}"
-    return line
+    x1, y1, x2, y2 = info[1]
+    return (cam_num, id_index, frame_num, x1, y1, x2 - x1, y2 - y1, -1, -1)
+
+
+def append_records(filename, records):
+    """
+    Appends rows to the ground truth file as one formatted block that is synced to
+    disk, so a save costs O(rows) whatever the file size. If the write fails the
+    file is truncated back to its old size, so no half-written pair is left behind.
+    """
+    block = "".join(iter_formatted_records(records, MTMC_FORMATS)).encode()
+    with open(filename, 'ab', buffering=0) as f:     # unbuffered: nothing is left to flush after a truncate
+        size = f.seek(0, os.SEEK_END)
+        if size:
+            with open(filename, 'rb') as r:
+                r.seek(size - 1)
+                if r.read(1) != b"\n":
+                    block = b"\n" + block
+        try:
+            view = memoryview(block)
+            while view:
+                view = view[f.write(view):]
+            os.fsync(f.fileno())
+        except BaseException:
+            f.truncate(size)
+            raise
 
 def get_current_id_index(filename):
     """
@@ -109,7 +113,7 @@ def delete_pair(ground_truth_file):
         print("Invalid input.")
         return
     pairs.pop(del_idx)
-    with open(ground_truth_file, 'w') as f:
+    with atomic_open(ground_truth_file) as f:
         for pair in pairs:
             f.write(pair[0] + "\n")
             if pair[1]:
@@ -175,23 +179,18 @@ def main(tracklet_dict,cam_list):
             cam1_num = numeric_id_0 if cam1 == f'{cam_list[0]}'else numeric_id_1
             cam2_num = numeric_id_1 if cam1 == f'{cam_list[0]}'else numeric_id_0
 
-            with open(ground_truth_file, 'a') as f:
-                min_length = min(len(info_cam1), len(info_cam2))
-                for info1, info2 in zip(info_cam1[:min_length], info_cam2[:min_length]):
-                    line1 = format_detection_line(cam1_num, info1, id_index)
-                    line2 = format_detection_line(cam2_num, info2, id_index)
-                    f.write(f"{line1}\n")
-                    f.write(f"{line2}\n")
-
-                # Handle overflow if one tracklet is longer than the other
-                if len(info_cam1) > min_length:
-                    for info1 in info_cam1[min_length:]:
-                        line1 = format_detection_line(cam1_num, info1, id_index)
-                        f.write(f"{line1}\n")
-                elif len(info_cam2) > min_length:
-                    for info2 in info_cam2[min_length:]:
-                        line2 = format_detection_line(cam2_num, info2, id_index)
-                        f.write(f"{line2}\n")
+            records = []
+            min_length = min(len(info_cam1), len(info_cam2))
+            for info1, info2 in zip(info_cam1[:min_length], info_cam2[:min_length]):
+                records.append(detection_record(cam1_num, info1, id_index))
+                records.append(detection_record(cam2_num, info2, id_index))
+
+            # Handle overflow if one tracklet is longer than the other
+            if len(info_cam1) > min_length:
+                records.extend(detection_record(cam1_num, info1, id_index) for info1 in info_cam1[min_length:])
+            elif len(info_cam2) > min_length:
+                records.extend(detection_record(cam2_num, info2, id_index) for info2 in info_cam2[min_length:])
+            append_records(ground_truth_file, records)
             print(f"Pair with id {id_index} saved.")
             id_index += 1
 
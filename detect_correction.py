@@ -2,20 +2,20 @@ import cv2
 import os
 import argparse
 
-def is_point_in_bbox(point, bbox):
-    """
-    Check if a point is inside a bounding box.
+import numpy as np
 
-    Args:
-        point (tuple): A tuple (x, y) representing the point.
-        bbox (list): A list [cls_id, x1, y1, x2, y2, conf] representing the bounding box.
+from box_ops import boxes_containing
+from label_pack import open_labels
 
-    Returns:
-        bool: True if the point is inside the bounding box, False otherwise.
+def first_bbox_at(point, bboxes):
+    """
+    Index of the first bounding box (rows [cls_id, x1, y1, x2, y2, conf]) that
+    contains the point, tested for all boxes at once; -1 if there is none.
     """
-    _, x1, y1, x2, y2, _ = bbox
-    x, y = point
-    return x1 <= x <= x2 and y1 <= y <= y2
+    if not bboxes:
+        return -1
+    hits = np.flatnonzero(boxes_containing(point, [bbox[1:5] for bbox in bboxes]))
+    return int(hits[0]) if hits.size else -1
 
 def check_class_id(point,img_file):
     txt_path = os.path.join(label_dir_corrected, img_file[:-4]  + '.txt')
@@ -25,10 +25,10 @@ def check_class_id(point,img_file):
             bboxes = [list(map(float, line.strip().split())) for line in f.readlines()]
     else:
         bboxes = []
-    for idx, bbox in enumerate(bboxes):
-        if is_point_in_bbox(point,bbox):
-            print(f'Class id: {int(bbox[0])}')
-            return int(bbox[0])
+    idx = first_bbox_at(point, bboxes)
+    if idx != -1:
+        print(f'Class id: {int(bboxes[idx][0])}')
+        return int(bboxes[idx][0])
     return int(input('Enter class id: '))
 
 # Paths setup
@@ -48,6 +48,7 @@ for seq in seqs:
     label_dir = f'/home/yuqiang/yl4300/project/MCVT_YQ/datasets/algorithm_results/detect_merge/{seq}/labels_xy_v11/'
     label_dir_corrected = f'/home/yuqiang/yl4300/project/MCVT_YQ/datasets/algorithm_results/detect_merge/{seq}/labels_corrected_final/'
     img_dir_corrected = f'/home/yuqiang/yl4300/project/MCVT_YQ/datasets/algorithm_results/detect_merge/{seq}/images_corrected_final/'
+    labels = open_labels(label_dir)  # label directory or packed archive (label_pack.py)
     img_files = sorted(os.listdir(img_dir))
     os.makedirs(label_dir_corrected, exist_ok=True)
     os.makedirs(img_dir_corrected, exist_ok=True)
@@ -73,9 +74,8 @@ for seq in seqs:
         if img is None:
             print(f"Failed to read image {img_path}")
             continue
-        if os.path.exists(txt_path):
-            with open(txt_path, 'r') as f:
-                bboxes = [list(map(float, line.strip().split())) for line in f.readlines()]
+        if img_file[:-4] in labels:
+            bboxes = [list(map(float, line.strip().split())) for line in labels.read_text(img_file[:-4]).splitlines()]
             if len(bboxes) == 0:
                 print(f"No bounding boxes found in {txt_path}")
                 continue
@@ -153,12 +153,10 @@ for seq in seqs:
                         # Convert click position back to original scale
                         x_full = int(x / delete_display_scale)
                         y_full = int(y / delete_display_scale)
-                        for idx, bbox in enumerate(bboxes):
-                            if is_point_in_bbox((x_full, y_full), bbox):
-                                selected_idx[0] = idx
-                                print(f"Clicked on bbox index: {idx}")
-
-                                break
+                        idx = first_bbox_at((x_full, y_full), bboxes)
+                        if idx != -1:
+                            selected_idx[0] = idx
+                            print(f"Clicked on bbox index: {idx}")
 
                 # Resize image and draw boxes for deletion window
                 temp_display = cv2.resize(img_display.copy(), (0, 0), fx=delete_display_scale, fy=delete_display_scale)
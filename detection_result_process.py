@@ -3,6 +3,8 @@ import os
 import sys
 import argparse
 
+from label_pack import open_labels
+
 # Base directory for detection results
 base_dir = '/home/yuqiang/yl4300/project/MCVT_YQ/datasets/algorithm_results/detect_merge'
 # Parse command-line arguments
@@ -26,6 +28,7 @@ for seq in seqs:
     
     os.makedirs(output_label_dir, exist_ok=True)
     os.makedirs(video_output_dir, exist_ok=True)
+    labels = open_labels(label_dir)  # label directory or packed archive (label_pack.py)
     
     # Get list of image files (assuming .jpg or .png, adjust as needed)
     img_files = sorted(os.listdir(img_dir))
@@ -51,7 +54,8 @@ for seq in seqs:
         img_path = os.path.join(img_dir, img_file)
         det_name = img_file[:-4]
 
-        label_file = os.path.join(label_dir, img_file.rsplit('.', 1)[0] + '.txt')
+        label_name = img_file.rsplit('.', 1)[0]
+        label_file = os.path.join(label_dir, label_name + '.txt')
         output_label_file = os.path.join(output_label_dir, img_file.rsplit('.', 1)[0] + '.txt')
         
         # Read the image
@@ -61,9 +65,8 @@ for seq in seqs:
             continue
         
         filtered_bboxes = []
-        if os.path.exists(label_file):
-            with open(label_file, 'r') as f:
-                lines = f.readlines()
+        if label_name in labels:
+            lines = labels.read_text(label_name).splitlines()
             for line in lines:
                 parts = line.strip().split()
                 if len(parts) < 6:
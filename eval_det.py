@@ -1,30 +1,265 @@
 import os
 import argparse
+import hashlib
+import tempfile
 from collections import defaultdict
-from typing import List, Tuple, Dict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Tuple, Dict, Optional, Sequence
 
 import numpy as np
 
+from box_ops import best_matches, box_areas
+from label_pack import open_labels
+from result_cache import open_cache
+
+# COCO area ranges in pixels², half-open [lo, hi)
+COCO_AREA_RANGES: Dict[str, Tuple[float, float]] = {
+    "small": (0.0, 32.0 ** 2),
+    "medium": (32.0 ** 2, 96.0 ** 2),
+    "large": (96.0 ** 2, float("inf")),
+}
+
+EVAL_VERSION = 1
 
-def parse_label_file(path: str, with_score: bool = False) -> List[Tuple[int, float, float, float, float, float]]:
-    """Read a detection or ground truth label file.
+
+def parse_label_text(text: str, with_score: bool = False) -> List[Tuple[int, float, float, float, float, float]]:
+    """Parse the content of a detection or ground truth label file.
 
     Returns a list of tuples (cls, x1, y1, x2, y2, score).
     For ground truth, score will be 1.0.
     """
     boxes = []
+    for line in text.splitlines():
+        parts = line.strip().split()
+        if len(parts) < 5:
+            continue
+        cls = int(float(parts[0]))
+        x1, y1, x2, y2 = map(float, parts[1:5])
+        score = float(parts[5]) if with_score and len(parts) > 5 else 1.0
+        boxes.append((cls, x1, y1, x2, y2, score))
+    return boxes
+
+
+def parse_label_file(path: str, with_score: bool = False) -> List[Tuple[int, float, float, float, float, float]]:
+    """Read a detection or ground truth label file (see `parse_label_text`)."""
     if not os.path.exists(path):
-        return boxes
+        return []
     with open(path, "r") as f:
-        for line in f:
-            parts = line.strip().split()
-            if len(parts) < 5:
-                continue
-            cls = int(float(parts[0]))
-            x1, y1, x2, y2 = map(float, parts[1:5])
-            score = float(parts[5]) if with_score and len(parts) > 5 else 1.0
-            boxes.append((cls, x1, y1, x2, y2, score))
-    return boxes
+        return parse_label_text(f.read(), with_score)
+
+
+@dataclass
+class FrameLabels:
+    """Label rows of many frames in one contiguous array.
+
+    ``rows`` holds ``cls x1 y1 x2 y2 score`` per box; the boxes of frame
+    ``names[k]`` are ``rows[offsets[k]:offsets[k + 1]]``.
+    """
+    names: List[str]
+    rows: np.ndarray
+    offsets: np.ndarray
+
+    @property
+    def boxes(self) -> np.ndarray:
+        return self.rows[:, 1:5]
+
+    @property
+    def cls(self) -> np.ndarray:
+        return self.rows[:, 0].astype(np.int64)
+
+    @property
+    def score(self) -> np.ndarray:
+        return self.rows[:, 5]
+
+    @property
+    def frame(self) -> np.ndarray:
+        """Frame index (into ``names``) of every row."""
+        return np.repeat(np.arange(len(self.names)), np.diff(self.offsets))
+
+
+def _parse_frames(gt_path: str, pred_path: str, names: Sequence[str]):
+    """Parse the GT and prediction labels of *names*; runs in a worker process."""
+    gt_src, pred_src = open_labels(gt_path), open_labels(pred_path)
+    gt_rows, gt_counts, pred_rows, pred_counts = [], [], [], []
+    try:
+        for name in names:
+            gt = parse_label_text(gt_src.read_text(name))
+            pred = parse_label_text(pred_src.read_text(name), with_score=True)
+            gt_rows += gt
+            pred_rows += pred
+            gt_counts.append(len(gt))
+            pred_counts.append(len(pred))
+    finally:
+        gt_src.close()
+        pred_src.close()
+    return (np.array(gt_rows, dtype=np.float64).reshape(-1, 6), np.array(gt_counts, dtype=np.int64),
+            np.array(pred_rows, dtype=np.float64).reshape(-1, 6), np.array(pred_counts, dtype=np.int64))
+
+
+def load_labels(gt_dir: str, pred_dir: str, names: Sequence[str],
+                workers: Optional[int] = None) -> Tuple[FrameLabels, FrameLabels]:
+    """Load the GT and prediction labels of frames *names* into `FrameLabels`.
+
+    Frames are split into chunks parsed in a process pool (*workers* processes,
+    default one per CPU; ``1`` parses in this process). Chunks are gathered in
+    frame order, so the result does not depend on the number of workers.
+    """
+    names = list(names)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(names) < 2:
+        parts = [_parse_frames(gt_dir, pred_dir, names)]
+    else:
+        size = -(-len(names) // (workers * 4))
+        chunks = [names[i:i + size] for i in range(0, len(names), size)]
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            parts = list(pool.map(_parse_frames, [gt_dir] * len(chunks), [pred_dir] * len(chunks), chunks))
+
+    def gather(rows_at: int) -> FrameLabels:
+        rows = np.concatenate([p[rows_at] for p in parts])
+        counts = np.concatenate([p[rows_at + 1] for p in parts])
+        return FrameLabels(names, rows, np.concatenate(([0], np.cumsum(counts))))
+
+    return gather(0), gather(2)
+
+
+@dataclass
+class FrameMatches:
+    """Best GT match of every prediction row: IoU and GT row index (-1 if none).
+
+    ``c_iou``/``c_gt`` hold the class-aware matches (only GT boxes of the
+    prediction's class are considered) when they were computed.
+    """
+    best_iou: np.ndarray
+    best_gt: np.ndarray
+    c_iou: Optional[np.ndarray] = None
+    c_gt: Optional[np.ndarray] = None
+
+
+def match_labels(gts: FrameLabels, preds: FrameLabels, class_aware: bool = False) -> FrameMatches:
+    """Match every prediction to its best-overlapping GT box of the same frame (see `box_ops.best_matches`)."""
+    best_iou, best_gt = best_matches(preds.boxes, preds.frame, gts.boxes, gts.frame)
+    matches = FrameMatches(best_iou, best_gt)
+    if class_aware:
+        # group boxes by (frame, class) so the IoU argmax only sees GT boxes of the same class
+        classes = np.unique(np.concatenate((gts.cls, preds.cls)))
+        n_cls = max(len(classes), 1)
+        gt_key = gts.frame * n_cls + np.searchsorted(classes, gts.cls)
+        pred_key = preds.frame * n_cls + np.searchsorted(classes, preds.cls)
+        matches.c_iou, matches.c_gt = best_matches(preds.boxes, pred_key, gts.boxes, gt_key)
+    return matches
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Per-frame match cache
+# ────────────────────────────────────────────────────────────────────────────────
+
+CACHE_VERSION = 1
+
+
+def frame_keys(gt_dir: str, pred_dir: str, names: Sequence[str]) -> List[str]:
+    """SHA-1 of the GT and prediction label content of every frame."""
+    gt_src, pred_src = open_labels(gt_dir), open_labels(pred_dir)
+    keys = []
+    for name in names:
+        h = hashlib.sha1(gt_src.read_text(name).encode())
+        h.update(b"\0")
+        h.update(pred_src.read_text(name).encode())
+        keys.append(h.hexdigest())
+    gt_src.close()
+    pred_src.close()
+    return keys
+
+
+def _local_gt(best_gt: np.ndarray, preds: FrameLabels, gts: FrameLabels) -> np.ndarray:
+    """Global GT row indices → indices inside each prediction's frame (-1 kept)."""
+    return np.where(best_gt == -1, -1, best_gt - gts.offsets[:-1][preds.frame])
+
+
+def _save_cache(path: str, keys: List[str], gts: FrameLabels, preds: FrameLabels, m: FrameMatches) -> None:
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            np.savez(fh, version=CACHE_VERSION, names=np.array(gts.names, dtype=str), keys=np.array(keys, dtype=str),
+                     gt_rows=gts.rows, gt_offsets=gts.offsets, pred_rows=preds.rows, pred_offsets=preds.offsets,
+                     best_iou=m.best_iou, best_gt=_local_gt(m.best_gt, preds, gts),
+                     c_iou=m.c_iou, c_gt=_local_gt(m.c_gt, preds, gts))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _load_cache(path: str) -> Optional[Dict[str, np.ndarray]]:
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            cache = {k: z[k] for k in z.files}
+    except (OSError, ValueError):
+        return None
+    return cache if int(cache.get("version", -1)) == CACHE_VERSION else None
+
+
+def cached_matches(gt_dir: str, pred_dir: str, names: Sequence[str], workers: Optional[int],
+                   cache_path: str) -> Tuple[FrameLabels, FrameLabels, FrameMatches]:
+    """Labels and matches of *names*, re-using every frame whose GT/prediction content is unchanged.
+
+    The cache at *cache_path* (an ``.npz``) stores the parsed rows and the
+    class-agnostic and class-aware matches of each frame, keyed by the SHA-1 of
+    the frame's GT and prediction files. Only changed or new frames are parsed
+    and matched again; the cache is then rewritten for the current frames
+    (it is left untouched when nothing changed).
+    """
+    names = list(names)
+    keys = frame_keys(gt_dir, pred_dir, names)
+    cache = _load_cache(cache_path)
+    cached = {}
+    if cache is not None:
+        cached = {(n, k): i for i, (n, k) in enumerate(zip(cache["names"].tolist(), cache["keys"].tolist()))}
+    stale = [n for n, k in zip(names, keys) if (n, k) not in cached]
+
+    fresh_g, fresh_p = load_labels(gt_dir, pred_dir, stale, workers)
+    fresh_m = match_labels(fresh_g, fresh_p, class_aware=True)
+    fresh = {
+        "gt_rows": fresh_g.rows, "gt_offsets": fresh_g.offsets,
+        "pred_rows": fresh_p.rows, "pred_offsets": fresh_p.offsets,
+        "best_iou": fresh_m.best_iou, "best_gt": _local_gt(fresh_m.best_gt, fresh_p, fresh_g),
+        "c_iou": fresh_m.c_iou, "c_gt": _local_gt(fresh_m.c_gt, fresh_p, fresh_g),
+    }
+    fresh_pos = {n: i for i, n in enumerate(stale)}
+
+    gt_parts, pred_parts, per_pred = [], [], {"best_iou": [], "best_gt": [], "c_iou": [], "c_gt": []}
+    for name, key in zip(names, keys):
+        if name in fresh_pos:
+            src, i = fresh, fresh_pos[name]
+        else:
+            src, i = cache, cached[(name, key)]
+        gt_parts.append(src["gt_rows"][src["gt_offsets"][i]:src["gt_offsets"][i + 1]])
+        lo, hi = src["pred_offsets"][i], src["pred_offsets"][i + 1]
+        pred_parts.append(src["pred_rows"][lo:hi])
+        for field, parts in per_pred.items():
+            parts.append(src[field][lo:hi])
+
+    def gather(parts) -> FrameLabels:
+        rows = np.concatenate(parts) if parts else np.zeros((0, 6))
+        counts = [len(p) for p in parts]
+        return FrameLabels(names, rows, np.concatenate(([0], np.cumsum(counts, dtype=np.int64))))
+
+    gts, preds = gather(gt_parts), gather(pred_parts)
+    local = {f: np.concatenate(p) if p else np.zeros(0) for f, p in per_pred.items()}
+    gt_start = gts.offsets[:-1][preds.frame]
+    matches = FrameMatches(
+        local["best_iou"].astype(np.float64),
+        np.where(local["best_gt"] == -1, -1, local["best_gt"] + gt_start).astype(np.int64),
+        local["c_iou"].astype(np.float64),
+        np.where(local["c_gt"] == -1, -1, local["c_gt"] + gt_start).astype(np.int64),
+    )
+    if stale or cache is None or cache["names"].tolist() != names:
+        _save_cache(cache_path, keys, gts, preds, matches)
+    print(f"Frame cache: {len(names) - len(stale)} of {len(names)} frames reused, {len(stale)} re-matched")
+    return gts, preds, matches
 
 
 def compute_iou(box1: Tuple[float, float, float, float], box2: Tuple[float, float, float, float]) -> float:
@@ -46,102 +281,197 @@ def compute_ap(rec: np.ndarray, prec: np.ndarray) -> float:
     """Compute AP using the VOC 2010 method."""
     mrec = np.concatenate(([0.0], rec, [1.0]))
     mpre = np.concatenate(([0.0], prec, [0.0]))
-    for i in range(mpre.size - 1, 0, -1):
-        mpre[i - 1] = max(mpre[i - 1], mpre[i])
+    # precision envelope: running maximum from the right
+    mpre = np.maximum.accumulate(mpre[::-1])[::-1]
     i = np.where(mrec[1:] != mrec[:-1])[0]
     ap = np.sum((mrec[i + 1] - mrec[i]) * mpre[i + 1])
     return ap
 
 
-def evaluate_detection(gt_dir: str, pred_dir: str, iou_thresholds: List[float]):
-    """Evaluate detection results under given IoU thresholds, ignoring class differences."""
-    gt_files = sorted([f for f in os.listdir(gt_dir) if f.endswith(".txt")])
-    pred_files = sorted([f for f in os.listdir(pred_dir) if f.endswith(".txt")])
-    print(f"Number of GT files: {len(gt_files)}")
-    print(f"Number of prediction files: {len(pred_files)}")
-
-    # Load ground truths and predictions (ignore class information)
-    gts: Dict[str, List[Tuple[float, float, float, float]]] = {}
-    preds: List[Tuple[str, float, float, float, float, float]] = []
-
-    for fname in gt_files:
-        gt_path = os.path.join(gt_dir, fname)
-        gt_boxes = parse_label_file(gt_path)
-        # Store only bounding box coordinates, ignore class
-        gts[fname] = [(b[1], b[2], b[3], b[4]) for b in gt_boxes]
-
-        pred_path = os.path.join(pred_dir, fname)
-        pred_boxes = parse_label_file(pred_path, with_score=True)
-        # Store filename, bounding box coordinates and score, ignore class
-        for b in pred_boxes:
-            preds.append((fname, b[1], b[2], b[3], b[4], b[5]))
-
-    print(f"length of predictions: {len(preds)}")
-    print(f"length of ground truths: {sum(len(v) for v in gts.values())}")
-
-    results = {}
-    for thr in iou_thresholds:
-        # Count total number of ground truth boxes across all classes
-        npos = sum(len(boxes) for boxes in gts.values())
-        if npos == 0:
-            results[thr] = 0.0
-            continue
+def greedy_tp(best_iou: np.ndarray, best_gt: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    """Greedy TP flags for every threshold in one sweep.
 
-        # Create a tracking structure for used ground truth boxes
-        gt_used = {}
-        for fname, boxes in gts.items():
-            gt_used[fname] = [False] * len(boxes)
-
-        # Sort all predictions by confidence score (descending)
-        preds.sort(key=lambda x: x[5], reverse=True)
-
-        tp = np.zeros(len(preds))
-        fp = np.zeros(len(preds))
-        
-        for i, p in enumerate(preds):
-            fname, x1, y1, x2, y2, score = p
-            max_iou = 0.0
-            max_idx = -1
-            
-            # Find best matching ground truth box in the same frame
-            boxes = gts.get(fname, [])
-            for j, gt_box in enumerate(boxes):
-                iou = compute_iou((x1, y1, x2, y2), gt_box)
-                if iou > max_iou:
-                    max_iou = iou
-                    max_idx = j
-            
-            # Check if the match is above threshold and not already used
-            if max_iou >= thr and max_idx != -1 and not gt_used[fname][max_idx]:
-                tp[i] = 1
-                gt_used[fname][max_idx] = True
-            else:
-                fp[i] = 1
-
-        if tp.size == 0:
-            results[thr] = 0.0
+    *best_iou*/*best_gt* are the best GT overlap and box of each prediction,
+    already in descending score order. At threshold t a prediction is a TP if
+    ``best_iou >= t`` and it is the first such prediction for its GT box, which
+    is what matching the predictions one by one against unused GT boxes gives.
+    Returns a ``(len(thresholds), len(best_iou))`` float array of 0/1.
+    """
+    tp = np.zeros((len(thresholds), len(best_iou)))
+    idx = np.flatnonzero(best_gt != -1)
+    if idx.size == 0:
+        return tp
+    idx = idx[np.argsort(best_gt[idx], kind="stable")]        # grouped by GT box, score order kept
+    gt = best_gt[idx]
+    cand = best_iou[idx][None, :] >= thresholds[:, None]      # (T, K)
+    seen = np.cumsum(cand, axis=1)
+    starts = np.flatnonzero(np.r_[True, gt[1:] != gt[:-1]])
+    before = (seen - cand)[:, starts]                          # candidates before each group
+    before = np.repeat(before, np.diff(np.r_[starts, len(gt)]), axis=1)
+    tp[:, idx] = cand & (seen - before == 1)
+    return tp
+
+
+def ap_per_threshold(tp: np.ndarray, npos: int, counted: Optional[np.ndarray] = None) -> List[float]:
+    """AP for every row of a ``(T, N)`` TP flag matrix (predictions in score order).
+
+    *counted* optionally masks out predictions that take no part in an
+    evaluation subset (neither TP nor FP).
+    """
+    aps = []
+    for k in range(len(tp)):
+        flags = tp[k] if counted is None else tp[k][counted[k]]
+        if npos == 0 or flags.size == 0:
+            aps.append(0.0)
             continue
-            
-        tp_cum = np.cumsum(tp)
-        fp_cum = np.cumsum(fp)
+        tp_cum = np.cumsum(flags)
+        fp_cum = np.cumsum(1 - flags)
         rec = tp_cum / npos
         prec = tp_cum / (tp_cum + fp_cum)
-        ap = compute_ap(rec, prec)
-        results[thr] = ap
-        
+        aps.append(compute_ap(rec, prec))
+    return aps
+
+
+def parse_area_ranges(specs: Sequence[str]) -> Dict[str, Tuple[float, float]]:
+    """Parse ``NAME=LO:HI`` area ranges (pixels², ``HI`` may be ``inf``)."""
+    ranges = {}
+    for spec in specs:
+        name, sep, bounds = spec.partition("=")
+        lo, sep2, hi = bounds.partition(":")
+        if not sep or not sep2 or not name:
+            raise ValueError(f"Expected NAME=LO:HI, got: {spec}")
+        ranges[name] = (float(lo), float(hi))
+    return ranges
+
+
+def evaluate_detection(gt_dir: str, pred_dir: str, iou_thresholds: List[float], workers: Optional[int] = None,
+                       per_class: bool = False, area_ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+                       frame_cache: Optional[str] = None):
+    """Evaluate detection results under given IoU thresholds, ignoring class differences.
+
+    `gt_dir` and `pred_dir` may be label directories or packed label archives (see label_pack.py).
+    Label files are parsed in parallel by *workers* processes (see `load_labels`).
+
+    Breakdowns reuse the same sorted predictions:
+
+    * ``per_class`` – predictions only match GT boxes of their own class; adds
+      ``results["per_class"][cls] = {thr: ap, ..., "mAP": m}`` for every GT class.
+    * ``area_ranges`` – ``{name: (lo, hi)}`` GT areas in pixels² (see
+      `COCO_AREA_RANGES`); adds ``results["per_area"][name]``. The class-agnostic
+      matches are kept: a prediction that reaches the threshold belongs to the
+      bucket of its GT box, any other prediction to the bucket of its own area,
+      and predictions of other buckets are left out.
+
+    With *frame_cache* (an ``.npz`` path) parsed labels and matches are kept per
+    frame and only frames whose files changed are re-matched (see `cached_matches`).
+    """
+    gt_src = open_labels(gt_dir)
+    pred_src = open_labels(pred_dir)
+    print(f"Number of GT files: {len(gt_src)}")
+    print(f"Number of prediction files: {len(pred_src)}")
+    names = gt_src.names()
+    gt_src.close()
+    pred_src.close()
+
+    # Load ground truths and predictions of every GT frame and match each prediction to
+    # its best-overlapping GT box in the frame (independent of the threshold)
+    if frame_cache:
+        gts, preds, matches = cached_matches(gt_dir, pred_dir, names, workers, frame_cache)
+    else:
+        gts, preds = load_labels(gt_dir, pred_dir, names, workers)
+        matches = match_labels(gts, preds, class_aware=per_class)
+
+    print(f"length of predictions: {len(preds.rows)}")
+    print(f"length of ground truths: {len(gts.rows)}")
+
+    best_iou, best_gt = matches.best_iou, matches.best_gt
+    # Sort all predictions by confidence score (descending, ties keep file order)
+    order = np.argsort(-preds.score, kind="stable")
+    best_iou, best_gt = best_iou[order], best_gt[order]
+
+    npos = len(gts.rows)
+    thr = np.asarray(iou_thresholds, dtype=np.float64)
+    tp = greedy_tp(best_iou, best_gt, thr)
+    results = dict(zip(iou_thresholds, ap_per_threshold(tp, npos)))
     mAP = np.mean(list(results.values())) if results else 0.0
     results["mAP"] = mAP
+
+    def summary(aps: List[float]) -> Dict:
+        res = dict(zip(iou_thresholds, aps))
+        res["mAP"] = np.mean(aps) if aps else 0.0
+        return res
+
+    if per_class:
+        # GT boxes are class specific, so one greedy sweep over the class-aware matches serves every class
+        c_tp = greedy_tp(matches.c_iou[order], matches.c_gt[order], thr)
+        pred_cls = preds.cls[order]
+        results["per_class"] = {}
+        for c in np.unique(gts.cls).tolist():
+            mask = pred_cls == c
+            results["per_class"][c] = summary(ap_per_threshold(c_tp[:, mask], int((gts.cls == c).sum())))
+
+    if area_ranges:
+        gt_area = box_areas(gts.boxes)
+        pred_area = box_areas(preds.boxes)[order]
+        matched = (best_iou[None, :] >= thr[:, None]) & (best_gt != -1)[None, :]
+        results["per_area"] = {}
+        for name, (lo, hi) in area_ranges.items():
+            gt_in = (gt_area >= lo) & (gt_area < hi)
+            pred_in = (pred_area >= lo) & (pred_area < hi)
+            counted = np.where(matched, gt_in[np.maximum(best_gt, 0)][None, :], pred_in[None, :])
+            results["per_area"][name] = summary(ap_per_threshold(tp, int(gt_in.sum()), counted))
     return results
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Evaluate detection results")
-    parser.add_argument("pred_dir", help="Prediction directory")
-    parser.add_argument("gt_dir", help="Ground truth directory")
+    parser.add_argument("pred_dir", help="Prediction directory or packed label archive")
+    parser.add_argument("gt_dir", help="Ground truth directory or packed label archive")
+    parser.add_argument("--iou-thresholds", nargs="+", type=float, default=[0.5, 0.75, 0.9], metavar="T",
+                        help="IoU thresholds to report AP at (default: 0.5 0.75 0.9); all are matched in one pass")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Processes used to parse label files (default: one per CPU, 1 = serial)")
+    parser.add_argument("--frame-cache", default=None, metavar="NPZ",
+                        help="Keep per-frame matches in this file and only re-match frames whose label files changed")
+    parser.add_argument("--result-cache", default=None, metavar="DIR",
+                        help="Reuse results of identical labels and settings stored in this directory (see result_cache.py)")
+    parser.add_argument("--per-class", action="store_true", help="Also report AP per class (class-aware matching)")
+    parser.add_argument("--per-area", action="store_true", help="Also report AP per GT area bucket")
+    parser.add_argument("--area-ranges", nargs="+", default=None, metavar="NAME=LO:HI",
+                        help="Area buckets in pixels² for --per-area (default COCO: small=0:1024 medium=1024:9216 large=9216:inf)")
 
     args = parser.parse_args()
 
-    thresholds = [0.5, 0.75, 0.9]
-    res = evaluate_detection(args.gt_dir, args.pred_dir, thresholds)
+    thresholds = args.iou_thresholds
+    area_ranges = None
+    if args.per_area or args.area_ranges:
+        area_ranges = parse_area_ranges(args.area_ranges) if args.area_ranges else COCO_AREA_RANGES
+    def evaluate():
+        return evaluate_detection(args.gt_dir, args.pred_dir, thresholds, args.workers,
+                                  per_class=args.per_class, area_ranges=area_ranges, frame_cache=args.frame_cache)
+
+    cache = open_cache(args.result_cache)
+    if cache is None:
+        res = evaluate()
+    else:
+        # key on the resolved sources, so a directory path falling back to <dir>.lblpack hashes the archive
+        sources = {"groundtruth": open_labels(args.gt_dir), "prediction": open_labels(args.pred_dir)}
+        inputs = {role: src.path for role, src in sources.items()}
+        for src in sources.values():
+            src.close()
+        params = {"iou_thresholds": thresholds, "per_class": args.per_class, "area_ranges": area_ranges}
+        res = cache.cached("eval_det", EVAL_VERSION, inputs, params, evaluate)
     for t in thresholds:
         print(f"AP@{t}: {res[t]:.4f}")
-    print(f"mAP: {res['mAP']:.4f}")
\ No newline at end of file
+    print(f"mAP: {res['mAP']:.4f}")
+
+    def row(label, r):
+        print(f"  {label:<16}" + "  ".join(f"AP@{t}: {r[t]:.4f}" for t in thresholds) + f"  mAP: {r['mAP']:.4f}")
+
+    if "per_class" in res:
+        print("Per-class AP:")
+        for c, r in res["per_class"].items():
+            row(f"class {c}", r)
+    if "per_area" in res:
+        print("Per-area AP:")
+        for name, r in res["per_area"].items():
+            row(name, r)
\ No newline at end of file
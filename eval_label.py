@@ -1,6 +1,7 @@
 """
 Evaluate submissions for our custome dataset.
 """
+import io
 import os
 import sys
 import zipfile
@@ -13,7 +14,15 @@ import motmetrics as mm
 import pytrec_eval as trec
 from PIL import Image
 from collections import defaultdict
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from argparse import ArgumentParser
+from batch_eval import read_manifest, run_batch
+import profiling
+from result_cache import open_cache
+from mot_io import MIXED, sniff_delimiter
+from mtmc_parquet import filter_mtmc, is_parquet, iter_mtmc_parquet, read_mtmc_parquet
+from track_metrics import iou_distance_pairs, max_overlap
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -47,16 +56,26 @@ def frame_stats(df, cam=None):
 
 def get_args():
     parser = ArgumentParser(add_help=False, usage=usageMsg())
-    parser.add_argument("data", nargs=2, help="Path to <test_labels> <predicted_labels>.")
+    parser.add_argument("data", nargs='*', help="Path to <test_labels> <predicted_labels>.")
     parser.add_argument('--help', action='help', help='Show this help message and exit, the usage of this file is: python3 eval.py <ground_truth> <prediction> --dstype <dstype>')
     parser.add_argument('-m', '--mread', action='store_true', help="Print machine readable results (JSON).")
     parser.add_argument('-ds', '--dstype', type=str, default='train', help="Data set type: train, validation or test.")
     parser.add_argument('-rd', '--roidir', type=str, default='ROIs', help="Region of Interest images directory.")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="Parser threads for multi-member archives and processes for the per-camera ID counts (default: all cores). The CLEAR-MOT accumulator of the default output always runs on one core.")
+    parser.add_argument('--id-only', action='store_true', help="Only compute IDF1/IDP/IDR and their counts from the parallel per-camera ID counts, skipping the motmetrics accumulator of the CLEAR-MOT metrics (MOTA, MOTP, ...). Only this mode scales with --workers and the number of cameras; the default output also runs the accumulator over all cameras on one core.")
+    parser.add_argument('-c', '--cameras', type=int, nargs='+', default=None, help="Only evaluate these camera ids.")
+    parser.add_argument('-f', '--frames', type=int, nargs=2, default=None, metavar=('START', 'END'), help="Only evaluate this inclusive frame range.")
+    parser.add_argument('--window', type=int, default=None, metavar='FRAMES', help="Stream the inputs (.txt sorted by camera and frame, or Parquet from mtmc_parquet.py) with bounded memory and report IDF1/IDP/IDR per window of FRAMES frames of each camera, then globally.")
+    parser.add_argument('--manifest', type=str, default=None, help="Evaluate every '<ground_truth> <prediction> [name]' line of this file instead (one process per prediction, see batch_eval.py).")
+    parser.add_argument('--result-cache', type=str, default=None, metavar='DIR', help="Reuse results of identical inputs and settings stored in this directory (see result_cache.py).")
+    parser.add_argument('-o', '--output', type=str, default=None, help="Also write the results table to this CSV file.")
+    profiling.add_arguments(parser)
     return parser.parse_args()
 
 
 def usageMsg():
     return """  python3 eval.py <ground_truth> <prediction> --dstype <dstype>
+       python3 eval.py --manifest <manifest> [-o results.csv]
 
 Details for expected formats can be found at https://www.aicitychallenge.org/.
 
@@ -65,50 +84,116 @@ See `python3 eval.py --help` for more info.
 """
 
 
-def getData(fh, fpath, names=None, sep='\s+|\t+|,'):
+REGEX_SEP = r'\s+|\t+|,'
+DATA_COLUMNS = ['CameraId','Id', 'FrameId', 'X', 'Y', 'Width', 'Height', 'Xworld', 'Yworld', 'Ori']
+INT_COLUMNS = ('CameraId', 'Id', 'FrameId')
+FLOAT32_COLUMNS = ('Xworld', 'Yworld', 'Ori')  # not used by the metrics; boxes stay float64
+
+
+def compactDtypes(names):
+    """ Compact dtypes for the known columns: int32 ids/frames, float32 world coordinates, float64 boxes. """
+    if names is None:
+        return None
+    return {n: (np.int32 if n in INT_COLUMNS else np.float32 if n in FLOAT32_COLUMNS else np.float64) for n in names}
+
+
+def castCompact(df):
+    """ Cast loaded columns to the compact dtypes where that is lossless (no missing ids). """
+    for col, dt in (compactDtypes(list(df.columns)) or {}).items():
+        if dt is np.int32 and df[col].isna().any():
+            continue
+        df[col] = df[col].astype(dt)
+    return df
+
+
+def getData(fh, fpath, names=None, sep=None):
     """ Get the necessary track data from a file handle.
     
     Params
     ------
     fh : opened handle
-        Steam handle to read from.
+        Steam handle to read from (text or binary, e.g. an archive member).
     fpath : str
-        Original path of file reading from.
+        Original path of file reading from, used in error messages.
     names : list<str>
         List of column names for the data.
     sep : str
-        Allowed separators regular expression string.
+        Separator to use. By default it is sniffed from the first lines and the
+        fast C parser is used; files mixing delimiters fall back to the
+        `REGEX_SEP` regular expression on the python engine.
     Returns
     -------
     df : pandas.DataFrame
         Data frame containing the data loaded from the stream with optionally assigned column names.
-        No index is set on the data.
+        No index is set on the data. Ids and frames are int32, world coordinates float32.
     """
     
     try:
-        df = pd.read_csv(
-            fpath, 
-            sep=sep, 
-            index_col=None, 
-            skipinitialspace=True, 
+        if not fh.seekable():
+            fh = io.BytesIO(fh.read())
+        if sep is None:
+            sep = sniff_delimiter(fh)
+        if sep == MIXED or (sep is not None and len(sep) > 1 and sep != r'\s+'):
+            df = pd.read_csv(
+                fh, 
+                sep=REGEX_SEP if sep == MIXED else sep, 
+                index_col=None, 
+                skipinitialspace=True, 
+                header=None,
+                names=names,
+                engine='python'
+            )
+            return castCompact(df)
+
+        kwargs = dict(
+            sep=r'\s+' if sep is None else sep,
+            index_col=None,
+            skipinitialspace=sep is not None,
             header=None,
             names=names,
-            engine='python'
+            engine='c',
         )
-        
-        return df
+        start = fh.tell()
+        try:
+            return pd.read_csv(fh, dtype=compactDtypes(names), **kwargs)
+        except ValueError:
+            # ids written as floats (12.0) or missing fields: parse wide, then cast
+            fh.seek(start)
+            return castCompact(pd.read_csv(fh, **kwargs))
     
     except Exception as e:
         raise ValueError("Could not read input from %s. Error: %s" % (fpath, repr(e)))
 
 
-def readData(fpath):
+def isDataMember(name):
+    """ Whether an archive member name looks like a data file (not a directory or OS metadata). """
+    base = os.path.basename(name.rstrip('/'))
+    return not name.endswith('/') and not name.startswith('__MACOSX') and not base.startswith('.')
+
+
+def concatMembers(futures, fpath):
+    """ Gather per-member data frames (in archive order) into one data frame. """
+    if not futures:
+        raise ValueError("Missing files in archive %s." % fpath)
+    dfs = [f.result() for f in futures]
+    return dfs[0] if len(dfs) == 1 else pd.concat(dfs, ignore_index=True)
+
+
+def readData(fpath, workers=None, cameras=None, frame_range=None):
     """ Read test or pred data for a given track. 
     
     Params
     ------
     fpath : str
-        Original path of file reading from.
+        Original path of file reading from: a text file, a tar.gz/tgz/zip
+        archive (see `readFileData`) or a camera-partitioned Parquet data set
+        written by MCVT_data_creation.py (requires pyarrow).
+    workers : int
+        Maximum number of parser threads for multi-member archives.
+    cameras : list<int>
+        Only keep these camera ids. Pushed down to the scan for Parquet input.
+    frame_range : tuple<int, int>
+        Only keep frames in this inclusive range. Pushed down for Parquet input.
     Returns
     -------
     df : pandas.DataFrame
@@ -118,30 +203,69 @@ def readData(fpath):
     ----------
         May raise a ValueError exception if file cannot be opened or read.
     """
-    names = ['CameraId','Id', 'FrameId', 'X', 'Y', 'Width', 'Height', 'Xworld', 'Yworld', 'Ori']
+    if is_parquet(fpath):
+        if not os.path.exists(fpath):
+            raise ValueError("File %s does not exist." % fpath)
+        df = read_mtmc_parquet(fpath, cameras=cameras, frame_range=frame_range)
+        df['Ori'] = np.float32(np.nan)
+        return df
+    return filter_mtmc(readFileData(fpath, workers=workers), cameras=cameras, frame_range=frame_range)
+
+
+def readFileData(fpath, workers=None):
+    """ Read test or pred data from a text file or archive.
+    
+    Params
+    ------
+    fpath : str
+        Original path of file reading from. Archives (tar.gz/tgz/zip) are
+        decompressed as a stream straight into the parser; archives holding
+        several files (e.g. one per camera) are parsed in parallel and
+        concatenated in archive order.
+    workers : int
+        Maximum number of parser threads for multi-member archives.
+    Returns
+    -------
+    df : pandas.DataFrame
+        Data frame containing the data loaded from the stream with optionally assigned column names.
+        No index is set on the data.
+    Exceptions
+    ----------
+        May raise a ValueError exception if file cannot be opened or read.
+    """
+    names = DATA_COLUMNS
         
     if not os.path.isfile(fpath):
         raise ValueError("File %s does not exist." % fpath)
+    workers = workers or os.cpu_count() or 1
     # Gzip tar archive
     if fpath.lower().endswith("tar.gz") or fpath.lower().endswith("tgz"):
-        tar = tarfile.open(fpath, "r:gz")
-        members = tar.getmembers()
-        if len(members) > 1:
-            raise ValueError("File %s contains more than one file. A single file is expected." % fpath)
-        if not members:
-            raise ValueError("Missing files in archive %s." % fpath)
-        fh = tar.extractfile(members[0])
-        return getData(fh, tar.getnames()[0], names=names)
+        with tarfile.open(fpath, "r:gz") as tar:
+            members = [m for m in tar if m.isfile() and isDataMember(m.name)]
+            if len(members) == 1:
+                return getData(tar.extractfile(members[0]), members[0].name, names=names)
+            # gzip can only be decompressed sequentially: stream each member out
+            # in turn and let the pool parse it while the next one is inflated
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(getData, io.BytesIO(tar.extractfile(m).read()), m.name, names=names)
+                    for m in members
+                ]
+                return concatMembers(futures, fpath)
     # Zip archive
     elif fpath.lower().endswith(".zip"):
         with zipfile.ZipFile(fpath) as z:
-            members = z.namelist()
-            if len(members) > 1:
-                raise ValueError("File %s contains more than one file. A single file is expected." % fpath)
-            if not members:
-                raise ValueError("Missing files in archive %s." % fpath)
-            with z.open(members[0]) as fh:
-                return getData(fh, members[0], names=names)
+            members = [m for m in z.namelist() if isDataMember(m)]
+
+            def readMember(member):
+                with z.open(member) as fh:
+                    return getData(fh, member, names=names)
+
+            if len(members) == 1:
+                return readMember(members[0])
+            # zip members are independent deflate streams and can be inflated concurrently
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return concatMembers([pool.submit(readMember, m) for m in members], fpath)
     # text file
     elif fpath.lower().endswith(".txt"):
         with open(fpath, "r") as fh:
@@ -165,7 +289,10 @@ def print_results(summary, mread=False):
         Prints results to screen.
     """
     if mread:
-        print('{"results":%s}' % summary.iloc[-1].to_json())
+        if len(summary) > 1:
+            print('{"results":%s}' % summary.to_json(orient='index'))
+        else:
+            print('{"results":%s}' % summary.iloc[-1].to_json())
         return
     
     formatters = {'idf1': '{:2.2f}'.format,
@@ -198,6 +325,10 @@ def eval(test, pred, **kwargs):
         Data set type. One of 'train', 'validation' or 'test'. Defaults to 'train'.
     roidir : str
         Directory containing ROI images or where they should be stored.
+    workers : int
+        Worker processes for the per-camera ID counts. Defaults to all cores.
+    id_only : bool
+        Only compute the ID measures (see `compare_dataframes_mtmc`). Defaults to False.
     Returns
     -------
     df : pandas.DataFrame
@@ -208,81 +339,533 @@ def eval(test, pred, **kwargs):
     mread  = kwargs.pop('mread', False)
     dstype = kwargs.pop('dstype', 'train')
     roidir = kwargs.pop('roidir', 'ROIs')
+    workers = kwargs.pop('workers', None)
+    id_only = kwargs.pop('id_only', False)
 
+    # filter prediction data
+    with profiling.phase('dedupe', rows=len(pred)):
+        pred = removeRepetition(pred)
+    
+    # evaluate results
+    return compare_dataframes_mtmc(test, pred, workers=workers, id_only=id_only)
 
-    def removeRepetition(df):
-        """Remove repetition to ensure that all objects are unique for every frame.
 
-        Params
-        ------
-        df : pandas.DataFrame
-            Data that should be filtered
-        Returns
-        -------
-        df : pandas.DataFrame
-            Filtered data that all objects are unique for every frame.
-        """
+EVAL_VERSION = 1
+IOU_DISTTH = 0.7        # IoU distance threshold of the matching, larger is more loose
+PAIR_BLOCK = 1 << 16    # GT x prediction box pairs compared per vectorized step
+BOX_COLUMNS = ['X', 'Y', 'Width', 'Height']
+ID_METRICS = ['idf1', 'idp', 'idr', 'idfp', 'idfn', 'idtp']
 
-        df = df.drop_duplicates(subset=['CameraId', 'Id', 'FrameId'], keep='first')
 
-        return df
-        
-    def compare_dataframes_mtmc(gts, ts):
-        """Compute ID-based evaluation metrics for multi-camera multi-object tracking.
-        
-        Params
-        ------
-        gts : pandas.DataFrame
-            Ground truth data.
-        ts : pandas.DataFrame
-            Prediction/test data.
-        Returns
-        -------
-        df : pandas.DataFrame
-            Results of the evaluations in a df with only the 'idf1', 'idp', and 'idr' columns.
-        """
-        gtds = []
-        tsds = []
-        gtcams = gts['CameraId'].drop_duplicates().tolist()
-        tscams = ts['CameraId'].drop_duplicates().tolist()
-        maxFrameId = 0
-
-        for k in sorted(gtcams):
-            gtd = gts.query('CameraId == %d' % k)
-            gtd = gtd[['FrameId', 'Id', 'X', 'Y', 'Width', 'Height']]
-            # max FrameId in gtd only
-            mfid = gtd['FrameId'].max()
-            gtd['FrameId'] += maxFrameId
-            gtd = gtd.set_index(['FrameId', 'Id'])
-            gtds.append(gtd)
-
-            if k in tscams:
-                tsd = ts.query('CameraId == %d' % k)
-                tsd = tsd[['FrameId', 'Id', 'X', 'Y', 'Width', 'Height']]
-                # max FrameId among both gtd and tsdí
-                mfid = max(mfid, tsd['FrameId'].max())
-                tsd['FrameId'] += maxFrameId
-                tsd = tsd.set_index(['FrameId', 'Id'])
-                tsds.append(tsd)
-
-            maxFrameId += mfid
-
-        # compute multi-camera tracking evaluation stats
-        multiCamAcc = mm.utils.compare_to_groundtruth(pd.concat(gtds), pd.concat(tsds), 'iou', distfields=None, distth=0.7) # distth larger is more loose
-        metrics=list(mm.metrics.motchallenge_metrics)
-        metrics.extend(['num_frames','idfp','idfn','idtp'])
-        print(metrics)
-        summary = mh.compute(multiCamAcc, metrics=metrics, name='MultiCam')
-
-        return summary
+def removeRepetition(df):
+    """Remove repetition to ensure that all objects are unique for every frame.
+
+    Params
+    ------
+    df : pandas.DataFrame
+        Data that should be filtered
+    Returns
+    -------
+    df : pandas.DataFrame
+        Filtered data that all objects are unique for every frame.
+    """
+
+    df = df.drop_duplicates(subset=['CameraId', 'Id', 'FrameId'], keep='first')
 
+    return df
+
+
+def buildMtmcAccumulator(gts, ts):
+    """Match predictions to ground truth over all cameras.
+
+    Cameras are laid out one after another on a common frame axis (each
+    camera's frames are offset by the frames of the cameras before it, see
+    `offsetFrames`) and matched frame by frame with IoU distance (threshold
+    `IOU_DISTTH`). Each input is reordered once by camera (keeping the row
+    order within a camera) into a single indexed frame, instead of per-camera
+    copies that are concatenated again.
+
+    Params
+    ------
+    gts : pandas.DataFrame
+        Ground truth data.
+    ts : pandas.DataFrame
+        Prediction/test data.
+    Returns
+    -------
+    acc : motmetrics.MOTAccumulator
+        Accumulated matches of all cameras.
+    """
+    gtFrames, tsFrames, tsKeep, _ = offsetFrames(gts, ts)
+    gtOrder = np.argsort(gts['CameraId'].to_numpy(), kind='stable')
+    tsIdx = np.flatnonzero(tsKeep)
+    tsOrder = tsIdx[np.argsort(ts['CameraId'].to_numpy()[tsIdx], kind='stable')]
+
+    def offsetTable(df, frames, order):
+        table = pd.DataFrame({'FrameId': frames[order], 'Id': df['Id'].to_numpy()[order]})
+        for col in BOX_COLUMNS:
+            table[col] = df[col].to_numpy()[order]
+        return table.set_index(['FrameId', 'Id'])
+
+    # compute multi-camera tracking evaluation stats
+    return mm.utils.compare_to_groundtruth(offsetTable(gts, gtFrames, gtOrder), offsetTable(ts, tsFrames, tsOrder),
+                                           'iou', distfields=None, distth=IOU_DISTTH)
+
+
+def summarizeMtmc(multiCamAcc, idSummary=None):
+    """Compute the MOTChallenge and ID metrics of a multi-camera accumulator.
+
+    Params
+    ------
+    multiCamAcc : motmetrics.MOTAccumulator
+        Output of `buildMtmcAccumulator`.
+    idSummary : pandas.DataFrame
+        Output of `idMeasuresMtmc` for the same data. When given, its
+        `ID_METRICS` are used and motmetrics only computes the others, which
+        skips its own global ID assignment.
+    Returns
+    -------
+    df : pandas.DataFrame
+        One row named 'MultiCam' with the metrics (including 'idf1', 'idp' and 'idr').
+    """
     mh = mm.metrics.create()
+    metrics=list(mm.metrics.motchallenge_metrics)
+    metrics.extend(['num_frames','idfp','idfn','idtp'])
+    print(metrics)
+    if idSummary is None:
+        return mh.compute(multiCamAcc, metrics=metrics, name='MultiCam')
+    summary = mh.compute(multiCamAcc, metrics=[m for m in metrics if m not in ID_METRICS], name='MultiCam')
+    for m in ID_METRICS:
+        summary[m] = idSummary[m].to_numpy()
+    return summary[metrics]
+
+
+def offsetFrames(gts, ts):
+    """Lay the cameras out on a common frame axis exactly like `buildMtmcAccumulator`.
+
+    Params
+    ------
+    gts : pandas.DataFrame
+        Ground truth data.
+    ts : pandas.DataFrame
+        Prediction/test data.
+    Returns
+    -------
+    gtFrames, tsFrames : numpy.ndarray
+        Offset frame of every row; -1 for predictions of cameras without ground truth.
+    tsKeep : numpy.ndarray
+        Mask of the predictions that take part in the evaluation.
+    edges : numpy.ndarray
+        Last offset frame of each ground-truth camera, in camera order.
+    """
+    cams = np.sort(gts['CameraId'].unique())
+    gtCam = gts['CameraId'].to_numpy()
+    tsCam = ts['CameraId'].to_numpy()
+    tsKeep = np.isin(tsCam, cams)
+    gtFrame = gts['FrameId'].to_numpy().astype(np.int64)
+    tsFrame = ts['FrameId'].to_numpy().astype(np.int64)
+
+    gtIdx = np.searchsorted(cams, gtCam)
+    tsIdx = np.searchsorted(cams, tsCam[tsKeep])
+    mfid = np.full(len(cams), np.iinfo(np.int64).min)
+    np.maximum.at(mfid, gtIdx, gtFrame)
+    np.maximum.at(mfid, tsIdx, tsFrame[tsKeep])
+    offsets = np.concatenate(([0], np.cumsum(mfid)[:-1]))
+
+    tsFrames = np.full(len(ts), -1, dtype=np.int64)
+    tsFrames[tsKeep] = tsFrame[tsKeep] + offsets[tsIdx]
+    return gtFrame + offsets[gtIdx], tsFrames, tsKeep, offsets + mfid
+
+
+def idCounts(gtFrame, gtObj, gtBoxes, tsFrame, tsHyp, tsBoxes, nObj, nHyp):
+    """Co-occurrence counts of one part of the frame axis (run in a worker process).
+
+    Every GT box is compared with every predicted box of the same frame; pairs
+    within `IOU_DISTTH` count as an overlap of their ids.
+
+    Params
+    ------
+    gtFrame, tsFrame : numpy.ndarray
+        Offset frame of every row, sorted.
+    gtObj, tsHyp : numpy.ndarray
+        Dense ids (0 .. nObj-1 / 0 .. nHyp-1) of every row.
+    gtBoxes, tsBoxes : numpy.ndarray
+        (N, 4) X, Y, Width, Height boxes (compared in float64).
+    Returns
+    -------
+    objFrames, hypFrames : numpy.ndarray
+        Number of frames each dense id is present in (length nObj / nHyp).
+    pairObj, pairHyp, pairCount : numpy.ndarray
+        Overlapping id pairs and the number of overlaps of each.
+    """
+    objFrames = np.bincount(np.unique(gtFrame * nObj + gtObj) % nObj, minlength=nObj)
+    hypFrames = np.bincount(np.unique(tsFrame * nHyp + tsHyp) % nHyp, minlength=nHyp)
+
+    frames = np.intersect1d(gtFrame, tsFrame)
+    gLo = np.searchsorted(gtFrame, frames, side='left')
+    tLo = np.searchsorted(tsFrame, frames, side='left')
+    nG = np.searchsorted(gtFrame, frames, side='right') - gLo
+    nT = np.searchsorted(tsFrame, frames, side='right') - tLo
+    size = nG * nT
+
+    keys = []
+    start, cum = 0, np.cumsum(size)
+    while start < len(frames):
+        base = cum[start - 1] if start else 0
+        stop = max(int(np.searchsorted(cum, base + PAIR_BLOCK, side='right')), start + 1)
+        sz = size[start:stop]
+        k = np.arange(sz.sum()) - np.repeat(np.cumsum(sz) - sz, sz)
+        nTr = np.repeat(nT[start:stop], sz)
+        gi = np.repeat(gLo[start:stop], sz) + k // nTr
+        tj = np.repeat(tLo[start:stop], sz) + k % nTr
+        near = np.isfinite(iou_distance_pairs(gtBoxes[gi].astype(np.float64), tsBoxes[tj].astype(np.float64), IOU_DISTTH))
+        keys.append(gtObj[gi[near]] * nHyp + tsHyp[tj[near]])
+        start = stop
+    keys, pairCount = np.unique(np.concatenate(keys) if keys else np.zeros(0, dtype=np.int64), return_counts=True)
+    return objFrames, hypFrames, keys // nHyp, keys % nHyp, pairCount
+
+
+def sortedBoxes(df, order):
+    """ (N, 4) X, Y, Width, Height boxes of the rows `order`, in the column dtype. """
+    boxes = np.empty((len(order), len(BOX_COLUMNS)), dtype=np.result_type(*df[BOX_COLUMNS].dtypes))
+    for i, col in enumerate(BOX_COLUMNS):
+        boxes[:, i] = df[col].to_numpy()[order]
+    return boxes
+
+
+def mapInOrder(pool, fn, tasks, limit):
+    """ Like `pool.map`, but submits a task only when fewer than `limit` are running, so
+    only a few tasks' arguments are pickled and held in memory at any time. """
+    pending = []
+    for task in tasks:
+        if len(pending) >= limit:
+            yield pending.pop(0).result()
+        pending.append(pool.submit(fn, *task))
+    for future in pending:
+        yield future.result()
+
+
+def idMeasuresMtmc(gts, ts, workers=None):
+    """Compute IDF1, IDP and IDR over all cameras without a motmetrics accumulator.
+
+    The cameras are laid out on the frame axis of `buildMtmcAccumulator`, the
+    GT/prediction co-occurrence counts of each camera's frames are computed in
+    parallel worker processes (`idCounts`) and the global identity assignment
+    is solved once over the summed GT-ID x prediction-ID overlap matrix. The
+    numbers are identical to `summarizeMtmc`.
+
+    Both inputs are sorted once on that axis (i.e. by camera, then frame) into
+    compact arrays; every camera is then a contiguous slice, handed to its
+    worker without further copies.
+
+    Params
+    ------
+    gts : pandas.DataFrame
+        Ground truth data.
+    ts : pandas.DataFrame
+        Prediction/test data.
+    workers : int
+        Maximum number of worker processes. Defaults to all cores.
+    Returns
+    -------
+    df : pandas.DataFrame
+        One row named 'MultiCam' with 'idf1', 'idp', 'idr', 'num_frames', 'idfp', 'idfn' and 'idtp'.
+    """
+    with profiling.phase('layout', rows=len(gts) + len(ts)):
+        gtFrames, tsFrames, tsKeep, edges = offsetFrames(gts, ts)
+        gtOrder = np.argsort(gtFrames, kind='stable')
+        tsIdx = np.flatnonzero(tsKeep)
+        tsOrder = tsIdx[np.argsort(tsFrames[tsIdx], kind='stable')]
+        gtFrames, tsFrames = gtFrames[gtOrder], tsFrames[tsOrder]
+        gtObj = np.unique(gts['Id'].to_numpy(), return_inverse=True)[1].reshape(-1)[gtOrder]
+        tsHyp = np.unique(ts['Id'].to_numpy()[tsOrder], return_inverse=True)[1].reshape(-1)
+        nObj, nHyp = int(gtObj.max(initial=-1)) + 1, int(tsHyp.max(initial=-1)) + 1
+        gtBoxes, tsBoxes = sortedBoxes(gts, gtOrder), sortedBoxes(ts, tsOrder)
+        del gtOrder, tsOrder, tsIdx, tsKeep
+
+    # one slice per camera; a frame shared by two cameras (frame ids <= 0) stays in one slice
+    edges = np.maximum.accumulate(edges)
+    gtCut = np.append(np.searchsorted(gtFrames, edges[:-1], side='right'), len(gtFrames))
+    tsCut = np.append(np.searchsorted(tsFrames, edges[:-1], side='right'), len(tsFrames))
+    tasks = (
+        (gtFrames[g0:g1], gtObj[g0:g1], gtBoxes[g0:g1], tsFrames[t0:t1], tsHyp[t0:t1], tsBoxes[t0:t1], nObj, nHyp)
+        for g0, g1, t0, t1 in zip(np.r_[0, gtCut[:-1]], gtCut, np.r_[0, tsCut[:-1]], tsCut)
+    )
+
+    workers = min(workers or os.cpu_count() or 1, len(edges))
+    with profiling.phase('id_counts', rows=len(gtFrames) + len(tsFrames)):
+        if workers <= 1:
+            parts = [idCounts(*task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = list(mapInOrder(pool, idCounts, tasks, workers))
+
+    with profiling.phase('assignment') as ph:
+        objFrames = sum((part[0] for part in parts), np.zeros(nObj, dtype=np.int64))
+        hypFrames = sum((part[1] for part in parts), np.zeros(nHyp, dtype=np.int64))
+        none = np.zeros(0, dtype=np.int64)
+        pairObj = np.concatenate([none] + [part[2] for part in parts])
+        ph.rows = len(pairObj)
+        idtpMax = max_overlap(pairObj, np.concatenate([none] + [part[3] for part in parts]),
+                              np.concatenate([none] + [part[4] for part in parts]))
+    metrics = idMetrics(len(gtFrames), len(tsFrames), objFrames.sum(), hypFrames.sum(), idtpMax,
+                        len(np.union1d(gtFrames, tsFrames)))
+    return pd.DataFrame({k: [v] for k, v in metrics.items()}, index=['MultiCam'])
+
+
+def idMetrics(numObjects, numPredictions, objFrames, hypFrames, idtpMax, numFrames):
+    """ IDF1, IDP, IDR and their counts from the totals of `idCounts` and the
+    overlap of the ID assignment (`track_metrics.max_overlap`), as in motmetrics. """
+    idfn = float(objFrames - idtpMax)
+    idfp = float(hypFrames - idtpMax)
+    idtp = numObjects - idfn
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'idf1': np.true_divide(2 * idtp, numObjects + numPredictions),
+            'idp': np.true_divide(idtp, idtp + idfp),
+            'idr': np.true_divide(idtp, idtp + idfn),
+            'num_frames': numFrames,
+            'idfp': idfp,
+            'idfn': idfn,
+            'idtp': idtp,
+        }
+
+
+def compare_dataframes_mtmc(gts, ts, workers=None, id_only=False):
+    """Compute the evaluation metrics for multi-camera multi-object tracking.
+
+    The ID measures come from the parallel per-camera counts of
+    `idMeasuresMtmc`; the CLEAR-MOT metrics (MOTA, MOTP, switches, ...) from a
+    single motmetrics accumulator over all cameras, which runs on one core
+    and dominates the run time. It is not split per camera because ids are
+    shared between cameras: switches, fragmentations and the mostly
+    tracked/lost counts follow an id from one camera to the next, so sums of
+    per-camera accumulators would not give the same numbers.
     
-    # filter prediction data
-    pred = removeRepetition(pred)
-    
-    # evaluate results
-    return compare_dataframes_mtmc(test, pred)
+    Params
+    ------
+    gts : pandas.DataFrame
+        Ground truth data.
+    ts : pandas.DataFrame
+        Prediction/test data.
+    workers : int
+        Worker processes for the per-camera ID counts (see `idMeasuresMtmc`).
+    id_only : bool
+        Skip the accumulator and only return the ID measures, at a fraction
+        of the time and memory.
+    Returns
+    -------
+    df : pandas.DataFrame
+        Results of the evaluations in a df with the motchallenge metrics and
+        'num_frames', 'idfp', 'idfn', 'idtp' (only `ID_METRICS` and
+        'num_frames' with *id_only*).
+    """
+    idSummary = idMeasuresMtmc(gts, ts, workers=workers)
+    if id_only:
+        return idSummary
+    with profiling.phase('accumulate', rows=len(gts) + len(ts)):
+        acc = buildMtmcAccumulator(gts, ts)
+    with profiling.phase('summarize'):
+        return summarizeMtmc(acc, idSummary)
+
+
+STREAM_CHUNK = 1 << 16  # rows read at a time by the streaming evaluation
+
+
+def iterFileChunks(fpath, chunkRows=STREAM_CHUNK, cameras=None, frame_range=None):
+    """ Read a text file or Parquet data set in chunks of at most `chunkRows` rows.
+
+    Params
+    ------
+    fpath : str
+        A ``.txt`` file (parsed like `getData`) or a Parquet data set (scanned
+        camera by camera with the filters pushed down, see `iter_mtmc_parquet`).
+    cameras, frame_range
+        Same selection as in `readData`.
+    Returns
+    -------
+    iterator of pandas.DataFrame
+        Chunks in file order; text chunks are filtered after parsing.
+    Exceptions
+    ----------
+        Raises a ValueError if the file cannot be opened or read.
+    """
+    if is_parquet(fpath):
+        if not os.path.exists(fpath):
+            raise ValueError("File %s does not exist." % fpath)
+        yield from iter_mtmc_parquet(fpath, cameras=cameras, frame_range=frame_range, batch_rows=chunkRows)
+        return
+    if not fpath.lower().endswith(".txt"):
+        raise ValueError("Streaming evaluation reads .txt files or Parquet data sets, not %s." % fpath)
+    if not os.path.isfile(fpath):
+        raise ValueError("File %s does not exist." % fpath)
+    with open(fpath, 'rb') as fh:
+        sep = sniff_delimiter(fh)
+        if sep == MIXED:
+            kwargs = dict(sep=REGEX_SEP, skipinitialspace=True, engine='python')
+        else:
+            kwargs = dict(sep=r'\s+' if sep is None else sep, skipinitialspace=sep is not None, engine='c')
+        try:
+            reader = pd.read_csv(fh, index_col=None, header=None, names=DATA_COLUMNS, chunksize=chunkRows, **kwargs)
+            for df in reader:
+                df = filter_mtmc(castCompact(df), cameras=cameras, frame_range=frame_range)
+                if len(df):
+                    yield df
+        except ValueError as e:
+            raise ValueError("Could not read input from %s. Error: %s" % (fpath, repr(e)))
+
+
+def iterWindows(chunks, window, fpath):
+    """ Regroup chunks sorted by camera and frame into windows of `window` frames per camera.
+
+    Params
+    ------
+    chunks : iterator of pandas.DataFrame
+        Output of `iterFileChunks`.
+    window : int
+        Window length; window k of a camera holds frames k*window+1 .. (k+1)*window.
+    fpath : str
+        Path of the data, used in error messages.
+    Returns
+    -------
+    iterator of ((int, int), pandas.DataFrame)
+        ((camera, window index), rows) in increasing order; only one window
+        and one chunk are held in memory at a time.
+    Exceptions
+    ----------
+        Raises a ValueError if the rows are not sorted by camera and frame.
+    """
+    pending, lastCam, lastFrame = None, None, None
+    for df in chunks:
+        cam = df['CameraId'].to_numpy().astype(np.int64)
+        frame = df['FrameId'].to_numpy().astype(np.int64)
+        prevCam = np.r_[cam[0] if lastCam is None else lastCam, cam[:-1]]
+        prevFrame = np.r_[frame[0] if lastFrame is None else lastFrame, frame[:-1]]
+        if not ((cam > prevCam) | ((cam == prevCam) & (frame >= prevFrame))).all():
+            raise ValueError("%s is not sorted by camera and frame, which the streaming evaluation requires; "
+                             "sort it or convert it with mtmc_parquet.py." % fpath)
+        lastCam, lastFrame = cam[-1], frame[-1]
+
+        win = (frame - 1) // window
+        cuts = np.flatnonzero((cam[1:] != cam[:-1]) | (win[1:] != win[:-1])) + 1
+        for start, stop in zip(np.r_[0, cuts], np.r_[cuts, len(df)]):
+            key = (int(cam[start]), int(win[start]))
+            part = df.iloc[start:stop]
+            if pending is not None and pending[0] == key:
+                pending[1].append(part)
+                continue
+            if pending is not None:
+                yield pending[0], pd.concat(pending[1], ignore_index=True)
+            pending = (key, [part])
+    if pending is not None:
+        yield pending[0], pd.concat(pending[1], ignore_index=True)
+
+
+def windowArrays(df):
+    """ Frames, dense ids, distinct ids and boxes of one window (None for no rows). """
+    if df is None:
+        none = np.zeros(0, dtype=np.int64)
+        return none, none, none, np.zeros((0, len(BOX_COLUMNS)))
+    ids, dense = np.unique(df['Id'].to_numpy(), return_inverse=True)
+    return df['FrameId'].to_numpy().astype(np.int64), dense.reshape(-1), ids, sortedBoxes(df, np.arange(len(df)))
+
+
+def streamIdMeasures(gtPath, tsPath, window=1000, chunkRows=STREAM_CHUNK, cameras=None, frame_range=None):
+    """Compute IDF1, IDP and IDR per window of frames and over the whole data, reading the inputs in chunks.
+
+    Both inputs are read in chunks (`iterFileChunks`) and regrouped into
+    windows of `window` frames per camera (`iterWindows`), so only one chunk
+    and one window of each input are in memory at a time. Each window is
+    counted with `idCounts` and scored on its own ID assignment; its overlap
+    counts are added to running totals, from which the global figures are
+    computed at the end with one assignment over the whole data. The global
+    row equals `idMeasuresMtmc` on the same input (for frame ids >= 1).
+
+    Text input must be sorted by camera and then frame, as written by
+    MCVT_data_creation.py since it sorts each camera's rows by frame (older
+    files are written track by track); Parquet data sets written by
+    mtmc_parquet.py are scanned that way whatever the text order was.
+
+    Params
+    ------
+    gtPath, tsPath : str
+        Ground truth and prediction (``.txt`` or Parquet).
+    window : int
+        Frames per window.
+    chunkRows : int
+        Rows read at a time.
+    cameras, frame_range
+        Same selection as in `readData`.
+    Returns
+    -------
+    iterator of (str, dict)
+        ('c<camera>:<first>-<last>', metrics) for every window in camera and
+        frame order, then ('MultiCam', metrics) for the whole data. The window
+        metrics also hold 'CameraId', 'FrameStart' and 'FrameEnd'.
+    """
+    gtWins = iterWindows(iterFileChunks(gtPath, chunkRows, cameras, frame_range), window, gtPath)
+    tsWins = iterWindows(iterFileChunks(tsPath, chunkRows, cameras, frame_range), window, tsPath)
+    g, t = next(gtWins, None), next(tsWins, None)
+    gtCams = set()
+    none = np.zeros(0, dtype=np.int64)
+    pairObj, pairHyp, pairCount = none, none, none
+    totals = np.zeros(5, dtype=np.int64)  # objects, predictions, object frames, hypothesis frames, frames
+
+    while g is not None or t is not None:
+        key = min(x[0] for x in (g, t) if x is not None)
+        gts, ts = None, None
+        if g is not None and g[0] == key:
+            gts, g = g[1], next(gtWins, None)
+            gtCams.add(key[0])
+        if t is not None and t[0] == key:
+            ts, t = removeRepetition(t[1]), next(tsWins, None)
+        if gts is None and key[0] not in gtCams and (g is None or g[0][0] != key[0]):
+            continue  # camera without ground truth, as in `offsetFrames`
+
+        gtFrame, gtObj, objIds, gtBoxes = windowArrays(gts)
+        tsFrame, tsHyp, hypIds, tsBoxes = windowArrays(ts)
+        objFrames, hypFrames, wObj, wHyp, wCount = idCounts(gtFrame, gtObj, gtBoxes, tsFrame, tsHyp, tsBoxes,
+                                                            len(objIds), len(hypIds))
+        counts = np.array([len(gtFrame), len(tsFrame), objFrames.sum(), hypFrames.sum(),
+                           len(np.union1d(gtFrame, tsFrame))])
+        totals += counts
+        metrics = idMetrics(*counts[:4], max_overlap(wObj, wHyp, wCount), counts[4])
+        first = key[1] * window + 1
+        yield 'c%d:%d-%d' % (key[0], first, first + window - 1), \
+            {'CameraId': key[0], 'FrameStart': first, 'FrameEnd': first + window - 1, **metrics}
+
+        # running GT-id x prediction-id overlap counts, one entry per pair
+        pairs, inv = np.unique(np.stack([np.r_[pairObj, objIds[wObj]], np.r_[pairHyp, hypIds[wHyp]]], axis=1),
+                               axis=0, return_inverse=True)
+        pairCount = np.bincount(inv.reshape(-1), weights=np.r_[pairCount, wCount], minlength=len(pairs)).astype(np.int64)
+        pairObj, pairHyp = pairs[:, 0], pairs[:, 1]
+
+    idtpMax = max_overlap(np.unique(pairObj, return_inverse=True)[1].reshape(-1),
+                          np.unique(pairHyp, return_inverse=True)[1].reshape(-1), pairCount)
+    yield 'MultiCam', idMetrics(*totals[:4], idtpMax, totals[4])
+
+
+def evaluatePrediction(test, fpath, name, cameras=None, frame_range=None, id_only=False):
+    """Read one prediction file and evaluate it against the loaded *test* data (batch mode worker).
+
+    Params
+    ------
+    test : pandas.DataFrame
+        Ground truth, as returned by `readData`.
+    fpath : str
+        Prediction file, read with the same camera and frame filters as the ground truth.
+    name : str
+        Index of the returned result row.
+    Returns
+    -------
+    df : pandas.DataFrame
+        One-row result of `eval`.
+    """
+    pred = readData(fpath, workers=1, cameras=cameras, frame_range=frame_range)
+    # the batch already runs one process per prediction
+    summary = eval(test, pred, workers=1, id_only=id_only)
+    summary.index = [name]
+    return summary
 
 
 def usage(msg=None):
@@ -295,22 +878,89 @@ def usage(msg=None):
 
 if __name__ == '__main__':
     args = get_args()
-    if not args.data or len(args.data) < 2:
-        usage("Incorrect number of arguments. Must provide paths for the test (ground truth) and predicitons.")
-    
-    test = readData(args.data[0])
-    print(test)
-    pred = readData(args.data[1])
-    print(pred)
-
-
-    # frame_stats(pred,cam=2)
-    try:
-        summary = eval(test, pred, mread=args.mread, dstype=args.dstype, roidir=args.roidir)
-        print_results(summary, mread=args.mread)
-    except Exception as e:
-        if args.mread:
-            print('{"error": "%s"}' % repr(e))
-        else: 
-            print("Error: %s" % repr(e))
-        traceback.print_exc()
+    with profiling.session('eval_label', args):
+        cache = open_cache(args.result_cache)
+        params = {'iou_distth': IOU_DISTTH, 'cameras': sorted(args.cameras) if args.cameras else None,
+                  'frames': args.frames, 'id_only': args.id_only}
+        if args.manifest:
+            if args.data:
+                usage("--manifest replaces the <ground_truth> <prediction> arguments.")
+            entries = read_manifest(args.manifest)
+            with profiling.phase('batch', rows=len(entries)):
+                summary = run_batch(
+                    entries,
+                    partial(readData, workers=args.workers, cameras=args.cameras, frame_range=args.frames),
+                    partial(evaluatePrediction, cameras=args.cameras, frame_range=args.frames, id_only=args.id_only),
+                    workers=args.workers, cache=cache, cache_spec=('eval_label', EVAL_VERSION, params))
+            print_results(summary, mread=args.mread)
+            if args.output:
+                summary.to_csv(args.output, index_label='name')
+                if not args.mread:
+                    print("✓ Results written to %s" % args.output)
+            sys.exit()
+        if len(args.data) != 2:
+            usage("Incorrect number of arguments. Must provide paths for the test (ground truth) and predicitons.")
+        inputs = {'groundtruth': args.data[0], 'prediction': args.data[1]}
+        if args.window:
+            def printWindow(name, metrics):
+                print("%-20s IDF1 %6.2f  IDP %6.2f  IDR %6.2f" % (
+                    name, metrics['idf1'] * 100, metrics['idp'] * 100, metrics['idr'] * 100), flush=True)
+
+            streamed = []
+
+            def streamWindows():
+                streamed.append(True)
+                rows = {}
+                with profiling.phase('stream'):
+                    for name, metrics in streamIdMeasures(args.data[0], args.data[1], window=args.window,
+                                                          cameras=args.cameras, frame_range=args.frames):
+                        rows[name] = metrics
+                        if not args.mread and name != 'MultiCam':
+                            printWindow(name, metrics)
+                return pd.DataFrame.from_dict(rows, orient='index')
+
+            try:
+                if cache is None:
+                    summary = streamWindows()
+                else:
+                    summary = cache.cached('eval_label', EVAL_VERSION, inputs, dict(params, id_only=True, window=args.window),
+                                           streamWindows, verbose=not args.mread)
+            except Exception as e:
+                print('{"error": "%s"}' % repr(e) if args.mread else "Error: %s" % repr(e))
+                sys.exit(1)
+            if not streamed and not args.mread:
+                for name, metrics in summary.drop(index='MultiCam').iterrows():
+                    printWindow(name, metrics)
+            print_results(summary if args.mread else summary.loc[['MultiCam']], mread=args.mread)
+            if args.output:
+                summary.to_csv(args.output, index_label='name')
+            sys.exit()
+
+        def evaluateInputs():
+            with profiling.phase('parse_gt') as ph:
+                test = readData(args.data[0], workers=args.workers, cameras=args.cameras, frame_range=args.frames)
+                ph.rows = len(test)
+            print(test)
+            with profiling.phase('parse_pred') as ph:
+                pred = readData(args.data[1], workers=args.workers, cameras=args.cameras, frame_range=args.frames)
+                ph.rows = len(pred)
+            print(pred)
+            # frame_stats(pred,cam=2)
+            return eval(test, pred, mread=args.mread, dstype=args.dstype, roidir=args.roidir,
+                        workers=args.workers, id_only=args.id_only)
+
+        try:
+            if cache is None:
+                summary = evaluateInputs()
+            else:
+                summary = cache.cached('eval_label', EVAL_VERSION, inputs, params, evaluateInputs,
+                                       verbose=not args.mread).set_axis(['MultiCam'])
+            print_results(summary, mread=args.mread)
+            if args.output:
+                summary.to_csv(args.output, index_label='name')
+        except Exception as e:
+            if args.mread:
+                print('{"error": "%s"}' % repr(e))
+            else: 
+                print("Error: %s" % repr(e))
+            traceback.print_exc()
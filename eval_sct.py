@@ -7,14 +7,36 @@ Expected input file format (txt):
 
 Usage:
     python eval.py groundtruth.txt testdata.txt
+    python eval.py groundtruth.txt testdata.txt --engine native
+    python eval.py --manifest runs.txt --engine native -o results.csv
+
+The "native" engine (track_metrics.py) reproduces the motmetrics matching and
+metrics on NumPy arrays; its numbers are identical and it is much faster on
+long sequences.
+
+``--manifest`` evaluates many (ground truth, prediction) pairs in one run
+(see batch_eval.py): each ground truth is loaded once, the predictions are
+evaluated in parallel worker processes and the summaries are printed as one
+table, optionally written to CSV with ``-o``.
 """
 
 import sys
 import argparse
+from functools import partial
+
 import numpy as np
 import pandas as pd
 import motmetrics as mm
 
+import track_metrics
+from batch_eval import read_manifest, run_batch
+from result_cache import open_cache
+from track_store import load_track_arrays
+
+EVAL_VERSION = 1
+DISTTH = 0.        # IoU distance threshold of the matching
+
+
 def load_data(filepath):
     """
     Loads tracking data from a text file.
@@ -38,18 +60,20 @@ def load_data(filepath):
         ['X', 'Y', 'Width', 'Height'].
     """
     try:
-        # Read the file; support whitespace or comma as delimiter.
-        df = pd.read_csv(filepath, header=None, 
-                         names=["frame", "track_id", "x1", "y1", "x2", "y2", "cls"],
-                         sep=r'\s+|,', engine='python')
+        # Parse directly (no .trk next to the inputs); supports whitespace or comma as delimiter.
+        arrs = load_track_arrays(filepath, use_store=False)
     except Exception as e:
         sys.exit("Error reading {}: {}".format(filepath, e))
     
     # Compute bounding box in (X, Y, Width, Height) format.
-    df["X"] = df["x1"]
-    df["Y"] = df["y1"]
-    df["Width"] = df["x2"] - df["x1"]
-    df["Height"] = df["y2"] - df["y1"]
+    df = pd.DataFrame({
+        "frame": arrs.frame,
+        "track_id": arrs.track_id,
+        "X": arrs.x1,
+        "Y": arrs.y1,
+        "Width": arrs.x2 - arrs.x1,
+        "Height": arrs.y2 - arrs.y1,
+    })
     
     # Optionally, remove duplicate detections (if any) for the same frame and track id.
     df = df.drop_duplicates(subset=["frame", "track_id"], keep='first')
@@ -60,33 +84,100 @@ def load_data(filepath):
     
     return df[["X", "Y", "Width", "Height"]]
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Evaluate single camera tracking results using motmetrics."
-    )
-    parser.add_argument("prediction", help="Path to prediction txt file")
-    parser.add_argument("groundtruth", help="Path to ground truth txt file")
-    args = parser.parse_args()
-    
+def accumulate(gt, pred):
+    """Match predictions to ground truth frame by frame (IoU distance) into a motmetrics accumulator."""
+    return mm.utils.compare_to_groundtruth(gt, pred, dist='iou', distfields=None, distth=DISTTH)
+
+
+def compute_summary(acc, name="SingleCamera"):
+    """Compute the standard MOTChallenge metrics (MOTA, MOTP, IDF1, ...) of an accumulator."""
+    mh = mm.metrics.create()
+    return mh.compute(acc, metrics=mm.metrics.motchallenge_metrics, name=name)
+
+
+def native_summary(gt, pred, name="SingleCamera", distth=DISTTH):
+    """Same summary as ``compute_summary(accumulate(gt, pred))``, computed by track_metrics."""
+    def columns(df):
+        return df.index.get_level_values(0).to_numpy(), df.index.get_level_values(1).to_numpy(), df.to_numpy()
+
+    events = track_metrics.match_tracks(*columns(gt), *columns(pred), max_dist=distth)
+    metrics = track_metrics.summarize(events)
+    return pd.DataFrame({k: [v] for k, v in metrics.items()}, index=[name])
+
+
+def evaluate_prediction(gt, prediction, name, engine="motmetrics"):
+    """Load one prediction file and summarize it against the loaded *gt* (batch mode worker)."""
+    pred = load_data(prediction)
+    if engine == "native":
+        return native_summary(gt, pred, name=name)
+    return compute_summary(accumulate(gt, pred), name=name)
+
+
+def evaluate_single(args):
+    """Evaluate the prediction/groundtruth pair given on the command line."""
     # Load ground truth and prediction data.
     gt = load_data(args.groundtruth)
     pred = load_data(args.prediction)
     print("Ground truth data:", gt)
     print("Prediction data:", pred)
 
-    # Use motmetrics' utility function to compare to ground truth using IOU.
+    # Compute the standard MOTChallenge metrics (which include measures such as MOTA, MOTP, IDF1, etc.)
     try:
-        acc = mm.utils.compare_to_groundtruth(gt, pred, dist='iou', distfields=None, distth=0.)
+        if args.engine == "native":
+            summary = native_summary(gt, pred)
+        else:
+            # Use motmetrics' utility function to compare to ground truth using IOU.
+            summary = compute_summary(accumulate(gt, pred))
     except Exception as e:
         sys.exit("Error during evaluation: {}".format(e))
-    
-    # Create the metrics handler and compute tracking metrics.
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Evaluate single camera tracking results using motmetrics."
+    )
+    parser.add_argument("prediction", nargs="?", help="Path to prediction txt file")
+    parser.add_argument("groundtruth", nargs="?", help="Path to ground truth txt file")
+    parser.add_argument("--engine", choices=("motmetrics", "native"), default="motmetrics",
+                        help="Metric engine: motmetrics' accumulator or the equivalent vectorized one.")
+    parser.add_argument("--manifest", default=None,
+                        help="Evaluate every '<groundtruth> <prediction> [name]' line of this file instead.")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Worker processes for --manifest (default: all cores).")
+    parser.add_argument("-o", "--output", default=None, help="Also write the summary table to this CSV file.")
+    parser.add_argument("--result-cache", default=None, metavar="DIR",
+                        help="Reuse results of identical inputs and settings stored in this directory (see result_cache.py).")
+    args = parser.parse_args()
     mh = mm.metrics.create()
-    # Here we use the standard MOTChallenge metrics (which include measures such as MOTA, MOTP, IDF1, etc.)
-    summary = mh.compute(acc, metrics=mm.metrics.motchallenge_metrics, name="SingleCamera")
-    
+    cache = open_cache(args.result_cache)
+    # the engines give identical numbers and share cache entries
+    params = {"distth": DISTTH}
+
+    if args.manifest:
+        if args.prediction or args.groundtruth:
+            parser.error("--manifest replaces the prediction and groundtruth arguments")
+        try:
+            entries = read_manifest(args.manifest)
+        except (OSError, ValueError) as e:
+            sys.exit("Error reading {}: {}".format(args.manifest, e))
+        summary = run_batch(entries, load_data, partial(evaluate_prediction, engine=args.engine),
+                            workers=args.workers, cache=cache, cache_spec=("eval_sct", EVAL_VERSION, params))
+    else:
+        if not (args.prediction and args.groundtruth):
+            parser.error("the prediction and groundtruth arguments (or --manifest) are required")
+        if cache is None:
+            summary = evaluate_single(args)
+        else:
+            summary = cache.cached("eval_sct", EVAL_VERSION,
+                                   {"groundtruth": args.groundtruth, "prediction": args.prediction}, params,
+                                   lambda: evaluate_single(args)).set_axis(["SingleCamera"])
+
     # Render the results as a human-readable summary.
     print(mm.io.render_summary(summary, formatters=mh.formatters, namemap=mm.io.motchallenge_metric_names))
+    if args.output:
+        summary.to_csv(args.output, index_label="name")
+        print("✓ Summary written to {}".format(args.output))
 
     
 if __name__ == '__main__':
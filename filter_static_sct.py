@@ -7,17 +7,30 @@ Input format per line (whitespace separated):
 
 Example:
 1 1 297.8 1115.7 883.5 1558.5
+
+With --stream --max_gap N a frame-sorted file is filtered in one pass: the
+statistics are kept per open track in constant memory and its lines are held
+until it is settled, when it has not been seen for more than N frames or
+as soon as it moved too far or changed size too much to be static. Lines
+are written grouped track by track as they are settled instead of in input
+order. A track id that comes back after more than N frames is judged segment
+by segment, so a static segment is dropped even when the id moves elsewhere,
+where the default mode judges all detections of the id together; otherwise
+the output holds the same lines as the default mode.
 """
 
 from __future__ import annotations
 
 import argparse
+import math
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 
+from track_store import TrackArrays, load_track_arrays
+
 
 @dataclass
 class TrackStats:
@@ -30,38 +43,20 @@ class TrackStats:
     max_size_change_ratio: float  # max(|w-w0|/w0, |h-h0|/h0) over time
 
 
-def read_tracks(path: Path) -> Dict[int, List[Tuple[int, float, float, float, float]]]:
+def read_tracks(path: Path) -> TrackArrays:
     """
-    Returns dict: track_id -> list of (frame_id, x1, y1, x2, y2)
+    Returns the track file as column arrays grouped by track_id and sorted by
+    frame_id (read through the cached columnar store, see track_store.py).
     """
-    tracks: Dict[int, List[Tuple[int, float, float, float, float]]] = {}
-    with path.open("r", encoding="utf-8") as f:
-        for ln, line in enumerate(f, 1):
-            s = line.strip()
-            if not s or s.startswith("#"):
-                continue
-            parts = s.split()
-            if len(parts) < 6:
-                raise ValueError(f"Line {ln}: expected 6 columns, got {len(parts)}: {s}")
-            frame_id = int(float(parts[0]))
-            track_id = int(float(parts[1]))
-            x1, y1, x2, y2 = map(float, parts[2:6])
-            tracks.setdefault(track_id, []).append((frame_id, x1, y1, x2, y2))
-    # sort each track by frame_id
-    for tid in tracks:
-        tracks[tid].sort(key=lambda t: t[0])
-    return tracks
-
-
-def compute_stats(
-    tid: int,
-    dets: List[Tuple[int, float, float, float, float]],
-) -> TrackStats:
-    frames = np.array([d[0] for d in dets], dtype=np.int64)
-    x1 = np.array([d[1] for d in dets], dtype=np.float64)
-    y1 = np.array([d[2] for d in dets], dtype=np.float64)
-    x2 = np.array([d[3] for d in dets], dtype=np.float64)
-    y2 = np.array([d[4] for d in dets], dtype=np.float64)
+    return load_track_arrays(str(path))
+
+
+def compute_stats(tid: int, arrs: TrackArrays, sl: slice) -> TrackStats:
+    frames = arrs.frame[sl]
+    x1 = arrs.x1[sl]
+    y1 = arrs.y1[sl]
+    x2 = arrs.x2[sl]
+    y2 = arrs.y2[sl]
 
     cx = 0.5 * (x1 + x2)
     cy = 0.5 * (y1 + y2)
@@ -95,7 +90,7 @@ def compute_stats(
 
     return TrackStats(
         track_id=tid,
-        n=int(len(dets)),
+        n=int(len(frames)),
         frames_span=frames_span,
         max_center_disp=max_center_disp,
         mean_center_step=mean_center_step,
@@ -104,8 +99,148 @@ def compute_stats(
     )
 
 
+class RunningStats:
+    """
+    compute_stats for a track whose detections arrive one by one, in O(1)
+    memory. The mean step and center spread are accumulated (running sum,
+    Welford's variance), so they can differ from compute_stats in the last
+    bits; the other statistics are the same.
+    """
+
+    __slots__ = ("first_frame", "last_frame", "n", "cx0", "cy0", "w0", "h0", "cx", "cy",
+                 "max_center_disp", "step_sum", "mean_x", "mean_y", "m2", "max_size_change_ratio", "moving")
+
+    def __init__(self, frame: int, x1: float, y1: float, x2: float, y2: float):
+        self.first_frame = self.last_frame = frame
+        self.n = 1
+        self.cx0 = self.cx = self.mean_x = 0.5 * (x1 + x2)
+        self.cy0 = self.cy = self.mean_y = 0.5 * (y1 + y2)
+        self.w0 = max(x2 - x1, 1e-6)
+        self.h0 = max(y2 - y1, 1e-6)
+        self.max_center_disp = 0.0
+        self.step_sum = 0.0
+        self.m2 = 0.0                    # sum of squared deviations of cx and cy
+        self.max_size_change_ratio = 0.0
+        self.moving = False              # settled as non-static, only n and frames are kept up
+
+    def add(self, frame: int, x1: float, y1: float, x2: float, y2: float) -> None:
+        self.last_frame = frame
+        self.n += 1
+        if self.moving:
+            return
+        cx = 0.5 * (x1 + x2)
+        cy = 0.5 * (y1 + y2)
+        dx0, dy0 = cx - self.cx0, cy - self.cy0
+        self.max_center_disp = max(self.max_center_disp, math.sqrt(dx0 * dx0 + dy0 * dy0))
+        dcx, dcy = cx - self.cx, cy - self.cy
+        self.step_sum += math.sqrt(dcx * dcx + dcy * dcy)
+        self.cx, self.cy = cx, cy
+        dx, dy = cx - self.mean_x, cy - self.mean_y
+        self.mean_x += dx / self.n
+        self.mean_y += dy / self.n
+        self.m2 += dx * (cx - self.mean_x) + dy * (cy - self.mean_y)
+        w = max(x2 - x1, 1e-6)
+        h = max(y2 - y1, 1e-6)
+        ratio = max(abs(w - self.w0) / self.w0, abs(h - self.h0) / self.h0)
+        self.max_size_change_ratio = max(self.max_size_change_ratio, ratio)
+
+    def stats(self, tid: int) -> TrackStats:
+        return TrackStats(
+            track_id=tid,
+            n=self.n,
+            frames_span=self.last_frame - self.first_frame + 1,
+            max_center_disp=self.max_center_disp,
+            mean_center_step=self.step_sum / (self.n - 1) if self.n >= 2 else 0.0,
+            std_center=math.sqrt(self.m2 / self.n),
+            max_size_change_ratio=self.max_size_change_ratio,
+        )
+
+
+def stream_filter(
+    in_file: Path,
+    out_file: Optional[Path],
+    max_gap: int,
+    check: Callable[[Optional[TrackStats]], bool],
+    max_disp_px: float = math.inf,
+    max_size_change_ratio: float = math.inf,
+) -> Tuple[int, List[TrackStats]]:
+    """
+    Filter a frame-sorted track file in one pass, in memory proportional to
+    the open tracks. A track is closed after more than max_gap frames without
+    a detection (a track id that comes back later starts a new track) and
+    judged with check(stats): the buffered lines of a static track are
+    dropped, those of the others written.
+    max_center_disp and max_size_change_ratio only grow, so a track that
+    exceeds max_disp_px or max_size_change_ratio cannot be static any more:
+    it is settled at once, its lines so far are written and the later ones
+    copied as they come (check then gets stats None).
+    Lines are therefore written track by track as they are settled, not in
+    input order. Comment and short lines are copied at once.
+    Returns the number of distinct track ids and the stats of the static
+    tracks (one entry per static segment of an id).
+    """
+    open_tracks: Dict[int, RunningStats] = {}
+    buffers: Dict[int, Optional[List[str]]] = {}   # None once the track is settled as moving
+    static: List[TrackStats] = []
+    seen_ids = set()
+    current = None
+    out = out_file.open("w", encoding="utf-8") if out_file is not None else None
+    write = out.write if out is not None else (lambda text: None)
+
+    def close(tid: int) -> None:
+        st = open_tracks.pop(tid)
+        lines = buffers.pop(tid)
+        stats = None if st.moving else st.stats(tid)
+        if check(stats):
+            static.append(stats)
+        elif lines:
+            write("".join(lines))
+
+    try:
+        with in_file.open("r", encoding="utf-8") as fin:
+            for line in fin:
+                parts = line.split("#", 1)[0].replace(",", " ").split()
+                if len(parts) < 6:
+                    write(line)
+                    continue
+                if not line.endswith("\n"):
+                    line += "\n"
+                frame, tid = int(float(parts[0])), int(float(parts[1]))
+                x1, y1, x2, y2 = (float(v) for v in parts[2:6])
+                if frame != current:
+                    if current is not None and frame < current:
+                        raise ValueError(f"--stream needs a file sorted by frame, got frame {frame} after {current}")
+                    current = frame
+                    for done in [t for t, st in open_tracks.items() if frame - st.last_frame > max_gap]:
+                        close(done)
+                st = open_tracks.get(tid)
+                if st is None:
+                    open_tracks[tid] = RunningStats(frame, x1, y1, x2, y2)
+                    buffers[tid] = [line] if out is not None else []
+                    seen_ids.add(tid)
+                    continue
+                st.add(frame, x1, y1, x2, y2)
+                lines = buffers[tid]
+                if lines is None:
+                    write(line)
+                    continue
+                if out is not None:
+                    lines.append(line)
+                if not st.moving and (st.max_center_disp > max_disp_px
+                                      or st.max_size_change_ratio > max_size_change_ratio):
+                    st.moving = True
+                    write("".join(lines))
+                    buffers[tid] = None
+        for tid in list(open_tracks):
+            close(tid)
+    finally:
+        if out is not None:
+            out.close()
+    return len(seen_ids), static
+
+
 def is_static(
-    st: TrackStats,
+    st: Optional[TrackStats],
     min_len: int,
     max_disp_px: float,
     max_mean_step_px: float,
@@ -119,8 +254,9 @@ def is_static(
     - and typical step is small: mean_center_step <= max_mean_step_px
     - and center spread small: std_center <= max_std_center_px
     - and bbox size stable: max_size_change_ratio <= max_size_change_ratio
+    st is None for tracks stream_filter already found to be moving.
     """
-    if st.n < min_len:
+    if st is None or st.n < min_len:
         return False
     return (
         st.max_center_disp <= max_disp_px
@@ -155,18 +291,23 @@ def main():
         default=30,
         help="Print details for up to top-k static tracks (sorted by n desc)",
     )
+    ap.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read a frame-sorted input in one pass, keeping only the open tracks in memory (needs --max_gap)",
+    )
+    ap.add_argument(
+        "--max_gap",
+        type=int,
+        default=None,
+        help="With --stream, close a track after this many frames without a detection",
+    )
     args = ap.parse_args()
+    if args.stream and args.max_gap is None:
+        ap.error("--stream needs --max_gap")
 
-    tracks = read_tracks(args.in_file)
-
-    stats: List[TrackStats] = []
-    for tid, dets in tracks.items():
-        stats.append(compute_stats(tid, dets))
-
-    static_ids = [
-        st.track_id
-        for st in stats
-        if is_static(
+    def check(st: Optional[TrackStats]) -> bool:
+        return is_static(
             st,
             min_len=args.min_len,
             max_disp_px=args.max_disp_px,
@@ -174,15 +315,29 @@ def main():
             max_std_center_px=args.max_std_center_px,
             max_size_change_ratio=args.max_size_change_ratio,
         )
-    ]
-    static_ids_set = set(static_ids)
+
+    if args.stream:
+        # Lines are written while the file is read; only the static tracks' stats are kept.
+        n_tracks, static_stats = stream_filter(args.in_file, args.out_file, args.max_gap, check,
+                                               args.max_disp_px, args.max_size_change_ratio)
+        static_ids = sorted({st.track_id for st in static_stats})
+    else:
+        tracks = read_tracks(args.in_file)
+
+        stats: List[TrackStats] = []
+        for tid, sl in tracks.iter_tracks():
+            stats.append(compute_stats(tid, tracks, sl))
+        n_tracks = len(stats)
+
+        static_ids = [st.track_id for st in stats if check(st)]
+        static_ids_set = set(static_ids)
+        static_stats = [st for st in stats if st.track_id in static_ids_set]
 
     # Report
-    static_stats = [st for st in stats if st.track_id in static_ids_set]
     static_stats.sort(key=lambda s: (-s.n, s.max_center_disp))
 
-    print(f"Total tracks: {len(stats)}")
-    print(f"Static tracks: {len(static_stats)}")
+    print(f"Total tracks: {n_tracks}")
+    print(f"Static tracks: {len(static_ids)}")
     print("Static track IDs:", static_ids)
 
     if static_stats:
@@ -195,7 +350,7 @@ def main():
             )
 
     # Optionally write filtered file
-    if args.out_file is not None:
+    if args.out_file is not None and not args.stream:
         with args.in_file.open("r", encoding="utf-8") as fin, args.out_file.open("w", encoding="utf-8") as fout:
             for line in fin:
                 s = line.strip()
@@ -210,6 +365,7 @@ def main():
                 if tid in static_ids_set:
                     continue
                 fout.write(line)
+    if args.out_file is not None:
         print(f"\nWrote filtered file (static removed): {args.out_file}")
 
 
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+label_pack.py
+─────────────
+
+Pack a directory of per-frame label files (``imgNNNNNN.txt``, one file per
+frame as in ``labels_xy_v11``, ``labels_corrected_final``, ``labels_filtered``)
+into a single archive with a frame → offset index, and read either form
+through the same API.
+
+Archive layout
+==============
+``MAGIC`` (8 bytes) | index length (uint64, little endian) | JSON index |
+concatenated label file contents.
+
+The JSON index holds the frame names (file stems, sorted) with the byte
+offset and length of each frame's text inside the data block. The text is
+stored verbatim, so unpacking gives back byte-identical files.
+
+Usage
+-----
+```bash
+python label_pack.py pack   .../imagesc001/labels_filtered          # -> labels_filtered.lblpack
+python label_pack.py unpack .../imagesc001/labels_filtered.lblpack out_dir/
+python label_pack.py ls     .../imagesc001/labels_filtered.lblpack
+```
+Readers call ``open_labels(path)``; *path* may be a label directory or an
+archive, and a directory path that does not exist falls back to
+``<path>.lblpack``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import os
+import tempfile
+from typing import Dict, Iterator, List, Tuple, Union
+
+import numpy as np
+
+MAGIC = b"MCTLBL01"
+PACK_SUFFIX = ".lblpack"
+LABEL_SUFFIX = ".txt"
+PACK_VERSION = 1
+
+
+class LabelDir:
+    """Per-frame label files in a plain directory."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._names = sorted(f[:-len(LABEL_SUFFIX)] for f in os.listdir(path) if f.endswith(LABEL_SUFFIX))
+
+    def names(self) -> List[str]:
+        """Frame names (file stems such as ``img000123``), sorted."""
+        return self._names
+
+    def __contains__(self, name: str) -> bool:
+        return os.path.isfile(os.path.join(self.path, name + LABEL_SUFFIX))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def read_text(self, name: str) -> str:
+        """Content of frame *name*, or ``""`` if it has no label file."""
+        fpath = os.path.join(self.path, name + LABEL_SUFFIX)
+        if not os.path.exists(fpath):
+            return ""
+        with open(fpath, "r") as f:
+            return f.read()
+
+    def iter_frames(self) -> Iterator[Tuple[str, str]]:
+        """Yield ``(name, text)`` for every frame in name order."""
+        for name in self._names:
+            yield name, self.read_text(name)
+
+    def close(self) -> None:
+        pass
+
+
+class LabelArchive:
+    """Per-frame labels packed into one file (see module docstring)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as fh:
+            prefix = fh.read(len(MAGIC) + 8)
+            if len(prefix) < len(MAGIC) + 8 or prefix[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path} is not a label archive.")
+            n = int(np.frombuffer(prefix[len(MAGIC):], dtype="<u8")[0])
+            index = json.loads(fh.read(n))
+            if index.get("version") != PACK_VERSION:
+                raise ValueError(f"{path}: unsupported label archive version {index.get('version')}.")
+            self._data_start = len(MAGIC) + 8 + n
+            size = os.fstat(fh.fileno()).st_size
+            self._buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._names: List[str] = index["names"]
+        self._offsets: List[int] = index["offsets"]
+        self._lengths: List[int] = index["lengths"]
+        self._pos: Dict[str, int] = {name: i for i, name in enumerate(self._names)}
+
+    def names(self) -> List[str]:
+        return self._names
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._pos
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def read_text(self, name: str) -> str:
+        i = self._pos.get(name)
+        if i is None:
+            return ""
+        start = self._data_start + self._offsets[i]
+        return self._buf[start:start + self._lengths[i]].decode()
+
+    def iter_frames(self) -> Iterator[Tuple[str, str]]:
+        """Yield ``(name, text)`` in name order with one sequential pass over the data."""
+        end = self._data_start + (self._offsets[-1] + self._lengths[-1] if self._names else 0)
+        data = self._buf[self._data_start:end]
+        for name, off, ln in zip(self._names, self._offsets, self._lengths):
+            yield name, data[off:off + ln].decode()
+
+    def close(self) -> None:
+        if isinstance(self._buf, mmap.mmap):
+            self._buf.close()
+
+
+LabelSource = Union[LabelDir, LabelArchive]
+
+
+def open_labels(path: str) -> LabelSource:
+    """Open a label directory or archive.
+
+    A directory path that does not exist is looked up as ``<path>.lblpack``.
+    """
+    path = path.rstrip("/\\") if len(path) > 1 else path
+    if os.path.isdir(path):
+        return LabelDir(path)
+    if os.path.isfile(path):
+        return LabelArchive(path)
+    if os.path.isfile(path + PACK_SUFFIX):
+        return LabelArchive(path + PACK_SUFFIX)
+    raise FileNotFoundError(f"No label directory or archive at {path}")
+
+
+def pack(label_dir: str, out_path: str) -> int:
+    """Pack every ``*.txt`` in *label_dir* into *out_path*; returns the frame count."""
+    src = LabelDir(label_dir)
+    names, offsets, lengths, chunks, pos = [], [], [], [], 0
+    for name in src.names():
+        with open(os.path.join(label_dir, name + LABEL_SUFFIX), "rb") as f:
+            raw = f.read()
+        names.append(name)
+        offsets.append(pos)
+        lengths.append(len(raw))
+        chunks.append(raw)
+        pos += len(raw)
+    index = json.dumps({"version": PACK_VERSION, "names": names, "offsets": offsets, "lengths": lengths}).encode()
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(out_path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(MAGIC + np.uint64(len(index)).tobytes() + index)
+            fh.writelines(chunks)
+        os.replace(tmp, out_path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return len(names)
+
+
+def unpack(archive_path: str, out_dir: str) -> int:
+    """Write every frame of an archive back to ``out_dir/<name>.txt``."""
+    src = LabelArchive(archive_path)
+    os.makedirs(out_dir, exist_ok=True)
+    n = 0
+    for name, text in src.iter_frames():
+        with open(os.path.join(out_dir, name + LABEL_SUFFIX), "w") as f:
+            f.write(text)
+        n += 1
+    src.close()
+    return n
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Pack/unpack per-frame label directories.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("pack", help="Pack a label directory into one archive.")
+    p.add_argument("label_dir")
+    p.add_argument("-o", "--output", default=None, help="Archive path (default: <label_dir>.lblpack).")
+    u = sub.add_parser("unpack", help="Unpack an archive into a directory.")
+    u.add_argument("archive")
+    u.add_argument("out_dir")
+    ls = sub.add_parser("ls", help="List the frames in an archive or directory.")
+    ls.add_argument("path")
+    args = ap.parse_args()
+
+    if args.cmd == "pack":
+        out = args.output or args.label_dir.rstrip("/\\") + PACK_SUFFIX
+        n = pack(args.label_dir, out)
+        print(f"✓ Packed {n} frames into {out}")
+    elif args.cmd == "unpack":
+        n = unpack(args.archive, args.out_dir)
+        print(f"✓ Unpacked {n} frames into {args.out_dir}")
+    else:
+        src = open_labels(args.path)
+        for name in src.names():
+            print(name)
+        print(f"{len(src)} frames")
+
+
+if __name__ == "__main__":
+    main()
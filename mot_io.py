@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+mot_io.py
+─────────
+
+Bulk readers for MOT-style text files (``frame track_id x1 y1 x2 y2 [cls]``).
+
+The whole file is parsed in one ``pandas.read_csv`` call on the C engine
+and returned as NumPy column arrays, instead of ``str.split`` + ``float()``
+per line. The tolerance of the old per-line loaders is kept:
+
+* blank lines and ``#`` comments are skipped,
+* lines with fewer than ``min_cols`` fields are dropped, extra fields ignored,
+* ids written as floats (``12.0``) are accepted,
+* whitespace- or comma-separated files both work (the delimiter is sniffed).
+
+Files with mixed delimiters, or that the C engine cannot tokenize, fall back
+to a per-line Python parser with the same rules.
+
+Writing goes through `write_rows`: whole column blocks are formatted with a
+single ``%`` operation per chunk, written to a temporary file next to the
+target and atomically renamed, so an interrupted run never leaves a
+half-written output behind. Paths ending in ``.gz`` are gzip-compressed.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import os
+import re
+import tempfile
+from contextlib import contextmanager
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+MOT_COLUMNS: Tuple[str, ...] = ("frame", "track_id", "x1", "y1", "x2", "y2", "cls")
+
+MIXED = "mixed"                    # sniff result for lines mixing commas and whitespace
+
+MOT_FORMATS: Tuple[str, ...] = ("%d", "%d", "%.2f", "%.2f", "%.2f", "%.2f", "%d")
+# cam id frame x y w h xworld yworld (camera and id are written as given)
+MTMC_FORMATS: Tuple[str, ...] = ("%s", "%s", "%d", "%.2f", "%.2f", "%.2f", "%.2f", "%d", "%d")
+
+_SNIFF_LINES = 20
+_WRITE_CHUNK = 1 << 16
+_READ_CHUNK = 1 << 16
+_COMMA = re.compile(r"\s*,\s*")
+
+
+def _open_binary(path):
+    """Open a text file for binary reading, through gzip for ``.gz`` paths."""
+    return gzip.open(path, "rb") if os.fsdecode(path).endswith(".gz") else open(path, "rb")
+
+
+def sniff_delimiter(fh_or_path, n_lines: int = _SNIFF_LINES) -> Optional[str]:
+    """Guess the field separator from the first data lines.
+
+    Returns ``","`` for comma-separated data (spaces around commas are
+    allowed), ``None`` for whitespace (spaces and/or tabs) and ``MIXED`` when
+    fields are separated by both. A file handle is rewound after sniffing.
+    """
+    if isinstance(fh_or_path, (str, bytes)) or hasattr(fh_or_path, "__fspath__"):
+        with _open_binary(fh_or_path) as fh:
+            head = [fh.readline() for _ in range(n_lines * 4)]
+    else:
+        pos = fh_or_path.tell()
+        head = [fh_or_path.readline() for _ in range(n_lines * 4)]
+        fh_or_path.seek(pos)
+
+    lines = []
+    for ln in head:
+        if isinstance(ln, bytes):
+            ln = ln.decode(errors="replace")
+        ln = ln.strip()
+        if ln and not ln.startswith("#"):
+            lines.append(ln)
+        if len(lines) == n_lines:
+            break
+    if not any("," in ln for ln in lines):
+        return None
+    if any(re.search(r"\s", field) for ln in lines for field in _COMMA.split(ln)):
+        return MIXED
+    return ","
+
+
+def _read_csv_c(source, sep: Optional[str], n_cols: int, chunksize: Optional[int] = None) -> pd.DataFrame:
+    return pd.read_csv(
+        source,
+        sep=sep if sep is not None else r"\s+",
+        skipinitialspace=sep is not None,
+        header=None,
+        names=range(n_cols),
+        usecols=range(n_cols),
+        comment="#",
+        skip_blank_lines=True,
+        dtype=np.float64,
+        engine="c",
+        chunksize=chunksize,
+    )
+
+
+def _read_python(source, n_cols: int) -> np.ndarray:
+    """Per-line fallback with the same tolerance as the C path."""
+    rows = []
+    for ln in source:
+        if isinstance(ln, bytes):
+            ln = ln.decode()
+        ln = ln.split("#", 1)[0]
+        parts = ln.replace(",", " ").split()
+        if not parts:
+            continue
+        vals = [float(p) for p in parts[:n_cols]]
+        rows.append(vals + [np.nan] * (n_cols - len(vals)))
+    return np.array(rows, dtype=np.float64).reshape(-1, n_cols)
+
+
+def _to_columns(data: np.ndarray, names: Sequence[str], min_cols: int) -> Dict[str, np.ndarray]:
+    """Drop rows missing one of the first *min_cols* fields and split *data* into named columns."""
+    keep = ~np.isnan(data[:, :min_cols]).any(axis=1)
+    if not keep.all():
+        data = data[keep]
+    return {name: data[:, i] for i, name in enumerate(names)}
+
+
+def read_mot_columns(
+    path,
+    names: Sequence[str] = MOT_COLUMNS,
+    min_cols: int = 6,
+) -> Dict[str, np.ndarray]:
+    """Read a MOT text file into float64 column arrays in a single call.
+
+    Params
+    ------
+    path : str or file handle
+        Text file to read.
+    names : sequence of str
+        Names of the leading columns to keep; further fields are ignored.
+    min_cols : int
+        Rows with fewer fields are dropped. Optional trailing columns of
+        shorter rows are ``NaN``.
+    Returns
+    -------
+    dict
+        ``{name: np.ndarray}`` in file order.
+    """
+    n_cols = len(names)
+    seekable = not hasattr(path, "read") or path.seekable()
+    if not seekable:
+        path = io.BytesIO(path.read())
+    sep = sniff_delimiter(path)
+    try:
+        if sep == MIXED:
+            raise ValueError("mixed delimiters")
+        data = _read_csv_c(path, sep, n_cols).to_numpy(dtype=np.float64)
+    except (ValueError, pd.errors.ParserError):
+        if hasattr(path, "seek"):
+            path.seek(0)
+            data = _read_python(path, n_cols)
+        else:
+            with _open_binary(path) as fh:
+                data = _read_python(fh, n_cols)
+
+    return _to_columns(data, names, min_cols)
+
+
+def iter_mot_columns(
+    path,
+    names: Sequence[str] = MOT_COLUMNS,
+    min_cols: int = 6,
+    chunk_rows: int = _READ_CHUNK,
+) -> Iterator[Dict[str, np.ndarray]]:
+    """Like `read_mot_columns`, but yield the columns in chunks of at most *chunk_rows* rows.
+
+    Chunks follow the file order, so a file of any length is read in bounded
+    memory. When the C parser gives up part-way, the rest of the file is read
+    by the per-line fallback, skipping the rows already yielded.
+    """
+    n_cols = len(names)
+    sep = sniff_delimiter(path)
+    done = 0
+    if sep != MIXED:
+        try:
+            with _open_binary(path) as fh:
+                for df in _read_csv_c(fh, sep, n_cols, chunksize=chunk_rows):
+                    data = df.to_numpy(dtype=np.float64)
+                    done += len(data)
+                    yield _to_columns(data, names, min_cols)
+            return
+        except (ValueError, pd.errors.ParserError):
+            pass
+
+    with _open_binary(path) as fh:
+        while True:
+            block = list(islice(fh, chunk_rows))
+            if not block:
+                return
+            data = _read_python(block, n_cols)
+            if done:
+                skip = min(done, len(data))
+                data, done = data[skip:], done - skip
+            if len(data):
+                yield _to_columns(data, names, min_cols)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Writing
+# ────────────────────────────────────────────────────────────────────────────────
+
+def iter_formatted(columns: Sequence[Sequence], fmts: Sequence[str], chunk: int = _WRITE_CHUNK) -> Iterator[str]:
+    """Yield the text of *columns* (equal-length arrays or lists) in chunks.
+
+    Each chunk is formatted by one ``(line_template * n) % values`` call, so
+    the per-row cost is only the C-level number formatting.
+    """
+    if len(columns) != len(fmts):
+        raise ValueError(f"{len(columns)} columns but {len(fmts)} formats")
+    n = len(columns[0]) if columns else 0
+    line = " ".join(fmts) + "\n"
+    for start in range(0, n, chunk):
+        block = [c[start:start + chunk] for c in columns]
+        block = [b.tolist() if isinstance(b, np.ndarray) else b for b in block]
+        yield (line * len(block[0])) % tuple(chain.from_iterable(zip(*block)))
+
+
+def iter_formatted_records(records: Iterable[Sequence], fmts: Sequence[str], chunk: int = _WRITE_CHUNK) -> Iterator[str]:
+    """Like `iter_formatted` for an iterable of row tuples."""
+    line = " ".join(fmts) + "\n"
+    it = iter(records)
+    while True:
+        block = list(islice(it, chunk))
+        if not block:
+            return
+        yield (line * len(block)) % tuple(chain.from_iterable(block))
+
+
+@contextmanager
+def atomic_open(path: str, compress: Optional[bool] = None):
+    """Open *path* for text writing through a temporary file that replaces it on success.
+
+    The temporary file lives in the target directory, so the final
+    ``os.replace`` is atomic; on any error it is removed and an existing
+    *path* is left untouched. *compress* defaults to gzip for ``.gz`` paths.
+    """
+    if compress is None:
+        compress = str(path).endswith(".gz")
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            if compress:
+                with gzip.open(raw, "wt", newline="") as fh:
+                    yield fh
+            else:
+                with io.TextIOWrapper(raw, newline="") as fh:
+                    yield fh
+        os.chmod(tmp, 0o666 & ~_umask())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def _umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+def write_rows(
+    path: str,
+    columns: Sequence[Sequence],
+    fmts: Sequence[str] = MOT_FORMATS,
+    compress: Optional[bool] = None,
+) -> int:
+    """Atomically write *columns* as space-separated text; returns the row count.
+
+    Params
+    ------
+    path : str
+        Output file; ``.gz`` paths are gzip-compressed unless *compress* says otherwise.
+    columns : sequence of arrays or lists
+        Equal-length columns, one per entry of *fmts*.
+    fmts : sequence of str
+        ``%``-style format of each column (default: ``frame id x1 y1 x2 y2 cls``).
+    """
+    with atomic_open(path, compress=compress) as fh:
+        for text in iter_formatted(columns, fmts):
+            fh.write(text)
+    return len(columns[0]) if columns else 0
+
+
+def write_records(
+    path: str,
+    records: Iterable[Sequence],
+    fmts: Sequence[str] = MOT_FORMATS,
+    compress: Optional[bool] = None,
+) -> None:
+    """Atomically write row tuples (e.g. ``(frame, tid, x1, y1, x2, y2, cls)``)."""
+    with atomic_open(path, compress=compress) as fh:
+        for text in iter_formatted_records(records, fmts):
+            fh.write(text)
+
+
+def mtmc_gt_columns(cam, obj_id, frame, x1, y1, x2, y2) -> List[Sequence]:
+    """Columns for `MTMC_FORMATS` from corner boxes.
+
+    *cam* and *obj_id* may be scalars (repeated on every row) or per-row
+    sequences; width/height are ``x2 - x1``/``y2 - y1`` and xworld/yworld -1.
+    """
+    x1, y1 = np.asarray(x1, dtype=np.float64), np.asarray(y1, dtype=np.float64)
+    x2, y2 = np.asarray(x2, dtype=np.float64), np.asarray(y2, dtype=np.float64)
+    n = len(x1)
+
+    def per_row(v):
+        return v if isinstance(v, (list, tuple, np.ndarray)) else [v] * n
+
+    minus_one = [-1] * n
+    return [per_row(cam), per_row(obj_id), frame, x1, y1, x2 - x1, y2 - y1, minus_one, minus_one]
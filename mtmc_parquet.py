@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+mtmc_parquet.py
+───────────────
+
+Optional Parquet storage for the multi-camera ground truth
+(``{cam} {id} {frame} {x1} {y1} {w} {h} {xworld} {yworld}``).
+
+The data set is written as a directory partitioned by camera
+(``CameraId=1/…parquet``), so readers can push camera and frame-range
+filters down to the file scan and only touch the row groups they need.
+Requires ``pyarrow`` (``pip install pyarrow``); the text format keeps working
+without it.
+
+Usage
+-----
+```bash
+python mtmc_parquet.py Multi_CAM_Ground_Turth.txt Multi_CAM_Ground_Truth.parquet
+```
+```python
+from mtmc_parquet import read_mtmc_parquet
+df = read_mtmc_parquet("Multi_CAM_Ground_Truth.parquet", cameras=[2], frame_range=(1000, 2000))
+for chunk in iter_mtmc_parquet("Multi_CAM_Ground_Truth.parquet", batch_rows=1 << 18):
+    ...                                 # camera by camera, in frame order
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import glob
+import os
+import shutil
+import tempfile
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+MTMC_COLUMNS: List[str] = ['CameraId', 'Id', 'FrameId', 'X', 'Y', 'Width', 'Height', 'Xworld', 'Yworld']
+INT_COLUMNS = ('CameraId', 'Id', 'FrameId')
+FLOAT32_COLUMNS = ('Xworld', 'Yworld')  # boxes stay float64, as in eval_label
+PARQUET_SUFFIX = ".parquet"
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError("Parquet support needs pyarrow: pip install pyarrow") from e
+    return pa, ds
+
+
+def is_parquet(path: str) -> bool:
+    """Whether *path* is a Parquet file or a Parquet directory.
+
+    A directory counts when it holds ``CameraId=N`` partitions, as written by
+    `write_mtmc_parquet`, or ``*.parquet`` files.
+    """
+    if os.path.isdir(path):
+        return bool(glob.glob(os.path.join(glob.escape(path), 'CameraId=*'))
+                    or glob.glob(os.path.join(glob.escape(path), '*' + PARQUET_SUFFIX)))
+    return path.lower().endswith(PARQUET_SUFFIX)
+
+
+def _partitioning():
+    pa, ds = _pyarrow()
+    return ds.partitioning(pa.schema([('CameraId', pa.int32())]), flavor="hive")
+
+
+def write_mtmc_parquet(df: pd.DataFrame, out_dir: str) -> None:
+    """Write an MTMC data frame as a Parquet data set partitioned by ``CameraId``.
+
+    Rows are sorted by frame inside each camera so frame-range filters can
+    skip whole row groups using the Parquet statistics. The data set is
+    written to a temporary directory next to *out_dir* and renamed into place,
+    so an existing *out_dir* is replaced as a whole (no stale camera
+    partitions) and left untouched if writing fails.
+    """
+    pa, ds = _pyarrow()
+    df = df[MTMC_COLUMNS].astype({c: (np.int32 if c in INT_COLUMNS else np.float32 if c in FLOAT32_COLUMNS else np.float64)
+                                  for c in MTMC_COLUMNS})
+    df = df.sort_values(['CameraId', 'FrameId', 'Id'], kind='stable')
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    out_dir = os.path.abspath(out_dir)
+    parent, name = os.path.split(out_dir)
+    tmp = os.path.join(parent, f".{name}.{os.getpid()}.tmp")   # created by write_dataset with the default mode
+    shutil.rmtree(tmp, ignore_errors=True)
+    try:
+        ds.write_dataset(
+            table,
+            tmp,
+            format="parquet",
+            partitioning=_partitioning(),
+            existing_data_behavior="overwrite_or_ignore",
+            max_rows_per_group=1 << 16,
+        )
+        if os.path.exists(out_dir):
+            old = tempfile.mkdtemp(dir=parent, prefix=f".{name}.", suffix=".old")
+            os.replace(out_dir, os.path.join(old, name))
+            os.replace(tmp, out_dir)
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.replace(tmp, out_dir)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def mtmc_filter(cameras: Optional[Iterable[int]] = None, frame_range: Optional[Sequence[int]] = None):
+    """Build a pyarrow filter expression for cameras and an inclusive frame range."""
+    _, ds = _pyarrow()
+    expr = None
+    if cameras is not None:
+        expr = ds.field('CameraId').isin([int(c) for c in cameras])
+    if frame_range is not None:
+        lo, hi = frame_range
+        rng = (ds.field('FrameId') >= int(lo)) & (ds.field('FrameId') <= int(hi))
+        expr = rng if expr is None else expr & rng
+    return expr
+
+
+def read_mtmc_parquet(
+    path: str,
+    cameras: Optional[Iterable[int]] = None,
+    frame_range: Optional[Tuple[int, int]] = None,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """Read an MTMC Parquet data set, pushing camera/frame filters down to the scan."""
+    _, ds = _pyarrow()
+    dataset = ds.dataset(path, format="parquet", partitioning=_partitioning() if os.path.isdir(path) else None)
+    table = dataset.to_table(columns=columns or MTMC_COLUMNS, filter=mtmc_filter(cameras, frame_range))
+    return table.to_pandas()
+
+
+def mtmc_cameras(path: str) -> List[int]:
+    """Sorted camera ids of a data set; read from the partition keys where possible."""
+    _, ds = _pyarrow()
+    dataset = ds.dataset(path, format="parquet", partitioning=_partitioning() if os.path.isdir(path) else None)
+    keys = [ds.get_partition_keys(f.partition_expression).get('CameraId') for f in dataset.get_fragments()]
+    if keys and None not in keys:
+        return sorted(set(keys))
+    cams = dataset.to_table(columns=['CameraId']).column('CameraId').to_numpy()
+    return np.unique(cams).tolist()
+
+
+def iter_mtmc_parquet(
+    path: str,
+    cameras: Optional[Iterable[int]] = None,
+    frame_range: Optional[Tuple[int, int]] = None,
+    batch_rows: int = 1 << 16,
+) -> Iterator[pd.DataFrame]:
+    """Stream an MTMC Parquet data set in batches of at most *batch_rows* rows.
+
+    Cameras are scanned one after another in increasing order, each with its
+    camera and frame-range filter pushed down, so the batches are sorted by
+    camera and then frame for data sets written by `write_mtmc_parquet`.
+    """
+    _, ds = _pyarrow()
+    dataset = ds.dataset(path, format="parquet", partitioning=_partitioning() if os.path.isdir(path) else None)
+    for cam in mtmc_cameras(path):
+        if cameras is not None and cam not in {int(c) for c in cameras}:
+            continue
+        scanner = dataset.scanner(columns=MTMC_COLUMNS, filter=mtmc_filter([cam], frame_range),
+                                  batch_size=batch_rows, use_threads=False)
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                yield batch.to_pandas()
+
+
+def filter_mtmc(df: pd.DataFrame, cameras=None, frame_range=None) -> pd.DataFrame:
+    """Apply the same camera/frame-range selection to an in-memory data frame."""
+    mask = np.ones(len(df), dtype=bool)
+    if cameras is not None:
+        mask &= df['CameraId'].isin([int(c) for c in cameras]).to_numpy()
+    if frame_range is not None:
+        mask &= df['FrameId'].between(*frame_range).to_numpy()
+    return df if mask.all() else df[mask].reset_index(drop=True)
+
+
+def convert_text(txt_file: str, out_dir: str) -> int:
+    """Convert an MTMC text file to a camera-partitioned Parquet data set; returns the row count."""
+    df = pd.read_csv(txt_file, sep=r'\s+', header=None, names=MTMC_COLUMNS, usecols=range(len(MTMC_COLUMNS)))
+    write_mtmc_parquet(df, out_dir)
+    return len(df)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Convert an MTMC ground-truth text file to camera-partitioned Parquet.")
+    ap.add_argument("txt_file", help="MTMC text file (cam id frame x y w h xworld yworld).")
+    ap.add_argument("out_dir", help="Output Parquet directory.")
+    args = ap.parse_args()
+
+    n = convert_text(args.txt_file, args.out_dir)
+    print(f"✓ Wrote {n} rows to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
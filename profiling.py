@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+profiling.py
+────────────
+
+Phase-level timing for the command-line tools (``--profile``).
+
+A tool marks its phases with ``profiling.phase(name)``; while a profile is
+active every phase appends one JSON line to the profile file::
+
+    {"tool": "eval_label", "run": "20261018T101500-4242", "commit": "5272c5a",
+     "phase": "parse", "wall_s": 1.92, "cpu_s": 1.87, "children_cpu_s": 0.0,
+     "rows": 1260000, "rss_mb": 412.3, "peak_rss_mb": 498.0, "depth": 0}
+
+* ``wall_s``/``cpu_s`` – wall-clock and CPU time of this process;
+  ``children_cpu_s`` is the CPU time of worker processes that finished
+  during the phase,
+* ``rows`` – rows processed, when the tool reports them,
+* ``peak_rss_mb`` – peak resident set size during the phase (Linux: the
+  kernel's high-water mark is reset at the start of each phase; elsewhere it
+  is the peak of the whole process so far),
+* ``depth`` – nesting level, phases may contain sub-phases.
+
+A closing ``"phase": "total"`` line covers the whole run. Lines are appended,
+so one file can collect the runs of many releases. Without ``--profile``
+``phase`` costs next to nothing.
+
+``--cprofile PHASE`` additionally runs cProfile during every occurrence of
+that phase (in this process only, use one worker to include the work
+itself) and dumps the statistics next to the profile as
+``<profile>.<PHASE>.prof`` (open with ``python -m pstats`` or snakeviz).
+
+Usage
+-----
+```python
+import profiling
+
+profiling.add_arguments(parser)
+args = parser.parse_args()
+with profiling.session("eval_label", args):
+    with profiling.phase("parse") as ph:
+        df = read(...)
+        ph.rows = len(df)
+```
+"""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+_ROOT = os.path.dirname(os.path.abspath(__file__))
+_MB = 1 << 20
+
+
+def rss() -> Dict[str, int]:
+    """Current and peak resident set size of this process in bytes (``{"rss", "peak"}``).
+
+    Uses ``/proc/self/status`` where available: unlike ``ru_maxrss``, its peak
+    (VmHWM) is not inherited from the parent process and can be reset.
+    """
+    try:
+        with open("/proc/self/status") as fh:
+            status = dict(line.split(":", 1) for line in fh)
+        return {"rss": int(status["VmRSS"].split()[0]) * 1024, "peak": int(status["VmHWM"].split()[0]) * 1024}
+    except (OSError, KeyError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = peak if sys.platform == "darwin" else peak * 1024       # KiB on Linux, bytes on macOS
+        return {"rss": peak, "peak": peak}
+
+
+def reset_peak() -> bool:
+    """Reset the peak RSS (Linux); returns whether that is supported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _children_cpu() -> float:
+    ru = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return ru.ru_utime + ru.ru_stime
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=_ROOT, capture_output=True,
+                              text=True, check=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Phase:
+    """A running phase; set ``rows`` to record how many rows it processed."""
+
+    def __init__(self, name: str, rows: Optional[int] = None):
+        self.name = name
+        self.rows = rows
+        self.peak = 0
+
+
+class Profiler:
+    """Writes one JSON line per phase to *path* (see module docstring)."""
+
+    def __init__(self, path: str, tool: str, cprofile_phase: Optional[str] = None):
+        self.path = path
+        self.base = {
+            "tool": tool,
+            "run": time.strftime("%Y%m%dT%H%M%S") + f"-{os.getpid()}",
+            "commit": _commit(),
+        }
+        self.cprofile_phase = cprofile_phase
+        self._cprofile = cProfile.Profile() if cprofile_phase else None
+        self._stack: List[Phase] = []
+
+    def _write(self, record: Dict[str, object]) -> None:
+        with open(self.path, "a") as fh:
+            fh.write(json.dumps({**self.base, **record}) + "\n")
+
+    @contextmanager
+    def phase(self, name: str, rows: Optional[int] = None) -> Iterator[Phase]:
+        ph = Phase(name, rows)
+        if self._stack:
+            # the reset below clears the enclosing phase's peak so far
+            self._stack[-1].peak = max(self._stack[-1].peak, rss()["peak"])
+        reset_peak()
+        self._stack.append(ph)
+        profile = self._cprofile if name == self.cprofile_phase else None
+        wall, cpu, children = time.perf_counter(), time.process_time(), _children_cpu()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield ph
+        finally:
+            if profile is not None:
+                profile.disable()
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            children = _children_cpu() - children
+            self._stack.pop()
+            mem = rss()
+            ph.peak = max(ph.peak, mem["peak"])
+            if self._stack:
+                self._stack[-1].peak = max(self._stack[-1].peak, ph.peak)
+            self._write({
+                "phase": name,
+                "wall_s": round(wall, 6),
+                "cpu_s": round(cpu, 6),
+                "children_cpu_s": round(children, 6),
+                "rows": ph.rows,
+                "rss_mb": round(mem["rss"] / _MB, 1),
+                "peak_rss_mb": round(ph.peak / _MB, 1),
+                "depth": len(self._stack),
+            })
+
+    def dump_cprofile(self) -> Optional[str]:
+        """Write the cProfile statistics of the profiled phase; returns the file name."""
+        if self._cprofile is None:
+            return None
+        out = f"{self.path}.{self.cprofile_phase}.prof"
+        self._cprofile.dump_stats(out)
+        return out
+
+
+_ACTIVE: Optional[Profiler] = None
+
+
+@contextmanager
+def phase(name: str, rows: Optional[int] = None) -> Iterator[Phase]:
+    """Time a phase with the active profiler; a no-op (apart from the yielded `Phase`) without one."""
+    if _ACTIVE is None:
+        yield Phase(name, rows)
+        return
+    with _ACTIVE.phase(name, rows) as ph:
+        yield ph
+
+
+def add_arguments(parser) -> None:
+    """Add ``--profile`` and ``--cprofile`` to an argparse parser."""
+    parser.add_argument('--profile', default=None, metavar='JSONL',
+                        help="Append per-phase wall/CPU time, rows and peak memory to this JSON-lines file.")
+    parser.add_argument('--cprofile', default=None, metavar='PHASE',
+                        help="With --profile, also run cProfile during PHASE and dump it to <JSONL>.<PHASE>.prof.")
+
+
+@contextmanager
+def session(tool: str, args=None, path: Optional[str] = None, cprofile_phase: Optional[str] = None):
+    """Activate a profiler for the duration of a run (from ``args.profile``/``args.cprofile`` or the keywords).
+
+    Records the closing ``total`` phase, also when the run fails or exits.
+    """
+    global _ACTIVE
+    path = path or getattr(args, "profile", None)
+    cprofile_phase = cprofile_phase or getattr(args, "cprofile", None)
+    if not path:
+        yield None
+        return
+    profiler, previous = Profiler(path, tool, cprofile_phase), _ACTIVE
+    _ACTIVE = profiler
+    try:
+        with profiler.phase("total"):
+            yield profiler
+    finally:
+        _ACTIVE = previous
+        out = profiler.dump_cprofile()
+        if out:
+            print(f"✓ cProfile of phase '{cprofile_phase}' written to {out}", file=sys.stderr)
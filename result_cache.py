@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+result_cache.py
+───────────────
+
+Content-addressed cache of evaluation results for ``eval_det.py``,
+``eval_sct.py`` and ``eval_label.py`` (``--result-cache DIR``).
+
+An entry is keyed by the SHA-1 of
+
+* the evaluator name and its module-level ``EVAL_VERSION``, which must be
+  bumped whenever the evaluator can give different numbers for the same
+  inputs and parameters,
+* the SHA-1 of every input (files are hashed by content; label directories
+  and Parquet data sets by the relative path and content of every file),
+* the parameters that affect the result (IoU thresholds, ``distth``, camera
+  and frame selection, ...),
+
+so a hit means the same evaluator would compute the same numbers again, no
+matter where the files live or what their mtimes are. Each entry is one JSON
+file ``DIR/<key[:2]>/<key>.json`` holding the inputs, the parameters and the
+result; writes are atomic. A hit refreshes the entry's mtime, which ``prune``
+uses as its last use.
+
+Usage
+-----
+```bash
+python eval_sct.py pred.txt gt.txt --result-cache ~/.cache/mct_eval
+python result_cache.py inspect ~/.cache/mct_eval
+python result_cache.py prune   ~/.cache/mct_eval --max-size 200M --max-age 30
+```
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from track_store import file_sha1
+
+ENTRY_SUFFIX = ".json"
+_SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+def path_sha1(path: str) -> str:
+    """SHA-1 of a file's content, or of a directory tree (relative paths and file contents)."""
+    if not os.path.isdir(path):
+        return file_sha1(path)
+    h = hashlib.sha1()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            h.update(os.path.relpath(full, path).encode())
+            h.update(b"\0")
+            h.update(file_sha1(full).encode())
+    return h.hexdigest()
+
+
+def _encode(obj):
+    """JSON-safe form of a result: data frames, dicts with non-string keys and NumPy scalars."""
+    if isinstance(obj, pd.DataFrame):
+        split = obj.to_dict(orient="split")
+        return {"__frame__": {k: _encode(v) for k, v in split.items()}}
+    if isinstance(obj, dict):
+        if all(isinstance(k, str) for k in obj):
+            return {k: _encode(v) for k, v in obj.items()}
+        return {"__items__": [[_encode(k), _encode(v)] for k, v in obj.items()]}
+    if isinstance(obj, (list, tuple)):
+        return [_encode(v) for v in obj]
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
+def _decode(obj):
+    if isinstance(obj, dict):
+        if "__frame__" in obj:
+            return pd.DataFrame(**{k: _decode(v) for k, v in obj["__frame__"].items()})
+        if "__items__" in obj:
+            return {_decode(k): _decode(v) for k, v in obj["__items__"]}
+        return {k: _decode(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_decode(v) for v in obj]
+    return obj
+
+
+class ResultCache:
+    """A result cache directory (created on first write)."""
+
+    def __init__(self, root: str):
+        self.root = os.path.expanduser(root)
+        self._hashes: Dict[str, tuple] = {}
+
+    def input_sha1(self, path: str) -> str:
+        """`path_sha1`, remembered for this instance while the file's size and mtime are unchanged."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stamp = (st.st_size, st.st_mtime_ns)
+        known = self._hashes.get(path)
+        if known is None or known[0] != stamp:
+            known = self._hashes[path] = (stamp, path_sha1(path))
+        return known[1]
+
+    def key(self, evaluator: str, version: int, inputs: Dict[str, str], params: Dict[str, object]) -> str:
+        """Cache key of evaluating *inputs* (role → path) with *params* (JSON-serializable)."""
+        spec = {
+            "evaluator": evaluator,
+            "version": version,
+            "inputs": {role: self.input_sha1(p) for role, p in sorted(inputs.items())},
+            "params": params,
+        }
+        return hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + ENTRY_SUFFIX)
+
+    def get(self, key: str):
+        """The stored result for *key*, or None."""
+        path = self._path(key)
+        try:
+            with open(path) as fh:
+                entry = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return _decode(entry["result"])
+
+    def put(self, key: str, result, evaluator: str, inputs: Dict[str, str], params: Dict[str, object]) -> None:
+        """Store *result* under *key*, with the evaluator, input paths and parameters for `inspect`."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            "key": key,
+            "evaluator": evaluator,
+            "created": time.time(),
+            "inputs": {role: os.path.abspath(p) for role, p in inputs.items()},
+            "params": params,
+            "result": _encode(result),
+        }
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as fh:
+                json.dump(entry, fh, default=str)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def cached(self, evaluator: str, version: int, inputs: Dict[str, str], params: Dict[str, object],
+               compute: Callable[[], object], verbose: bool = True):
+        """Return the stored result, or `compute()` it and store it.
+
+        Inputs that cannot be hashed (e.g. missing files) bypass the cache, so
+        the evaluator reports the error itself.
+        """
+        try:
+            key = self.key(evaluator, version, inputs, params)
+        except OSError:
+            return compute()
+        result = self.get(key)
+        if result is not None:
+            if verbose:
+                print(f"✓ Result cache hit ({key[:12]})")
+            return result
+        result = compute()
+        self.put(key, result, evaluator, inputs, params)
+        return result
+
+    def entries(self) -> List[Dict[str, object]]:
+        """Metadata of every entry (without the result), most recently used first."""
+        out = []
+        if not os.path.isdir(self.root):
+            return out
+        for sub in sorted(os.listdir(self.root)):
+            folder = os.path.join(self.root, sub)
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                if not name.endswith(ENTRY_SUFFIX):
+                    continue
+                path = os.path.join(folder, name)
+                try:
+                    st = os.stat(path)
+                    with open(path) as fh:
+                        entry = json.load(fh)
+                except (OSError, ValueError):
+                    continue
+                entry.pop("result", None)
+                out.append({**entry, "path": path, "size": st.st_size, "used": st.st_mtime})
+        return sorted(out, key=lambda e: -e["used"])
+
+    def prune(self, max_bytes: Optional[int] = None, max_age: Optional[float] = None,
+              dry_run: bool = False) -> List[Dict[str, object]]:
+        """Remove entries unused for more than *max_age* seconds, then the least
+        recently used ones until the cache is at most *max_bytes*; returns the
+        removed entries (only lists them with *dry_run*)."""
+        now = time.time()
+        kept, removed = [], []
+        for e in self.entries():
+            (removed if max_age is not None and now - e["used"] > max_age else kept).append(e)
+        if max_bytes is not None:
+            total = sum(e["size"] for e in kept)
+            while kept and total > max_bytes:
+                e = kept.pop()
+                total -= e["size"]
+                removed.append(e)
+        for e in [] if dry_run else removed:
+            os.unlink(e["path"])
+            try:
+                os.rmdir(os.path.dirname(e["path"]))
+            except OSError:
+                pass
+        return removed
+
+
+def open_cache(root: Optional[str]) -> Optional[ResultCache]:
+    """`ResultCache` for a ``--result-cache`` option (None when not given)."""
+    return ResultCache(root) if root else None
+
+
+def parse_size(text: str) -> int:
+    """``500M``, ``2G``, ``100K`` or plain bytes."""
+    text = text.strip().upper().rstrip("B")
+    unit = text[-1:] if text[-1:] in _SIZE_UNITS else ""
+    return int(float(text[:len(text) - len(unit)]) * _SIZE_UNITS[unit])
+
+
+def _human(n: float) -> str:
+    if n < 1024:
+        return f"{n:.0f} B"
+    for unit in ("KB", "MB", "GB"):
+        n /= 1024
+        if n < 1024 or unit == "GB":
+            return f"{n:.1f} {unit}"
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Inspect or prune an evaluation result cache.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    i = sub.add_parser("inspect", help="List the cached results, most recently used first.")
+    i.add_argument("cache_dir")
+    i.add_argument("--evaluator", default=None, help="Only list entries of this evaluator.")
+    p = sub.add_parser("prune", help="Remove old entries and/or shrink the cache to a size.")
+    p.add_argument("cache_dir")
+    p.add_argument("--max-size", type=parse_size, default=None, metavar="SIZE",
+                   help="Keep at most this much (e.g. 200M), dropping the least recently used entries.")
+    p.add_argument("--max-age", type=float, default=None, metavar="DAYS",
+                   help="Remove entries not used for this many days.")
+    p.add_argument("--dry-run", action="store_true", help="Only list what would be removed.")
+    args = ap.parse_args()
+
+    cache = ResultCache(args.cache_dir)
+    if args.cmd == "inspect":
+        entries = [e for e in cache.entries() if args.evaluator in (None, e.get("evaluator"))]
+        for e in entries:
+            used = time.strftime("%Y-%m-%d %H:%M", time.localtime(e["used"]))
+            inputs = "  ".join(f"{role}={path}" for role, path in e.get("inputs", {}).items())
+            print(f"{e['key'][:12]}  {e.get('evaluator', '?'):<10} {used}  {_human(e['size']):>9}  {inputs}")
+        print(f"{len(entries)} entries, {_human(sum(e['size'] for e in entries))}")
+        return
+
+    if args.max_size is None and args.max_age is None:
+        ap.error("prune needs --max-size and/or --max-age")
+    removed = cache.prune(args.max_size, None if args.max_age is None else args.max_age * 86400, args.dry_run)
+    if args.dry_run:
+        for e in removed:
+            print(f"{e['key'][:12]}  {e.get('evaluator', '?'):<10} {_human(e['size']):>9}")
+    verb = "Would remove" if args.dry_run else "Removed"
+    print(f"✓ {verb} {len(removed)} entries ({_human(sum(e['size'] for e in removed))})")
+
+
+if __name__ == "__main__":
+    main()
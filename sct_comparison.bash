@@ -1,9 +1,14 @@
 seqs=("c001" "c002" "c003" "c004")
 algorithms=("boosttrack" "botsort" "bytetrack" "deepocsort" "ocsort")
+manifest=./sct_res/sct_comparison_manifest.txt
 
+# one line per run: <groundtruth> <prediction> <name>, paths relative to ./sct_res
+: > "$manifest"
 for seq in "${seqs[@]}"; do
     for algorithm in "${algorithms[@]}"; do
-        echo "Processing sequence: $seq with algorithm: $algorithm"
-        python eval_sct.py ./sct_res/${seq}_${algorithm}_sct_boxmot_results_filtered.txt ./sct_res/images${seq}_mot_interpolated_final.txt
+        echo "images${seq}_mot_interpolated_final.txt ${seq}_${algorithm}_sct_boxmot_results_filtered.txt ${seq}_${algorithm}" >> "$manifest"
     done
-done
\ No newline at end of file
+done
+
+# each ground truth is loaded once, the 20 runs are evaluated in parallel
+python eval_sct.py --manifest "$manifest" --engine native -o ./sct_res/sct_comparison.csv
@@ -19,6 +19,14 @@ Features
 4. **Quit without saving**  
    *Prompt*: `q`.
 
+Edit journal
+============
+Every merge, delete and break is appended to `<output_prefix>.journal` as
+soon as it is applied. Restarting on the same tracking file replays the
+journal and resumes the session, so a crash or `q` loses nothing; `w`
+compacts the journal into the final TXT file and removes it. Pass
+`--discard-journal` to start over.
+
 Example
 -------
 ```bash
@@ -32,19 +40,97 @@ Dependencies: `opencv‑python` ≥4.8, `numpy`, `tqdm` (for progress bar).
 """
 
 import argparse
+import io
+import json
 import os
 import sys
+from contextlib import redirect_stdout
 from typing import Dict, List, Tuple
 
 import cv2
 import numpy as np
 from tqdm import tqdm
 
+from mot_io import write_records
+from track_store import file_sha1, load_track_dict
+
 BBox = List[float]                 # [x1, y1, x2, y2]
 Det  = Tuple[int, BBox, int]       # (frame, bbox, cls)
 Track = List[Det]                  # list of detections sorted by frame
 Tracks = Dict[int, Track]          # track_id -> Track
 
+_MISSING = object()
+
+
+class FrameIndexedTracks(dict):
+    """``Tracks`` dict that also keeps a frame → {track_id: [Det, …]} view.
+
+    Assigning, deleting or popping a track updates the frame view as well, so
+    `merge_tracks`, `break_tracklet` and delete keep both views consistent and
+    per-frame consumers (e.g. `render_video`) fetch a frame's boxes in O(1).
+    """
+
+    def __init__(self, tracks: Tracks = None):
+        super().__init__()
+        self.by_frame: Dict[int, Dict[int, List[Det]]] = {}
+        for tid, track in (tracks or {}).items():
+            self[tid] = track
+
+    def _index(self, tid: int, track: Track) -> None:
+        for det in track:
+            self.by_frame.setdefault(det[0], {}).setdefault(tid, []).append(det)
+
+    def _unindex(self, tid: int) -> None:
+        for f, _, _ in dict.get(self, tid, ()):
+            at_frame = self.by_frame.get(f)
+            if at_frame is not None and at_frame.pop(tid, None) is not None and not at_frame:
+                del self.by_frame[f]
+
+    def __setitem__(self, tid: int, track: Track) -> None:
+        self._unindex(tid)
+        super().__setitem__(tid, track)
+        self._index(tid, track)
+
+    def __delitem__(self, tid: int) -> None:
+        self._unindex(tid)
+        super().__delitem__(tid)
+
+    def pop(self, tid: int, default=_MISSING):
+        if tid not in self:
+            if default is _MISSING:
+                raise KeyError(tid)
+            return default
+        self._unindex(tid)
+        return super().pop(tid)
+
+    def popitem(self):
+        tid, track = super().popitem()
+        super().__setitem__(tid, track)
+        self._unindex(tid)
+        super().__delitem__(tid)
+        return tid, track
+
+    def clear(self) -> None:
+        super().clear()
+        self.by_frame.clear()
+
+    def update(self, *args, **kwargs) -> None:
+        for tid, track in dict(*args, **kwargs).items():
+            self[tid] = track
+
+    def setdefault(self, tid: int, default: Track = None) -> Track:
+        if tid not in self:
+            self[tid] = [] if default is None else default
+        return self[tid]
+
+    def frames(self) -> List[int]:
+        """All frames that hold at least one detection, sorted."""
+        return sorted(self.by_frame)
+
+    def dets_at(self, frame: int) -> List[Tuple[int, Det]]:
+        """``(track_id, det)`` pairs of every detection in *frame*."""
+        return [(tid, det) for tid, dets in self.by_frame.get(frame, {}).items() for det in dets]
+
 # ────────────────────────────────────────────────────────────────────────────────
 # Utility helpers
 # ────────────────────────────────────────────────────────────────────────────────
@@ -54,8 +140,8 @@ def linear_interpolate(b1: BBox, b2: BBox, alpha: float) -> BBox:
     return [b1[i] + alpha * (b2[i] - b1[i]) for i in range(4)]
 
 
-def break_tracklet(tracks: Tracks, track_id: int, frame_id: int) -> None:
-    """Break tracklet *track_id* at *frame_id*."""
+def break_tracklet(tracks: Tracks, track_id: int, frame_id: int) -> bool:
+    """Break tracklet *track_id* at *frame_id*; returns whether it was broken."""
     track = tracks[track_id]
     # find the frame to break at
     for i, (f, _, _) in enumerate(track):
@@ -63,12 +149,13 @@ def break_tracklet(tracks: Tracks, track_id: int, frame_id: int) -> None:
             break
     else:
         print("✗ Frame ID not found in track.")
-        return
+        return False
     # split the track into two parts
     new_track = track[i:]
     tracks[track_id] = track[:i]
     tracks[int(-1*track_id)] = new_track  # new track ID
     print(f"✓ Track {track_id} broken at frame {frame_id} into new track with track_id {-1*track_id}.")
+    return True
 
 
 def interpolate_track(track: Track, max_gap: int = 10) -> Track:
@@ -87,49 +174,133 @@ def interpolate_track(track: Track, max_gap: int = 10) -> Track:
     return sorted(full, key=lambda x: x[0])
 
 
-def merge_tracks(tracks: Tracks, id_keep: int, id_merge: int, max_gap: int) -> None:
+def merge_tracks(tracks: Tracks, id_keep: int, id_merge: int, max_gap: int) -> bool:
     """Merge *id_merge* into *id_keep* and interpolate inside the new track."""
     if id_keep not in tracks or id_merge not in tracks:
         print("✗ One of the specified track IDs does not exist.")
-        return
+        return False
     merged = tracks[id_keep] + tracks[id_merge]
     merged = sorted(merged, key=lambda x: x[0])
     merged = interpolate_track(merged, max_gap)
     tracks[id_keep] = merged
     del tracks[id_merge]
     print(f"✓ Track {id_merge} merged into {id_keep} ‑ total detections: {len(merged)}")
+    return True
+
+
+def delete_track(tracks: Tracks, track_id: int) -> bool:
+    """Delete *track_id*; returns whether it existed."""
+    if tracks.pop(track_id, None) is None:
+        print("✗ Track ID not found.")
+        return False
+    print(f"✓ Track {track_id} deleted.")
+    return True
+
+
+def apply_edit(tracks: Tracks, edit: Dict) -> bool:
+    """Apply one journal record (see `EditJournal`) to *tracks*."""
+    op = edit["op"]
+    if op == "merge":
+        return merge_tracks(tracks, edit["keep"], edit["merge"], edit["max_gap"])
+    if op == "delete":
+        return delete_track(tracks, edit["track"])
+    if op == "break":
+        return break_tracklet(tracks, edit["track"], edit["frame"])
+    raise ValueError(f"Unknown journal operation {op!r}")
 
 
 def load_tracks(txt_path: str) -> Tracks:
-    """Read MOT text file → dict of tracks."""
-    tracks: Tracks = {}
-    with open(txt_path, "r") as fh:
-        for ln in fh:
-            if ln.strip() == "":
-                continue
-            parts = ln.split()
-            if len(parts) < 7:
-                continue
-            f, tid = int(float(parts[0])), int(float(parts[1]))
-            bb = list(map(float, parts[2:6]))
-            cls = int(float(parts[6]))
-            tracks.setdefault(tid, []).append((f, bb, cls))
-    # sort
-    for tid in tracks:
-        tracks[tid] = sorted(tracks[tid], key=lambda x: x[0])
-    return tracks
+    """Read MOT text file → frame-indexed dict of tracks (through the cached columnar store)."""
+    return FrameIndexedTracks(load_track_dict(txt_path, require_cls=True))
 
 
 def save_tracks(tracks: Tracks, out_txt: str) -> None:
-    with open(out_txt, "w") as fh:
-        for tid, dets in tracks.items():
-            for f, bb, cls in dets:
-                fh.write(f"{f} {tid} {bb[0]:.2f} {bb[1]:.2f} {bb[2]:.2f} {bb[3]:.2f} {cls}\n")
+    """Write tracks as MOT text in one atomic, block-formatted pass (``.gz`` → gzip)."""
+    write_records(out_txt, ((f, tid, bb[0], bb[1], bb[2], bb[3], cls)
+                            for tid, dets in tracks.items() for f, bb, cls in dets))
     print(f"✓ Results saved to {out_txt}")
 
 
+class EditJournal:
+    """Append-only log of the edits of one session.
+
+    The first line records the source tracking file (path and SHA-1); each
+    further line is one JSON edit such as ``{"op": "merge", "keep": 3,
+    "merge": 7, "max_gap": 150}``, written and fsync'ed right after the edit
+    is applied. A journal whose source hash no longer matches is moved aside
+    to ``<journal>.stale`` instead of being replayed.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str, source_txt: str):
+        self.path = path
+        self.header = {"journal": self.VERSION, "source": os.path.abspath(source_txt), "sha1": file_sha1(source_txt)}
+        self.n_edits = 0
+        self._fh = None
+
+    def replay(self, tracks: Tracks) -> int:
+        """Re-apply the journalled edits to freshly loaded *tracks*; returns how many."""
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, "rb") as fh:
+            lines = fh.readlines()
+        try:
+            header = json.loads(lines[0]) if lines else None
+        except ValueError:
+            header = None
+        if header is None or header.get("journal") != self.VERSION or header.get("sha1") != self.header["sha1"]:
+            os.replace(self.path, self.path + ".stale")
+            print(f"✗ {self.path} does not belong to this tracking file; moved to {self.path}.stale.")
+            return 0
+
+        valid = len(lines[0])
+        with redirect_stdout(io.StringIO()):
+            for ln in lines[1:]:
+                if not ln.endswith(b"\n"):
+                    break                      # torn write from a crash
+                apply_edit(tracks, json.loads(ln))
+                valid += len(ln)
+                self.n_edits += 1
+        if valid < sum(map(len, lines)):
+            with open(self.path, "r+b") as fh:
+                fh.truncate(valid)
+        return self.n_edits
+
+    def record(self, **edit) -> None:
+        """Append one applied edit and flush it to disk."""
+        if self._fh is None:
+            new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            self._fh = open(self.path, "a")
+            if new:
+                self._fh.write(json.dumps(self.header) + "\n")
+        self._fh.write(json.dumps(edit) + "\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self.n_edits += 1
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def compact(self, tracks: Tracks, out_txt: str) -> None:
+        """Materialise the edited tracks as *out_txt* and drop the journal."""
+        save_tracks(tracks, out_txt)
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def discard(self) -> None:
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
 def render_video(tracks: Tracks, img_dir: str, img_pattern: str, fps: int, out_mp4: str):
-    all_frames = sorted({f-1 for trk in tracks.values() for f, _, _ in trk}) # f-1 to match 0-based indexing
+    if not isinstance(tracks, FrameIndexedTracks):
+        tracks = FrameIndexedTracks(tracks)
+    all_frames = [f-1 for f in tracks.frames()] # f-1 to match 0-based indexing
     print(all_frames)
     if not all_frames:
         print("✗ No frames found – skipping video.")
@@ -156,14 +327,11 @@ def render_video(tracks: Tracks, img_dir: str, img_pattern: str, fps: int, out_m
         if frame is None:
             continue
         # draw
-        for tid, dets in tracks.items():
-            for fr, bb, cls in dets:
-                if fr != f:
-                    continue
-                colour = colour_map.setdefault(tid, tuple(int(c) for c in np.random.randint(0, 255, 3)))
-                x1, y1, x2, y2 = map(int, bb)
-                cv2.rectangle(frame, (x1, y1), (x2, y2), colour, 2)
-                cv2.putText(frame, str(tid), (x1, y1 - 4), cv2.FONT_HERSHEY_SIMPLEX, 1.5, colour, 2)
+        for tid, (fr, bb, cls) in tracks.dets_at(f):
+            colour = colour_map.setdefault(tid, tuple(int(c) for c in np.random.randint(0, 255, 3)))
+            x1, y1, x2, y2 = map(int, bb)
+            cv2.rectangle(frame, (x1, y1), (x2, y2), colour, 2)
+            cv2.putText(frame, str(tid), (x1, y1 - 4), cv2.FONT_HERSHEY_SIMPLEX, 1.5, colour, 2)
         vw.write(frame)
     vw.release()
     print(f"✓ Video written to {out_mp4}")
@@ -172,7 +340,7 @@ def render_video(tracks: Tracks, img_dir: str, img_pattern: str, fps: int, out_m
 # Main interactive loop
 # ────────────────────────────────────────────────────────────────────────────────
 
-def interactive_session(tracks: Tracks, args):
+def interactive_session(tracks: Tracks, args, journal: EditJournal):
     print("Loaded", len(tracks), "tracks.")
     while True:
         cmd = input("[i]ntegrate, [d]elete, [b]reak, [w]rite & quit, [Q]uit: ").strip().lower()
@@ -180,26 +348,29 @@ def interactive_session(tracks: Tracks, args):
             try:
                 t1 = int(input("  trackid1 (kept): "))
                 t2 = int(input("  trackid2 (merged → trackid1): "))
-                merge_tracks(tracks, t1, t2, args.max_gap)
+                if merge_tracks(tracks, t1, t2, args.max_gap):
+                    journal.record(op="merge", keep=t1, merge=t2, max_gap=args.max_gap)
             except ValueError:
                 print("✗ Invalid input; IDs must be integers.")
         elif cmd == "d":
             try:
                 t = int(input("  trackid to delete: "))
-                if tracks.pop(t, None) is not None:
-                    print(f"✓ Track {t} deleted.")
-                else:
-                    print("✗ Track ID not found.")
+                if delete_track(tracks, t):
+                    journal.record(op="delete", track=t)
             except ValueError:
                 print("✗ Invalid input; ID must be integer.")
         elif cmd == "w":
             out_txt  = f"{args.output_prefix}.txt"
             out_mp4  = f"{args.output_prefix}.mp4"
-            save_tracks(tracks, out_txt)
+            journal.compact(tracks, out_txt)
             # render_video(tracks, args.img_dir, args.img_pattern, args.fps, out_mp4)
             break
         elif cmd == "q":
-            print("Exiting without saving …")
+            journal.close()
+            if journal.n_edits:
+                print(f"Exiting without saving … {journal.n_edits} edit(s) kept in {journal.path}; rerun to resume.")
+            else:
+                print("Exiting without saving …")
             break
         elif cmd == "b":
             try:
@@ -213,7 +384,8 @@ def interactive_session(tracks: Tracks, args):
                 frame_id = int(input("  frame to break at: "))
                 if frame_id in [f for f, _, _ in tracks[t]]:
                     print(f"✓ Frame {frame_id} exists in track {t}.")
-                    break_tracklet(tracks, t, frame_id)
+                    if break_tracklet(tracks, t, frame_id):
+                        journal.record(op="break", track=t, frame=frame_id)
                 else:
                     print("✗ Frame ID not found in track.")
             except ValueError:
@@ -233,6 +405,8 @@ def parse_args():
     # ap.add_argument("--fps", type=int, default=15, help="FPS for output video (default 15).")
     # ap.add_argument("--output_prefix", default="edited", help="Prefix for output files (default 'edited').")
     # ap.add_argument("--max_gap", type=int, default=10, help="Max gap (frames) to interpolate when merging (default 10).")
+    ap.add_argument("--discard-journal", action="store_true",
+                    help="Ignore and delete the edit journal of a previous session instead of resuming it.")
     return ap.parse_args()
 
 
@@ -246,7 +420,12 @@ def main():
         sys.exit(f"Tracking file {args.tracking_txt} not found.")
     tracks = load_tracks(args.tracking_txt)
     print(f"Loaded {len(tracks)} tracks from {args.tracking_txt}.")
-    interactive_session(tracks, args)
+    journal = EditJournal(f"{args.output_prefix}.journal", args.tracking_txt)
+    if args.discard_journal:
+        journal.discard()
+    elif journal.replay(tracks):
+        print(f"✓ Resumed {journal.n_edits} edit(s) from {journal.path}.")
+    interactive_session(tracks, args, journal)
 
 
 if __name__ == "__main__":
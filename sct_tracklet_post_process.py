@@ -1,19 +1,166 @@
 import cv2
+import heapq
 import os
 import numpy as np
 import random
 import argparse
 import sys
 
-def linear_interpolate(bbox1, bbox2, alpha):
+import profiling
+from mot_io import write_records, write_rows
+from track_store import MISSING_CLS, iter_track_chunks, load_track_arrays
+
+def interpolate_tracks(arrs, max_gap=None, min_len=6, verbose=False):
     """
-    Linearly interpolate between bbox1 and bbox2.
-    bbox1 and bbox2 are lists: [x1, y1, x2, y2]
-    alpha is between 0 and 1.
+    Fill the gaps of every track by linear interpolation, all tracks at once.
+    arrs is a TrackArrays (rows grouped by track, sorted by frame). A gap of
+    frame_j - frame_i > 1 frames is filled when it is at most max_gap (None:
+    any gap); the interpolated boxes are bbox_i + alpha * (bbox_j - bbox_i)
+    with alpha = (f - frame_i) / (frame_j - frame_i) and take the class of
+    detection i. Tracks with fewer than min_len rows afterwards are dropped.
+    Returns the columns [frame, track_id, x1, y1, x2, y2, cls] sorted by frame
+    then track id, and the ids of the kept tracks.
     """
-    return [bbox1[i] + alpha * (bbox2[i] - bbox1[i]) for i in range(4)]
+    n = len(arrs)
+    frame = arrs.frame.astype(np.int64)
+    track_id = arrs.track_id
+    cls = np.where(arrs.cls == MISSING_CLS, 0, arrs.cls)
+    boxes = arrs.boxes()
+
+    # gap to the next detection of the same track (0 on the last row of a track)
+    gap = np.zeros(n, dtype=np.int64)
+    if n > 1:
+        gap[:-1] = np.where(track_id[1:] == track_id[:-1], np.diff(frame), 0)
+    fill = gap > 1
+    if max_gap is not None:
+        fill &= gap <= max_gap
+    counts = 1 + np.where(fill, gap - 1, 0)  # output rows per input row
+
+    track_len = np.add.reduceat(counts, arrs.offsets[:-1]) if n else np.zeros(0, dtype=np.int64)
+    keep = track_len >= min_len
+    if verbose:
+        for i in np.flatnonzero(fill).tolist():
+            print(f"Interpolating track {track_id[i]} from frame {frame[i]} to {frame[i + 1]} (gap: {gap[i]})")
+        for tid in arrs.track_ids[~keep].tolist():
+            print(f"Track {tid} has less than {min_len - 1} detections after interpolation. Skipping.")
+
+    counts = np.where(np.repeat(keep, np.diff(arrs.offsets)), counts, 0)
+    src = np.repeat(np.arange(n), counts)  # input row of every output row
+    # 0 on the detections themselves, k on the k-th frame interpolated after them
+    step = np.arange(len(src)) - np.repeat(np.cumsum(counts) - counts, counts)
+    out_frame = frame[src] + step
+
+    # sort first, so the boxes are gathered once; stable, so repeated
+    # (frame, track) rows keep their file order
+    order = np.lexsort((track_id[src], out_frame))
+    src, step, out_frame = src[order], step[order], out_frame[order]
+    out_boxes = boxes[src]
+    interp = np.flatnonzero(step)
+    i = src[interp]
+    alpha = step[interp] / gap[i]
+    out_boxes[interp] += alpha[:, None] * (boxes[i + 1] - boxes[i])
+    columns = [out_frame, track_id[src], *out_boxes.T, cls[src]]
+    return columns, arrs.track_ids[keep]
+
+class _OpenTrack:
+    """A track of the stream that may still get detections."""
+    __slots__ = ('last_frame', 'last_box', 'last_cls', 'n', 'rows')
+
+    def __init__(self, kept):
+        self.n = 0
+        self.rows = None if kept else []  # rows held back until the track has min_len rows
+
+def stream_interpolate(chunks, max_gap, min_len=6, verbose=False, counts=None):
+    """
+    One-pass interpolate_tracks for frame-sorted input, in memory proportional
+    to the objects in view rather than to the sequence length.
+    chunks yields column dicts in file order (see track_store.iter_track_chunks).
+    Only the open tracks are kept: a track not seen for more than max_gap
+    frames can get no further interpolated rows and is closed, its rows are
+    dropped if it has fewer than min_len. Rows are queued in a heap and
+    yielded as (frame, track_id, x1, y1, x2, y2, cls) sorted by frame then
+    track id once no open track can add an earlier row.
+    The output equals interpolate_tracks with the same max_gap, except that a
+    track id that comes back after a gap of more than max_gap with a dropped
+    first part is judged on the rows after the gap alone.
+    counts (a dict) receives the number of 'tracks', 'kept' tracks and output 'rows'.
+    """
+    open_tracks = {}
+    seen_ids = set()
+    kept_ids = set()       # tracks with min_len rows; rows after a long gap are kept too
+    heap = []
+    seq = 0                # file order of rows with the same frame and track
+    current = None
+
+    def release(row):
+        nonlocal seq
+        heapq.heappush(heap, (row[0], row[1], seq, row))
+        seq += 1
+
+    def add(tid, track, row):
+        track.n += 1
+        if track.rows is None:
+            release(row)
+            return
+        track.rows.append(row)
+        if track.n >= min_len:
+            kept_ids.add(tid)
+            for r in track.rows:
+                release(r)
+            track.rows = None
+
+    def close(tid):
+        track = open_tracks.pop(tid)
+        if track.rows is not None and verbose:
+            print(f"Track {tid} has less than {min_len - 1} detections after interpolation. Skipping.")
 
-def main(input_file, output_file, seqs):
+    def advance(frame):
+        # close the tracks that can get no more rows and emit everything before
+        # the first frame an open track can still add a row to
+        watermark = frame
+        for tid in [tid for tid, t in open_tracks.items() if frame - t.last_frame > max_gap]:
+            close(tid)
+        for t in open_tracks.values():
+            hold = t.rows[0][0] if t.rows is not None else t.last_frame + 1
+            watermark = min(watermark, hold)
+        while heap and heap[0][0] < watermark:
+            yield heapq.heappop(heap)[3]
+
+    for cols in chunks:
+        cls = np.where(cols['cls'] == MISSING_CLS, 0, cols['cls']).tolist()
+        for frame, tid, x1, y1, x2, y2, c in zip(cols['frame'].tolist(), cols['track_id'].tolist(),
+                                                 cols['x1'].tolist(), cols['y1'].tolist(),
+                                                 cols['x2'].tolist(), cols['y2'].tolist(), cls):
+            if frame != current:
+                if current is not None and frame < current:
+                    raise ValueError(f"Streaming needs input sorted by frame, got frame {frame} after {current}.")
+                yield from advance(frame)
+                current = frame
+            box = [x1, y1, x2, y2]
+            track = open_tracks.get(tid)
+            if track is None:
+                track = open_tracks[tid] = _OpenTrack(tid in kept_ids)
+                seen_ids.add(tid)
+            else:
+                frame_i, box_i, gap = track.last_frame, track.last_box, frame - track.last_frame
+                if gap > 1:  # at most max_gap, longer gaps close the track
+                    if verbose:
+                        print(f"Interpolating track {tid} from frame {frame_i} to {frame} (gap: {gap})")
+                    for f in range(frame_i + 1, frame):
+                        alpha = (f - frame_i) / gap
+                        b = [box_i[k] + alpha * (box[k] - box_i[k]) for k in range(4)]
+                        add(tid, track, (f, tid, b[0], b[1], b[2], b[3], track.last_cls))
+            add(tid, track, (frame, tid, x1, y1, x2, y2, c))
+            track.last_frame, track.last_box, track.last_cls = frame, box, c
+
+    for tid in list(open_tracks):
+        close(tid)
+    while heap:
+        yield heapq.heappop(heap)[3]
+    if counts is not None:
+        counts.update(tracks=len(seen_ids), kept=len(kept_ids), rows=seq)
+
+def main(input_file, output_file, seqs, max_gap=None, min_len=6, verbose=False, stream=False):
     base_tracking_dir = '/home/yuqiang/yl4300/project/MCVT_YQ/datasets/algorithm_results/detect_merge'
     base_img_dir = '/home/yuqiang/yl4300/project/MCVT_YQ/datasets/algorithm_results/dataset/detection'
     fps = 15
@@ -29,72 +176,40 @@ def main(input_file, output_file, seqs):
             print(f"Tracking file {tracking_file} not found. Skipping {seq}.")
             continue
 
-        # Parse the tracking file.
-        # Each row: frame_num track_id x1 y1 x2 y2 class
-        tracks = {}  # track_id -> list of (frame, [x1, y1, x2, y2], class)
-        with open(tracking_file, 'r') as f:
-            for line in f:
-                parts = line.strip().split()
-                frame = int(float(parts[0]))
-                track_id = int(float(parts[1]))
-                x1 = float(parts[2])
-                y1 = float(parts[3])
-                x2 = float(parts[4])
-                y2 = float(parts[5])
-                cls = int(float(parts[6])) if len(parts) > 6 else 0
-                if track_id not in tracks:
-                    tracks[track_id] = []
-                tracks[track_id].append((frame, [x1, y1, x2, y2], cls))
-
-        # Sort each track's detections by frame.
-        print(f"Found {len(tracks)} tracks in {seq}.")
-        for tid in tracks:
-            tracks[tid] = sorted(tracks[tid], key=lambda x: x[0])
-
-        # Interpolate missing frames for each track.
-        # Also accumulate interpolated results for saving to file.
-        interpolated_results = []  # each element: (frame, track_id, x1, y1, x2, y2, cls)
-        for tid, det_list in tracks.items():
-            full_list = []
-            for i in range(len(det_list) - 1):
-                frame_i, bbox_i, cls_i = det_list[i]
-                frame_j, bbox_j, cls_j = det_list[i + 1]
-                full_list.append((frame_i, bbox_i, cls_i))
-                gap = frame_j - frame_i
-                if gap > 1:  # Interpolate only for small gaps
-                    print(f"Interpolating track {tid} from frame {frame_i} to {frame_j} (gap: {gap})")
-                    # For each missing frame, perform linear interpolation.
-                    for f in range(frame_i + 1, frame_j):
-                        alpha = (f - frame_i) / (frame_j - frame_i)
-                        interp_bbox = linear_interpolate(bbox_i, bbox_j, alpha)
-                        # print(f"Interpolated frame {f} for track {tid}: {interp_bbox}")
-                        full_list.append((f, interp_bbox, cls_i))
-            full_list.append(det_list[-1])
-            # Ensure the detections for the track are sorted by frame.
-            full_list = sorted(full_list, key=lambda x: x[0])
-            if len(full_list) < 6:
-                print(f"Track {tid} has less than 5 detections after interpolation. Skipping.")
-                continue
-            else:
-                tracks[tid] = full_list
-                # Add to the overall results list.
-                for (frm, bbox, cls) in full_list:
-                    interpolated_results.append((frm, tid, bbox[0], bbox[1], bbox[2], bbox[3], cls))
-        
-        # Remove tracks with less than 5 detections
-        tracks = {tid: det_list for tid, det_list in tracks.items() if len(det_list) >= 5}
-        print(f"Remaining tracks: {len(tracks)}")
-
-        # Save the interpolated results to a text file.
-        interpolated_results.sort(key=lambda x: (x[0], x[1]))  # sort by frame then track id
         interpolated_file = os.path.join(base_tracking_dir, seq, f"{seq}_mot_interpolated.txt")
         if output_file:
             interpolated_file = output_file
-            
-        with open(interpolated_file, 'w') as f:
-            for res in interpolated_results:
-                # Format: frame track_id x1 y1 x2 y2 class
-                f.write(f"{res[0]} {res[1]} {res[2]:.2f} {res[3]:.2f} {res[4]:.2f} {res[5]:.2f} {res[6]}\n")
+
+        if stream:
+            # One pass over the frame-sorted file; rows are written while it is read.
+            counts = {}
+            with profiling.phase('stream') as ph:
+                rows = stream_interpolate(iter_track_chunks(tracking_file), max_gap, min_len=min_len,
+                                          verbose=verbose, counts=counts)
+                write_records(interpolated_file, rows)
+                ph.rows = counts['rows']
+            print(f"Found {counts['tracks']} tracks in {seq}.")
+            print(f"Remaining tracks: {counts['kept']}")
+            print(f"Interpolated tracking results saved to {interpolated_file}")
+            continue
+
+        # Parse the tracking file in bulk (rows grouped by track, sorted by frame).
+        # Each row: frame_num track_id x1 y1 x2 y2 class
+        with profiling.phase('parse') as ph:
+            tracks = load_track_arrays(tracking_file)
+            ph.rows = len(tracks)
+        print(f"Found {tracks.n_tracks} tracks in {seq}.")
+
+        # Interpolate missing frames of all tracks at once and drop the short tracks;
+        # the results are sorted by frame then track id.
+        with profiling.phase('interpolate') as ph:
+            interpolated_results, kept = interpolate_tracks(tracks, max_gap=max_gap, min_len=min_len, verbose=verbose)
+            ph.rows = len(interpolated_results[0])
+        print(f"Remaining tracks: {len(kept)}")
+
+        # Format: frame track_id x1 y1 x2 y2 class; written atomically (.gz -> gzip)
+        with profiling.phase('write') as ph:
+            ph.rows = write_rows(interpolated_file, interpolated_results)
         print(f"Interpolated tracking results saved to {interpolated_file}")
 
 
@@ -103,8 +218,20 @@ if __name__ == "__main__":
     parser.add_argument('--seqs', nargs='+', required=True, help="List of sequences to process.")
     parser.add_argument('--input_file', type=str, help="Input tracking file.")
     parser.add_argument('--output_file', type=str, help="Output file for interpolated results.")
+    parser.add_argument('--max_gap', type=int, default=None,
+                        help="Only fill gaps of at most this many frames between two detections (default: any gap).")
+    parser.add_argument('--min_len', type=int, default=6,
+                        help="Drop tracks with fewer detections than this after interpolation.")
+    parser.add_argument('--verbose', action='store_true', help="Print every interpolated gap and skipped track.")
+    parser.add_argument('--stream', action='store_true',
+                        help="Process a frame-sorted input in one pass, holding only the tracks in view (needs --max_gap).")
+    profiling.add_arguments(parser)
     args = parser.parse_args()
+    if args.stream and args.max_gap is None:
+        parser.error("--stream needs --max_gap")
 
     base_tracking_dir = args.input_file if args.input_file else None
     output_dir = args.output_file if args.output_file else None
-    main(base_tracking_dir, output_dir, args.seqs)
+    with profiling.session('sct_tracklet_post_process', args):
+        main(base_tracking_dir, output_dir, args.seqs, max_gap=args.max_gap, min_len=args.min_len, verbose=args.verbose,
+             stream=args.stream)
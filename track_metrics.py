@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+track_metrics.py
+────────────────
+
+CLEAR-MOT and ID metrics of a single-camera tracking result, computed from
+NumPy event arrays instead of a ``motmetrics.MOTAccumulator``.
+
+The matching follows ``MOTAccumulator.update`` step by step, so the numbers
+are identical to ``mm.utils.compare_to_groundtruth`` + ``mh.compute``:
+
+1. per frame, the IoU distance ``1 - IoU`` of every GT/predicted box pair
+   (same floating-point operations as ``motmetrics.distances.iou_matrix``,
+   pairs above ``max_dist`` cannot be matched),
+2. correspondences of the previous frames are carried forward first,
+3. the remaining pairs go through ``scipy.optimize.linear_sum_assignment``
+   with the same large-cost padding as motmetrics' scipy solver; a match of
+   an object previously matched to another hypothesis is an ID switch,
+4. unmatched GT rows are misses, unmatched predictions false positives.
+
+Only step 2–3 need a Python loop (over frames, on dense integer ids); the
+events are stored per GT row and all metrics – fragmentations and mostly
+tracked/lost included – are derived from them with array operations. IDF1,
+IDP and IDR use the global ID assignment: the maximum-weight matching of the
+GT-id × predicted-id overlap counts, which is what motmetrics' min-cost
+formulation over the padded ``(no + nh)²`` cost matrix computes.
+
+* `iou_distance(objs, hyps, max_dist)` – motmetrics-compatible distance matrix,
+* `iou_distance_pairs(...)`           – the same for aligned box pairs,
+* `match_tracks(...)`                 – per-frame matching → `TrackEvents`,
+* `max_overlap(...)`                  – the global ID assignment's IDTP,
+* `id_scores(...)`                    – IDTP/IDFP/IDFN from overlap counts,
+* `summarize(events)`                 – the MOTChallenge metrics as a dict.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+# Same names and order as motmetrics.metrics.motchallenge_metrics
+MOTCHALLENGE_METRICS: Tuple[str, ...] = (
+    "idf1", "idp", "idr", "recall", "precision", "num_unique_objects",
+    "mostly_tracked", "partially_tracked", "mostly_lost", "num_false_positives",
+    "num_misses", "num_switches", "num_fragmentations", "mota", "motp",
+    "num_transfer", "num_ascend", "num_migrate",
+)
+
+
+def _xywh_distance(a: np.ndarray, b: np.ndarray, max_dist: float) -> np.ndarray:
+    a_min, b_min = a[..., :2], b[..., :2]
+    a_max, b_max = a_min + a[..., 2:], b_min + b[..., 2:]
+    i_size = np.maximum(np.minimum(a_max, b_max) - np.maximum(a_min, b_min), 0)
+    i_vol = np.prod(i_size, axis=-1)
+    a_vol = np.prod(np.maximum(a_max - a_min, 0), axis=-1)
+    b_vol = np.prod(np.maximum(b_max - b_min, 0), axis=-1)
+    u_vol = a_vol + b_vol - i_vol
+    with np.errstate(divide="ignore", invalid="ignore"):
+        iou = np.where(i_vol == 0, 0.0, np.true_divide(i_vol, u_vol))
+    dist = 1 - iou
+    return np.where(dist > max_dist, np.nan, dist)
+
+
+def iou_distance(objs: np.ndarray, hyps: np.ndarray, max_dist: float) -> np.ndarray:
+    """``1 - IoU`` of ``(x, y, w, h)`` boxes, NaN where it exceeds *max_dist*.
+
+    Uses the operations of ``motmetrics.distances.iou_matrix`` in the same
+    order, so distances (and therefore MOTP) are bit-identical.
+    """
+    return _xywh_distance(objs[:, None, :], hyps[None, :, :], max_dist)
+
+
+def iou_distance_pairs(objs: np.ndarray, hyps: np.ndarray, max_dist: float) -> np.ndarray:
+    """Like `iou_distance` for the aligned pairs ``(objs[i], hyps[i])``."""
+    return _xywh_distance(objs, hyps, max_dist)
+
+
+def _assign(dists: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Min-cost assignment over the finite entries of *dists* (motmetrics' scipy solver)."""
+    valid = np.isfinite(dists)
+    r = min(dists.shape)
+    c = np.abs(dists[valid]).max() + 1
+    rids, cids = linear_sum_assignment(np.where(valid, dists, 2 * r * c + 1))
+    keep = valid[rids, cids]
+    return rids[keep], cids[keep]
+
+
+@dataclass
+class TrackEvents:
+    """Outcome of `match_tracks`, one entry per GT row unless noted.
+
+    ``obj`` is the dense GT-id index (``0 .. n_objects-1``) and ``frame`` the
+    frame rank; ``hit`` marks matched rows (``dist`` is NaN otherwise) and
+    ``switch`` the matches that are ID switches. ``motp_terms`` holds the
+    distances in motmetrics' event order, padded with zeros for misses and
+    false positives, so MOTP sums them in the same order.
+    """
+
+    frame: np.ndarray
+    obj: np.ndarray
+    hit: np.ndarray
+    switch: np.ndarray
+    dist: np.ndarray
+    motp_terms: np.ndarray
+    n_predictions: int
+    n_transfer: int
+    n_ascend: int
+    n_migrate: int
+    obj_counts: np.ndarray            # (n_objects,) frames each GT id is present in
+    hyp_counts: np.ndarray            # (n_hypotheses,) frames each predicted id is present in
+    pair_obj: np.ndarray              # GT/predicted id index of every pair within max_dist,
+    pair_hyp: np.ndarray              # one entry per frame in which it occurs
+
+
+def _dense_ids(ids: np.ndarray) -> Tuple[np.ndarray, int]:
+    uniq, inv = np.unique(ids, return_inverse=True)
+    return inv.reshape(-1), len(uniq)
+
+
+def match_tracks(
+    gt_frame: np.ndarray,
+    gt_id: np.ndarray,
+    gt_boxes: np.ndarray,
+    pred_frame: np.ndarray,
+    pred_id: np.ndarray,
+    pred_boxes: np.ndarray,
+    max_dist: float = 0.5,
+) -> TrackEvents:
+    """Match predictions to ground truth frame by frame like ``compare_to_groundtruth``.
+
+    Params
+    ------
+    gt_frame, gt_id, pred_frame, pred_id : (N,) / (M,) arrays
+        Frame and track id of every row; ids must be unique within a frame.
+    gt_boxes, pred_boxes : (N, 4) / (M, 4) arrays
+        ``x y w h`` boxes.
+    max_dist : float
+        Largest IoU distance (``1 - IoU``) that may be matched.
+    Returns
+    -------
+    TrackEvents
+    """
+    gt_boxes = np.asarray(gt_boxes, dtype=np.float64).reshape(-1, 4)
+    pred_boxes = np.asarray(pred_boxes, dtype=np.float64).reshape(-1, 4)
+    g_order = np.argsort(gt_frame, kind="stable")        # keeps file order within a frame
+    p_order = np.argsort(pred_frame, kind="stable")
+    g_frame, p_frame = np.asarray(gt_frame)[g_order], np.asarray(pred_frame)[p_order]
+    g_obj, n_obj = _dense_ids(np.asarray(gt_id)[g_order])
+    p_hyp, n_hyp = _dense_ids(np.asarray(pred_id)[p_order])
+    g_boxes, p_boxes = gt_boxes[g_order], pred_boxes[p_order]
+
+    frames = np.union1d(g_frame, p_frame)
+    g_lo = np.searchsorted(g_frame, frames, side="left")
+    g_hi = np.searchsorted(g_frame, frames, side="right")
+    p_lo = np.searchsorted(p_frame, frames, side="left")
+    p_hi = np.searchsorted(p_frame, frames, side="right")
+
+    n = len(g_frame)
+    hit = np.zeros(n, dtype=bool)
+    switch = np.zeros(n, dtype=bool)
+    dist = np.full(n, np.nan)
+    match = np.full(n_obj, -1, dtype=np.int64)           # m: object → last hypothesis
+    res_match = np.full(n_hyp, -1, dtype=np.int64)       # res_m: hypothesis → last object (step 3 only)
+    matched_once = np.zeros(n_obj, dtype=bool)           # last_match
+    hyp_seen = np.zeros(n_hyp, dtype=bool)               # hypHistory
+    hyp_pos = np.full(n_hyp, -1, dtype=np.int64)
+    motp_parts, pair_obj, pair_hyp = [], [], []
+    n_transfer = n_ascend = n_migrate = 0
+
+    for glo, ghi, plo, phi in zip(g_lo.tolist(), g_hi.tolist(), p_lo.tolist(), p_hi.tolist()):
+        no, nh = ghi - glo, phi - plo
+        if no == 0 or nh == 0:
+            motp_parts.append(np.zeros(no + nh))
+            continue
+        oids, hids = g_obj[glo:ghi], p_hyp[plo:phi]
+        d = iou_distance(g_boxes[glo:ghi], p_boxes[plo:phi], max_dist)
+        finite = np.isfinite(d)
+        vi, vj = np.nonzero(finite)
+        pair_obj.append(oids[vi])
+        pair_hyp.append(hids[vj])
+
+        # 1. carry forward: the first object (in row order) whose previous hypothesis is
+        #    present and still within max_dist keeps it
+        o_done = np.zeros(no, dtype=bool)
+        h_done = np.zeros(nh, dtype=bool)
+        hyp_pos[hids] = np.arange(nh)
+        prev = match[oids]
+        j = np.where(prev >= 0, hyp_pos[np.maximum(prev, 0)], -1)
+        hyp_pos[hids] = -1
+        ci = np.nonzero(j >= 0)[0]
+        ci = ci[finite[ci, j[ci]]]
+        cj, first = np.unique(j[ci], return_index=True)
+        ci = np.sort(ci[first])
+        cj = j[ci]
+        o_done[ci] = h_done[cj] = True
+        matched_once[oids[ci]] = True
+        hyp_seen[hids[cj]] = True
+        carried = d[ci, cj]
+
+        # 2. optimal assignment of the rest
+        rest = finite & ~o_done[:, None] & ~h_done[None, :]
+        ai = aj = np.empty(0, dtype=np.int64)
+        if rest.any():
+            ai, aj = _assign(np.where(rest, d, np.nan))
+            for i, jj in zip(ai.tolist(), aj.tolist()):
+                o, h = oids[i], hids[jj]
+                if match[o] >= 0 and match[o] != h:
+                    switch[glo + i] = True
+                    n_ascend += not hyp_seen[h]
+                if res_match[h] >= 0 and res_match[h] != o:
+                    n_transfer += 1
+                    n_migrate += not matched_once[o]
+                hyp_seen[h] = matched_once[o] = True
+                match[o], res_match[h] = h, o
+            o_done[ai] = h_done[aj] = True
+
+        rows = glo + np.concatenate((ci, ai))
+        hit[rows] = True
+        dist[rows] = d[np.concatenate((ci, ai)), np.concatenate((cj, aj))]
+        motp_parts.append(carried)
+        motp_parts.append(d[ai, aj])
+        motp_parts.append(np.zeros(no + nh - 2 * len(rows)))
+
+    return TrackEvents(
+        frame=np.searchsorted(frames, g_frame), obj=g_obj, hit=hit, switch=switch, dist=dist,
+        motp_terms=np.concatenate(motp_parts) if motp_parts else np.zeros(0),
+        n_predictions=len(p_frame), n_transfer=n_transfer, n_ascend=n_ascend, n_migrate=n_migrate,
+        obj_counts=np.bincount(g_obj, minlength=n_obj), hyp_counts=np.bincount(p_hyp, minlength=n_hyp),
+        pair_obj=np.concatenate(pair_obj) if pair_obj else np.zeros(0, dtype=np.int64),
+        pair_hyp=np.concatenate(pair_hyp) if pair_hyp else np.zeros(0, dtype=np.int64),
+    )
+
+
+def max_overlap(pair_obj: np.ndarray, pair_hyp: np.ndarray, counts: Optional[np.ndarray] = None) -> int:
+    """Largest total overlap of a one-to-one GT-id ↔ predicted-id assignment.
+
+    *pair_obj*, *pair_hyp* are (non-negative integer) ids of co-occurring
+    pairs, each counting once – or *counts* times when given, so
+    pre-aggregated counts can be passed. This is the IDTP of the global ID
+    assignment when GT and predicted ids are unique within a frame.
+
+    The assignment decomposes over the connected components of the overlap
+    graph: components in which one side has a single id take their largest
+    count, the others are solved densely one by one, so memory follows the
+    largest component instead of ``#GT ids × #predicted ids``.
+    """
+    if len(pair_obj) == 0:
+        return 0
+    pair_obj, pair_hyp = np.asarray(pair_obj, dtype=np.int64), np.asarray(pair_hyp, dtype=np.int64)
+    n_hyp = int(pair_hyp.max()) + 1
+    keys, inv = np.unique(pair_obj * n_hyp + pair_hyp, return_inverse=True)
+    totals = np.bincount(inv.reshape(-1), weights=counts, minlength=len(keys)).astype(np.int64)
+    rows, r_idx = np.unique(keys // n_hyp, return_inverse=True)
+    cols, c_idx = np.unique(keys % n_hyp, return_inverse=True)
+    n_r, n_c = len(rows), len(cols)
+
+    graph = coo_matrix((np.ones(len(keys), dtype=np.int8), (r_idx, n_r + c_idx)), shape=(n_r + n_c, n_r + n_c))
+    n_comp, label = connected_components(graph, directed=False)
+    comp = label[r_idx]
+    comp_rows = np.bincount(label[:n_r], minlength=n_comp)
+    comp_cols = np.bincount(label[n_r:], minlength=n_comp)
+
+    star = np.minimum(comp_rows, comp_cols) == 1
+    best = np.zeros(n_comp, dtype=np.int64)
+    np.maximum.at(best, comp, totals)
+    idtp = int(best[star].sum())
+
+    order = np.argsort(comp, kind="stable")
+    bounds = np.searchsorted(comp[order], np.arange(n_comp + 1))
+    for c in np.flatnonzero(~star).tolist():
+        e = order[bounds[c]:bounds[c + 1]]
+        rr, ri = np.unique(r_idx[e], return_inverse=True)
+        cc, ci = np.unique(c_idx[e], return_inverse=True)
+        weight = np.zeros((len(rr), len(cc)), dtype=np.int64)
+        weight[ri.reshape(-1), ci.reshape(-1)] = totals[e]
+        a, b = linear_sum_assignment(weight, maximize=True)
+        idtp += int(weight[a, b].sum())
+    return idtp
+
+
+def id_scores(
+    obj_counts: np.ndarray,
+    hyp_counts: np.ndarray,
+    pair_obj: np.ndarray,
+    pair_hyp: np.ndarray,
+) -> Tuple[int, int, int]:
+    """IDTP, IDFP and IDFN of the global one-to-one GT-id ↔ predicted-id assignment.
+
+    *obj_counts* / *hyp_counts* are the number of frames each (dense) id is
+    present in; *pair_obj*, *pair_hyp* list every frame-level pair within the
+    matching distance. The assignment maximises the summed overlap counts,
+    which minimises IDFP + IDFN exactly as motmetrics' padded cost matrix.
+    """
+    idtp = max_overlap(pair_obj, pair_hyp)
+    return idtp, int(hyp_counts.sum()) - idtp, int(obj_counts.sum()) - idtp
+
+
+def summarize(events: TrackEvents) -> Dict[str, float]:
+    """The `MOTCHALLENGE_METRICS` of *events*, with motmetrics' definitions."""
+    n_objects = len(events.obj)
+    n_fp = events.n_predictions - int(events.hit.sum())
+    n_switches = int(events.switch.sum())
+    n_detections = int(events.hit.sum())
+    n_misses = n_objects - n_detections
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        present = events.obj_counts > 0
+        tracked = np.bincount(events.obj[events.hit], minlength=len(events.obj_counts))[present]
+        ratios = tracked / events.obj_counts[present]
+
+        # fragmentations: tracked → missed transitions between the first and last match of an object
+        order = np.lexsort((events.frame, events.obj))
+        obj, miss = events.obj[order], ~events.hit[order]
+        same = obj[1:] == obj[:-1]
+        last_hit = np.full(len(events.obj_counts), -1)
+        np.maximum.at(last_hit, obj[~miss], np.nonzero(~miss)[0])
+        starts = np.nonzero(same & miss[1:] & ~miss[:-1])[0] + 1
+        n_frag = int((starts < last_hit[obj[starts]]).sum())
+
+        idtp, idfp, idfn = id_scores(events.obj_counts, events.hyp_counts, events.pair_obj, events.pair_hyp)
+        return {
+            "idf1": np.true_divide(2 * float(idtp), n_objects + events.n_predictions),
+            "idp": np.true_divide(float(idtp), idtp + idfp),
+            "idr": np.true_divide(float(idtp), idtp + idfn),
+            "recall": np.true_divide(n_detections, n_objects),
+            "precision": np.true_divide(n_detections, n_fp + n_detections),
+            "num_unique_objects": int(present.sum()),
+            "mostly_tracked": int((ratios >= 0.8).sum()),
+            "partially_tracked": int(((ratios >= 0.2) & (ratios < 0.8)).sum()),
+            "mostly_lost": int((ratios < 0.2).sum()),
+            "num_false_positives": n_fp,
+            "num_misses": n_misses,
+            "num_switches": n_switches,
+            "num_fragmentations": n_frag,
+            "mota": 1.0 - np.true_divide(n_misses + n_switches + n_fp, n_objects),
+            "motp": np.true_divide(events.motp_terms.sum(), n_detections),
+            "num_transfer": events.n_transfer,
+            "num_ascend": events.n_ascend,
+            "num_migrate": events.n_migrate,
+        }
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+track_store.py
+──────────────
+
+Columnar, memory-mappable cache for MOT-style track files.
+
+Every stage of the pipeline reads the same ``frame track_id x1 y1 x2 y2 cls``
+text files (``*_mot_interpolated_final.txt`` and friends). Parsing them with
+``str.split`` dominates the wall time on long 4K sequences, so the first load
+of a text file writes a binary sibling ``<file>.trk`` and every later load maps
+that file straight into NumPy arrays.
+
+Store layout
+============
+``MAGIC`` (8 bytes) | header length (uint64, little endian) | JSON header |
+padding | one contiguous, 64-byte aligned block per column.
+
+Rows are grouped by track id (ascending) and sorted by frame inside each
+track, so the per-track offset table gives every track as a plain slice.
+The header records the size, ``mtime_ns`` and SHA-1 of the source text file;
+the store is rebuilt automatically whenever the text file changes.
+
+Usage
+-----
+```python
+from track_store import load_track_arrays
+
+arrs = load_track_arrays("imagesc001_mot_interpolated_final.txt")
+for tid, sl in arrs.iter_tracks():
+    print(tid, arrs.frame[sl])
+```
+or, from the shell, ``python track_store.py <file.txt> [...]`` to (re)build
+stores ahead of time.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from mot_io import MOT_COLUMNS, iter_mot_columns, read_mot_columns
+
+MAGIC = b"MCTTRK01"
+STORE_SUFFIX = ".trk"
+STORE_VERSION = 1
+MISSING_CLS = -1                   # class id stored for rows without a class column
+
+_ALIGN = 64
+_HEADER_RESERVE = 4096             # header is padded so it can be patched in place
+
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("frame", "<i4"),
+    ("track_id", "<i4"),
+    ("x1", "<f8"),
+    ("y1", "<f8"),
+    ("x2", "<f8"),
+    ("y2", "<f8"),
+    ("cls", "<i4"),
+)
+INDEX_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("track_ids", "<i4"),
+    ("offsets", "<i8"),
+)
+
+LegacyTracks = Dict[int, List[Tuple[int, List[float], int]]]  # track_id -> [(frame, bbox, cls)]
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# In-memory view
+# ────────────────────────────────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class TrackArrays:
+    """Column arrays of one track file, grouped by track and sorted by frame.
+
+    Arrays loaded from a store are read-only views into the mapped file.
+    ``offsets`` has ``n_tracks + 1`` entries; track ``track_ids[k]`` occupies
+    rows ``offsets[k]:offsets[k + 1]``.
+    """
+
+    frame: np.ndarray
+    track_id: np.ndarray
+    x1: np.ndarray
+    y1: np.ndarray
+    x2: np.ndarray
+    y2: np.ndarray
+    cls: np.ndarray
+    track_ids: np.ndarray
+    offsets: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.frame.shape[0])
+
+    @property
+    def n_tracks(self) -> int:
+        return int(self.track_ids.shape[0])
+
+    def boxes(self) -> np.ndarray:
+        """Return an ``(N, 4)`` float64 array of ``x1 y1 x2 y2`` (a copy)."""
+        return np.column_stack((self.x1, self.y1, self.x2, self.y2))
+
+    def track_slice(self, track_id: int) -> Optional[slice]:
+        """Row slice of *track_id*, or ``None`` if the track does not exist."""
+        k = int(np.searchsorted(self.track_ids, track_id))
+        if k == self.n_tracks or self.track_ids[k] != track_id:
+            return None
+        return slice(int(self.offsets[k]), int(self.offsets[k + 1]))
+
+    def iter_tracks(self) -> Iterator[Tuple[int, slice]]:
+        """Yield ``(track_id, row_slice)`` for every track in ascending id order."""
+        bounds = self.offsets.tolist()
+        for k, tid in enumerate(self.track_ids.tolist()):
+            yield tid, slice(bounds[k], bounds[k + 1])
+
+    def select(self, mask: np.ndarray) -> "TrackArrays":
+        """Return the rows where *mask* is true (grouping and order are kept)."""
+        return _group_columns({name: getattr(self, name)[mask] for name, _ in COLUMNS}, presorted=True)
+
+    def to_dict(self, fill_cls: Optional[int] = None) -> LegacyTracks:
+        """Convert to the ``{track_id: [(frame, [x1, y1, x2, y2], cls), ...]}`` layout.
+
+        Rows without a class column get *fill_cls* when it is given.
+        """
+        cls = self.cls if fill_cls is None else np.where(self.cls == MISSING_CLS, fill_cls, self.cls)
+        # millions of small lists are allocated here; a cyclic GC pass every few
+        # thousand of them would re-scan everything already built
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            frame = self.frame.tolist()
+            cls = cls.tolist()
+            boxes = self.boxes().tolist()
+            return {
+                tid: list(zip(frame[sl], boxes[sl], cls[sl]))
+                for tid, sl in self.iter_tracks()
+            }
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+
+def _group_columns(cols: Dict[str, np.ndarray], presorted: bool = False) -> TrackArrays:
+    """Sort raw columns by (track_id, frame) and build the offset table."""
+    track_id = np.asarray(cols["track_id"], dtype=np.int32)
+    frame = np.asarray(cols["frame"], dtype=np.int32)
+    if not presorted:
+        # lexsort is stable, so duplicated (track, frame) rows keep file order
+        order = np.lexsort((frame, track_id))
+        cols = {name: np.asarray(cols[name])[order] for name, _ in COLUMNS}
+        track_id = cols["track_id"].astype(np.int32, copy=False)
+        frame = cols["frame"].astype(np.int32, copy=False)
+
+    starts = np.flatnonzero(np.diff(track_id)) + 1
+    offsets = np.concatenate(([0], starts, [track_id.shape[0]])).astype(np.int64)
+    if track_id.shape[0] == 0:
+        offsets = np.zeros(1, dtype=np.int64)
+    track_ids = track_id[offsets[:-1]]
+
+    out = {name: np.asarray(cols[name], dtype=np.dtype(dt)) for name, dt in COLUMNS}
+    out["frame"], out["track_id"] = frame, track_id
+    return TrackArrays(track_ids=track_ids.astype(np.int32), offsets=offsets, **out)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Text parsing
+# ────────────────────────────────────────────────────────────────────────────────
+
+def parse_mot_text(txt_path: str) -> Dict[str, np.ndarray]:
+    """Parse a MOT text file into raw (unsorted) column arrays.
+
+    Uses the bulk reader in ``mot_io``: blank lines, ``#`` comments and lines
+    with fewer than six fields are skipped, ids written as floats (``12.0``)
+    are accepted. A missing class column is stored as ``MISSING_CLS``.
+    """
+    cols = read_mot_columns(txt_path, MOT_COLUMNS, min_cols=6)
+    cols["cls"] = np.where(np.isnan(cols["cls"]), MISSING_CLS, cols["cls"])
+    return cols
+
+
+def iter_track_chunks(txt_path: str, chunk_rows: int = 1 << 16) -> Iterator[Dict[str, np.ndarray]]:
+    """Parse a MOT text file chunk by chunk, in file order (no grouping, no store).
+
+    For one-pass tools on frame-sorted files: each chunk holds at most
+    *chunk_rows* rows, with the column dtypes of the store and a missing
+    class column stored as ``MISSING_CLS``, like `parse_mot_text`.
+    """
+    for cols in iter_mot_columns(txt_path, MOT_COLUMNS, min_cols=6, chunk_rows=chunk_rows):
+        cols["cls"] = np.where(np.isnan(cols["cls"]), MISSING_CLS, cols["cls"])
+        yield {name: np.asarray(cols[name], dtype=np.dtype(dt)) for name, dt in COLUMNS}
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Store I/O
+# ────────────────────────────────────────────────────────────────────────────────
+
+def store_path(txt_path: str) -> str:
+    return f"{txt_path}{STORE_SUFFIX}"
+
+
+def file_sha1(path: str) -> str:
+    """Hex SHA-1 of a file's content (read in 1 MiB chunks)."""
+    h = hashlib.sha1()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _source_info(txt_path: str, sha1: Optional[str] = None) -> Dict[str, object]:
+    st = os.stat(txt_path)
+    return {
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha1": sha1 if sha1 is not None else file_sha1(txt_path),
+    }
+
+
+def _aligned(n: int) -> int:
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _encode_header(header: Dict[str, object]) -> bytes:
+    raw = json.dumps(header, sort_keys=True).encode()
+    size = max(_HEADER_RESERVE, _aligned(len(MAGIC) + 8 + len(raw)))
+    return (MAGIC + np.uint64(len(raw)).tobytes() + raw).ljust(size, b" ")
+
+
+def write_store(arrs: TrackArrays, out_path: str, source: Dict[str, object]) -> None:
+    """Atomically write *arrs* as a columnar store at *out_path*."""
+    blocks = [(name, dt, getattr(arrs, name)) for name, dt in COLUMNS + INDEX_COLUMNS]
+    columns, offset = {}, 0
+    for name, dt, arr in blocks:
+        columns[name] = {"dtype": dt, "offset": offset, "count": int(arr.shape[0])}
+        offset = _aligned(offset + arr.shape[0] * np.dtype(dt).itemsize)
+    header = {
+        "version": STORE_VERSION,
+        "source": source,
+        "n_rows": len(arrs),
+        "n_tracks": arrs.n_tracks,
+        "columns": columns,
+    }
+    head = _encode_header(header)
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(out_path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(head)
+            for name, dt, arr in blocks:
+                fh.seek(len(head) + columns[name]["offset"])
+                fh.write(np.ascontiguousarray(arr, dtype=np.dtype(dt)).tobytes())
+            fh.truncate(len(head) + offset)
+        os.replace(tmp, out_path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def read_store_header(path: str) -> Optional[Tuple[Dict[str, object], int]]:
+    """Return ``(header, data_start)`` of a store, or ``None`` if unreadable."""
+    try:
+        with open(path, "rb") as fh:
+            prefix = fh.read(len(MAGIC) + 8)
+            if len(prefix) < len(MAGIC) + 8 or prefix[:len(MAGIC)] != MAGIC:
+                return None
+            n = int(np.frombuffer(prefix[len(MAGIC):], dtype="<u8")[0])
+            header = json.loads(fh.read(n))
+    except (OSError, ValueError):
+        return None
+    if header.get("version") != STORE_VERSION:
+        return None
+    data_start = max(_HEADER_RESERVE, _aligned(len(MAGIC) + 8 + n))
+    return header, data_start
+
+
+def open_store(path: str) -> TrackArrays:
+    """Map a store file and return zero-copy, read-only column views."""
+    parsed = read_store_header(path)
+    if parsed is None:
+        raise ValueError(f"{path} is not a valid track store.")
+    header, data_start = parsed
+    with open(path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            raise ValueError(f"{path} is empty.")
+        buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    cols = {
+        name: np.frombuffer(buf, dtype=np.dtype(spec["dtype"]), count=spec["count"],
+                            offset=data_start + spec["offset"])
+        for name, spec in header["columns"].items()
+    }
+    return TrackArrays(**cols)
+
+
+def _store_is_current(header: Dict[str, object], txt_path: str) -> Tuple[bool, Optional[str]]:
+    """Check a store header against the text file; returns (current, sha1_if_computed)."""
+    src = header["source"]
+    st = os.stat(txt_path)
+    if src["size"] == st.st_size and src["mtime_ns"] == st.st_mtime_ns:
+        return True, None
+    sha1 = file_sha1(txt_path)
+    return src["sha1"] == sha1, sha1
+
+
+def _patch_source(path: str, header: Dict[str, object], data_start: int, source: Dict[str, object]) -> None:
+    """Refresh the recorded mtime after a touch that did not change the content."""
+    head = _encode_header(dict(header, source=source))
+    if len(head) != data_start:
+        return
+    try:
+        with open(path, "r+b") as fh:
+            fh.write(head)
+    except OSError:
+        pass
+
+
+def build_store(txt_path: str) -> TrackArrays:
+    """Parse *txt_path* and (re)write its store; returns the parsed arrays."""
+    sha1 = file_sha1(txt_path)
+    arrs = _group_columns(parse_mot_text(txt_path))
+    try:
+        write_store(arrs, store_path(txt_path), _source_info(txt_path, sha1))
+    except OSError as e:
+        print(f"✗ Could not write track store for {txt_path}: {e}")
+    return arrs
+
+
+def load_track_arrays(txt_path: str, require_cls: bool = False, use_store: bool = True) -> TrackArrays:
+    """Load a MOT text file through its columnar store.
+
+    Params
+    ------
+    txt_path : str
+        Path of the ``frame track_id x1 y1 x2 y2 [cls]`` text file.
+    require_cls : bool
+        Drop rows that have no class column (the strict 7-column readers).
+    use_store : bool
+        Read/write the ``.trk`` sibling. When false the text is parsed directly.
+    Returns
+    -------
+    TrackArrays
+        Rows grouped by track id and sorted by frame.
+    """
+    if not os.path.isfile(txt_path):
+        raise FileNotFoundError(txt_path)
+
+    arrs = None
+    if use_store:
+        spath = store_path(txt_path)
+        parsed = read_store_header(spath) if os.path.isfile(spath) else None
+        if parsed is not None:
+            current, sha1 = _store_is_current(parsed[0], txt_path)
+            if current:
+                if sha1 is not None:
+                    _patch_source(spath, *parsed, _source_info(txt_path, sha1))
+                arrs = open_store(spath)
+        if arrs is None:
+            arrs = build_store(txt_path)
+    else:
+        arrs = _group_columns(parse_mot_text(txt_path))
+
+    if require_cls:
+        missing = arrs.cls == MISSING_CLS
+        if missing.any():
+            arrs = arrs.select(~missing)
+    return arrs
+
+
+def load_track_dict(txt_path: str, require_cls: bool = True) -> LegacyTracks:
+    """Shortcut for ``load_track_arrays(...).to_dict()``."""
+    return load_track_arrays(txt_path, require_cls=require_cls).to_dict()
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Entry point
+# ────────────────────────────────────────────────────────────────────────────────
+
+def main():
+    ap = argparse.ArgumentParser(description="Build or refresh columnar track stores for MOT text files.")
+    ap.add_argument("txt_files", nargs="+", help="MOT text files (frame track_id x1 y1 x2 y2 [cls]).")
+    ap.add_argument("--force", action="store_true", help="Rebuild even if the store is up to date.")
+    args = ap.parse_args()
+
+    for txt in args.txt_files:
+        arrs = build_store(txt) if args.force else load_track_arrays(txt)
+        print(f"✓ {store_path(txt)}: {len(arrs)} rows, {arrs.n_tracks} tracks")
+
+
+if __name__ == "__main__":
+    main()
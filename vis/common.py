@@ -0,0 +1,96 @@
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from mtmc_parquet import MTMC_COLUMNS, filter_mtmc, is_parquet, read_mtmc_parquet  # noqa: E402
+from track_store import load_track_arrays  # noqa: E402
+
+FRAME_PATTERNS = ("img{:06d}.jpg", "img{:06d}.png", "{:06d}.jpg", "{:06d}.png")
+
+
+@dataclass(frozen=True)
+class Detection:
+    track_id: int
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+    cls: int = -1
+
+
+def stable_color(track_id: int) -> tuple[int, int, int]:
+    """Return a BGR colour that is always the same for a given track ID."""
+    rng = np.random.default_rng(abs(int(track_id)))
+    return tuple(int(c) for c in rng.integers(64, 256, 3))
+
+
+def draw_detection(image: np.ndarray, detection: Detection, label: str | None = None, color=None) -> None:
+    color = stable_color(detection.track_id) if color is None else color
+    label = str(detection.track_id) if label is None else label
+    x1, y1 = int(detection.x1), int(detection.y1)
+    x2, y2 = int(detection.x2), int(detection.y2)
+    cv2.rectangle(image, (x1, y1), (x2, y2), color, 3)
+    cv2.putText(image, label, (x1, max(y1 - 10, 0)), cv2.FONT_HERSHEY_SIMPLEX, 1.5, color, 3)
+
+
+def find_frame(image_dir: Path, frame_id: int) -> Path | None:
+    for pattern in FRAME_PATTERNS:
+        path = image_dir / pattern.format(frame_id)
+        if path.is_file():
+            return path
+    return None
+
+
+def parse_key_value_map(values: list[str]) -> dict[str, str]:
+    mapping = {}
+    for value in values:
+        key, sep, item = value.partition("=")
+        if not sep or not key or not item:
+            raise ValueError(f"Expected key=value, got: {value}")
+        mapping[key] = item
+    return mapping
+
+
+def read_sct_tracks(path: Path) -> dict[int, list[Detection]]:
+    """Read a single-camera track file into frame -> detections."""
+    arrs = load_track_arrays(str(path), use_store=False)
+    frames: dict[int, list[Detection]] = {}
+    for row in zip(arrs.frame.tolist(), arrs.track_id.tolist(), arrs.x1.tolist(), arrs.y1.tolist(),
+                   arrs.x2.tolist(), arrs.y2.tolist(), arrs.cls.tolist()):
+        frames.setdefault(row[0], []).append(Detection(*row[1:]))
+    return frames
+
+
+def read_mtmc_tracks(
+    path: Path,
+    camera_map: dict[str, str],
+    cameras: list[str] | None = None,
+    frame_range: tuple[int, int] | None = None,
+) -> dict[str, dict[int, list[Detection]]]:
+    """Read MTMC labels (cam id frame x y w h xworld yworld) into camera -> frame -> detections.
+
+    *cameras* (mapped camera names) and *frame_range* (inclusive) restrict what is
+    loaded; for a Parquet data set they are pushed down to the file scan.
+    """
+    raw_ids = None
+    if cameras is not None:
+        by_name = {name: raw for raw, name in camera_map.items()}
+        raw_ids = [int(by_name.get(name, name)) for name in cameras if by_name.get(name, name).isdigit()]
+
+    if is_parquet(str(path)):
+        df = read_mtmc_parquet(str(path), cameras=raw_ids, frame_range=frame_range, columns=MTMC_COLUMNS[:7])
+    else:
+        data = np.loadtxt(path, usecols=range(7), ndmin=2)
+        df = filter_mtmc(pd.DataFrame(data, columns=MTMC_COLUMNS[:7]), cameras=raw_ids, frame_range=frame_range)
+
+    tracks: dict[str, dict[int, list[Detection]]] = {}
+    for cam, tid, frame, x, y, w, h in df.itertuples(index=False):
+        camera = camera_map.get(str(int(cam)), str(int(cam)))
+        detection = Detection(int(tid), x, y, x + w, y + h)
+        tracks.setdefault(camera, {}).setdefault(int(frame), []).append(detection)
+    return tracks
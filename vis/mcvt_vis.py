@@ -12,7 +12,12 @@ def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Visualize multi-camera tracking labels over video files."
     )
-    parser.add_argument("--tracks", type=Path, required=True, help="MTMC track file.")
+    parser.add_argument(
+        "--tracks",
+        type=Path,
+        required=True,
+        help="MTMC track file, or a camera-partitioned Parquet data set written by MCVT_data_creation.py --parquet.",
+    )
     parser.add_argument(
         "--video",
         action="append",
@@ -27,6 +32,7 @@ def parse_args() -> argparse.Namespace:
         help="Optional raw track camera ID to video camera name mapping, e.g. 1=imagesc001.",
     )
     parser.add_argument("--start-frame", type=int, default=1, help="First one-indexed track frame to render.")
+    parser.add_argument("--end-frame", type=int, default=None, help="Last one-indexed track frame to render.")
     return parser.parse_args()
 
 
@@ -57,7 +63,13 @@ def make_grid(frames: list[np.ndarray]) -> np.ndarray:
 def main() -> None:
     args = parse_args()
     videos = parse_video_args(args.video)
-    tracks = read_mtmc_tracks(args.tracks, parse_key_value_map(args.camera_map))
+    end_frame = args.end_frame if args.end_frame is not None else np.iinfo(np.int32).max
+    tracks = read_mtmc_tracks(
+        args.tracks,
+        parse_key_value_map(args.camera_map),
+        cameras=list(videos),
+        frame_range=(args.start_frame, end_frame),
+    )
 
     captures = {camera: cv2.VideoCapture(str(path)) for camera, path in videos.items()}
     if any(not capture.isOpened() for capture in captures.values()):
@@ -83,7 +95,7 @@ def main() -> None:
     while True:
         frames = []
         for camera, capture in captures.items():
-            ok, frame = capture.read()
+            ok, frame = capture.read() if frame_id <= end_frame else (False, None)
             if not ok:
                 for cap in captures.values():
                     cap.release()